@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Callable
+
+
+class AssetRegistry:
+    """按需加载的资源注册表
+
+    纹理、曲线等资源以加载函数注册，首次使用时才真正加载，
+    也可以在窗口显示后由warm_up在后台线程中提前全部加载。
+    加载结果与耗时都记录在注册表中，供启动耗时报告使用。
+    """
+    def __init__(self):
+        self.loaders: dict[str, Callable[[], object]] = {}
+        self.values: dict[str, object] = {}
+        self.load_times: dict[str, float] = {}
+        # 每个资源一把锁：后台预热加载慢资源时，不阻塞主线程取用其他资源
+        self.locks: dict[str, threading.Lock] = {}
+        self.warm_up_thread = None
+
+    def register(self, name: str, loader: Callable[[], object]):
+        if name in self.loaders:
+            raise ValueError(f"资源已注册: {name}")
+        self.loaders[name] = loader
+        self.locks[name] = threading.Lock()
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.values
+
+    def get(self, name: str) -> object:
+        """返回资源，未加载时在当前线程中加载"""
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        with self.locks[name]:
+            if name not in self.values:
+                start = time.perf_counter()
+                self.values[name] = self.loaders[name]()
+                self.load_times[name] = time.perf_counter() - start
+            return self.values[name]
+
+    def load_all(self):
+        for name in list(self.loaders):
+            self.get(name)
+
+    def warm_up(self) -> threading.Thread:
+        """在后台线程中加载全部资源（只加载QImage与NumPy数据，不创建QPixmap）"""
+        if self.warm_up_thread is None:
+            self.warm_up_thread = threading.Thread(target=self.load_all, name="asset-warm-up", daemon=True)
+            self.warm_up_thread.start()
+        return self.warm_up_thread
+
+
+# 全局实例
+ASSETS = AssetRegistry()
+
+
+class Asset:
+    """延迟加载的类属性
+
+    在类体中以`NAME = Asset(loader, *args)`声明，首次访问时调用loader(*args)，
+    之后用加载结果替换类上的该属性，后续访问即为普通的属性读取。
+    """
+    def __init__(self, loader: Callable, *args, registry: AssetRegistry = ASSETS):
+        self.loader = loader
+        self.args = args
+        self.registry = registry
+        self.owner = None
+        self.attribute = None
+        self.name = None
+
+    def __set_name__(self, owner, attribute: str):
+        self.owner = owner
+        self.attribute = attribute
+        self.name = f"{owner.__qualname__}.{attribute}"
+        self.registry.register(self.name, lambda: self.loader(*self.args))
+
+    def __get__(self, instance, owner=None):
+        value = self.registry.get(self.name)
+        setattr(self.owner, self.attribute, value)
+        return value
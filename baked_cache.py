@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Callable, Iterable
+
+import numpy as np
+
+# 缓存格式版本：烘焙逻辑或文件布局变化时递增，旧版本目录不再被读取
+CACHE_VERSION = 1
+
+
+def default_cache_dir() -> str:
+    """用户缓存目录下的DesktopTouch/baked"""
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Caches")
+    else:
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "DesktopTouch", "baked")
+
+
+class BakedCache:
+    """烘焙结果的磁盘缓存
+
+    每个条目是若干个NumPy数组，按名称存放为<名称>-<键>.<字段>.npy，
+    再写入<名称>-<键>.json列出字段，作为条目完整写入的标志。
+    键是源文件内容与参数的SHA-256，纹理或关键帧变化时键随之变化，
+    旧键的文件在写入新条目时删除。读取时以mmap_mode="r"映射，不复制数据。
+    """
+    def __init__(self, directory: str | None = None, enabled: bool = True):
+        """
+        Args:
+            directory (str | None): 缓存根目录，缺省为default_cache_dir()
+            enabled (bool): 为False时不读写磁盘，每次都重新烘焙
+        """
+        self.directory = os.path.join(directory or default_cache_dir(), f"v{CACHE_VERSION}")
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(files: Iterable[str] = (), params: Iterable = ()) -> str:
+        """源文件内容与参数的摘要（数组按字节，其余对象按repr）"""
+        digest = hashlib.sha256()
+        for path in files:
+            with open(path, "rb") as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+        for param in params:
+            if isinstance(param, np.ndarray):
+                digest.update(f"{param.dtype}{param.shape}".encode())
+                digest.update(np.ascontiguousarray(param).tobytes())
+            else:
+                digest.update(repr(param).encode())
+        return digest.hexdigest()[:32]
+
+    def _path(self, name: str, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{name}-{key}{suffix}")
+
+    def load(self, name: str, key: str) -> dict[str, np.ndarray] | None:
+        """读取条目，不存在或不完整时返回None"""
+        try:
+            with open(self._path(name, key, ".json"), encoding="utf-8") as file:
+                fields = json.load(file)["fields"]
+            return {field: np.load(self._path(name, key, f".{field}.npy"), mmap_mode="r") for field in fields}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(self, name: str, key: str, arrays: dict[str, np.ndarray]):
+        """写入条目并删除同名的旧条目；磁盘不可写时静默跳过"""
+        with self.lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for field, array in arrays.items():
+                    path = self._path(name, key, f".{field}.npy")
+                    temporary = f"{path}.{os.getpid()}.tmp"
+                    with open(temporary, "wb") as file:
+                        np.save(file, np.ascontiguousarray(array))
+                    os.replace(temporary, path)
+                temporary = f"{self._path(name, key, '.json')}.{os.getpid()}.tmp"
+                with open(temporary, "w", encoding="utf-8") as file:
+                    json.dump({"fields": list(arrays)}, file)
+                os.replace(temporary, self._path(name, key, ".json"))
+                self._remove_stale(name, key)
+            except OSError:
+                pass
+
+    def _remove_stale(self, name: str, key: str):
+        prefix, current = f"{name}-", f"{name}-{key}."
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and not filename.startswith(current):
+                # 名称本身含"-"时，只删除前缀之后紧跟32位键的文件
+                stale_key = filename[len(prefix):].split(".", 1)[0]
+                if len(stale_key) == len(key):
+                    try:
+                        os.remove(os.path.join(self.directory, filename))
+                    except OSError:
+                        pass
+
+    def load_or_bake(self,
+                     name: str,
+                     bake: Callable[[], dict[str, np.ndarray]],
+                     files: Iterable[str] = (),
+                     params: Iterable = ()) -> dict[str, np.ndarray]:
+        """
+        读取缓存的烘焙结果，缺失或失效时调用bake并写入缓存
+
+        Args:
+            name (str): 条目名称，同名条目只保留最新的键
+            bake: 烘焙函数，返回字段名到数组的字典
+            files: 参与计算键的源文件
+            params: 参与计算键的其余参数（关键帧、尺寸、版本号等）
+
+        Returns:
+            dict[str, np.ndarray]: 命中时为只读的内存映射数组
+        """
+        if not self.enabled:
+            return bake()
+        key = self.key(files, params)
+        arrays = self.load(name, key)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+        self.misses += 1
+        arrays = bake()
+        self.store(name, key, arrays)
+        return arrays
+
+    def stats(self) -> dict:
+        return {"directory": self.directory, "enabled": self.enabled, "hits": self.hits, "misses": self.misses}
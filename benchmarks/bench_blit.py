@@ -0,0 +1,82 @@
+"""
+直通Alpha与预乘Alpha纹理的绘制吞吐量对比
+
+用法（在仓库根目录）：
+    python benchmarks/bench_blit.py
+
+半透明窗口的后备缓冲区为Format_ARGB32_Premultiplied。
+本脚本把同一张着色后的特效纹理分别以Format_ARGB32与Format_ARGB32_Premultiplied
+绘制到该格式的画布上，并对比QPixmap.fromImage的转换开销；
+同时校验change_image_by_grayscale的输出确为合法的预乘像素（各通道不大于Alpha），
+校验失败时以非零状态退出。
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QPoint, Qt
+from PySide6.QtGui import QGuiApplication, QImage, QPainter, QPixmap
+
+BLITS_PER_FRAME = 64
+CANVAS_SIZE = 1024
+
+
+def check_premultiplied(image: QImage) -> bool:
+    """预乘像素的RGB通道都不应超过其Alpha"""
+    pixels = np.frombuffer(image.constBits(), dtype=np.uint32)
+    alpha = pixels >> 24
+    return image.format() == QImage.Format.Format_ARGB32_Premultiplied and all(
+        bool(np.all(((pixels >> shift) & 0xFF) <= alpha)) for shift in (16, 8, 0))
+
+
+def run_benchmark(texture: QImage):
+    canvas = QImage(CANVAS_SIZE, CANVAS_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+    formats = {
+        "ARGB32（直通Alpha）": texture.convertToFormat(QImage.Format.Format_ARGB32),
+        "ARGB32_Premultiplied": texture.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied),
+    }
+    step = CANVAS_SIZE - texture.width()
+    positions = [QPoint((i * 97) % step, (i * 61) % step) for i in range(BLITS_PER_FRAME)]
+
+    def blit_images(image):
+        canvas.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(canvas)
+        for position in positions:
+            painter.drawImage(position, image)
+        painter.end()
+
+    def timed(label, func, number, per):
+        seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+        print(f"{label:<40} {seconds * 1e3:8.3f} ms  ({per / seconds:10.0f} 次/秒)")
+
+    print(f"纹理 {texture.width()}x{texture.height()}，每帧 {BLITS_PER_FRAME} 次绘制到 {CANVAS_SIZE}x{CANVAS_SIZE} 画布\n")
+    print("--- QPainter.drawImage（每帧） ---")
+    for label, image in formats.items():
+        timed(label, lambda image=image: blit_images(image), 20, BLITS_PER_FRAME)
+    print("\n--- QPixmap.fromImage（每张纹理） ---")
+    for label, image in formats.items():
+        timed(label, lambda image=image: QPixmap.fromImage(image), 200, 1)
+
+
+if __name__ == "__main__":
+    app = QGuiApplication(sys.argv)
+
+    from img_utils import colorize_image
+    from constants import RingConstants
+
+    grayscale = RingConstants.GRAYSCALE_IMAGE
+    ok = True
+    for transparent in (False, True):
+        result = colorize_image(grayscale, (255, 160, 40), 200, transparent)
+        valid = check_premultiplied(result)
+        ok &= valid
+        print(f"{'OK  ' if valid else 'FAIL'} colorize_image 预乘输出 (grayscale_image_transparent={transparent})")
+    print()
+
+    run_benchmark(colorize_image(grayscale, (255, 160, 40), 200))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,106 @@
+"""
+曲线引擎的精度校验与微基准
+
+用法（在仓库根目录）：
+    python benchmarks/bench_curves.py
+
+与scipy的interp1d / CubicHermiteSpline逐点比对所有*_KEY_POINTS，
+误差超出容差时以非零状态退出；随后输出标量与向量化求值的耗时对比。
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curves import compile_color_curve, compile_hermite_curve, HermiteCurve, PiecewiseCurve
+from constants import MeshTriConstants, RingConstants, RingXConstants, TrailConstants
+
+TOLERANCE = 1e-3
+SAMPLES = np.linspace(0.0, 1.0, 10001)
+PARTICLES = 500
+
+
+def collect_key_points():
+    """收集constants.py中所有的关键帧定义"""
+    color_key_points = {
+        "MeshTri.COLOR": MeshTriConstants.COLOR_KEY_POINTS,
+        "Ring.COLOR": RingConstants.COLOR_KEY_POINTS,
+        "RingX.COLOR": RingXConstants.COLOR_KEY_POINTS,
+        "Trail.COLOR": TrailConstants.COLOR_KEY_POINTS,
+    }
+    hermite_key_points = {
+        "MeshTri.SIZE": MeshTriConstants.SIZE_KEY_POINTS,
+        "MeshTri.ROTATION_MIN": MeshTriConstants.ROTATION_KEY_POINTS_MIN,
+        "MeshTri.ROTATION_MAX": MeshTriConstants.ROTATION_KEY_POINTS_MAX,
+        "Ring.SIZE": RingConstants.SIZE_KEY_POINTS,
+        "RingX.SIZE": RingXConstants.SIZE_KEY_POINTS,
+    }
+    return color_key_points, hermite_key_points
+
+
+def check_accuracy() -> bool:
+    from scipy.interpolate import interp1d, CubicHermiteSpline
+
+    color_key_points, hermite_key_points = collect_key_points()
+    passed = True
+
+    def report(name, reference, curve):
+        nonlocal passed
+        error = float(np.max(np.abs(curve.evaluate(SAMPLES, np.float64) - reference)))
+        scalar_error = max(abs(curve(float(t)) - r) for t, r in zip(SAMPLES[::100], reference[::100]))
+        lut_error = float(np.max(np.abs(curve.to_lut().evaluate(SAMPLES) - reference)))
+        ok = max(error, scalar_error) <= TOLERANCE
+        passed &= ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<28} max_err={error:.2e} scalar_err={scalar_error:.2e} lut1024_err={lut_error:.2e}")
+
+    for name, key_points in color_key_points.items():
+        curve = compile_color_curve(key_points)
+        for channel, channel_curve in zip(key_points, curve):
+            reference = interp1d(channel["time_percentages"], channel["values"], kind="linear")(SAMPLES)
+            report(f"{name}.{channel['channel']}", reference, channel_curve)
+
+    for name, key_points in hermite_key_points.items():
+        reference = CubicHermiteSpline(key_points["time_percentages"], key_points["values"], key_points["tangents"])(SAMPLES)
+        report(name, reference, compile_hermite_curve(key_points))
+
+    custom = MeshTriConstants.CustomData.CUSTOM1_X_KEY_POINTS
+    splines = [CubicHermiteSpline(custom["time_percentages"][i], custom["values"][i], custom["tangents"][i]) for i in range(2)]
+    reference = np.where(SAMPLES < 0.2, splines[0](SAMPLES), splines[1](SAMPLES))
+    report("MeshTri.CUSTOM1_X", reference, PiecewiseCurve(0.2, *(
+        HermiteCurve(custom["time_percentages"][i], custom["values"][i], custom["tangents"][i]) for i in range(2))))
+    return passed
+
+
+def run_benchmark():
+    from scipy.interpolate import interp1d, CubicHermiteSpline
+
+    key_points = RingConstants.COLOR_KEY_POINTS
+    size_key_points = RingConstants.SIZE_KEY_POINTS
+    scipy_color = tuple(interp1d(c["time_percentages"], c["values"], kind="linear") for c in key_points)
+    scipy_size = CubicHermiteSpline(size_key_points["time_percentages"], size_key_points["values"], size_key_points["tangents"])
+    color = compile_color_curve(key_points)
+    size = compile_hermite_curve(size_key_points)
+    lut = size.to_lut()
+    ages = np.random.default_rng(0).random(PARTICLES)
+    ages_list = ages.tolist()
+
+    def timed(label, func, number):
+        seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+        print(f"{label:<48} {seconds * 1e6:10.2f} us")
+
+    print(f"\n--- 单帧求值（4个颜色通道 + 尺寸） ---")
+    timed("scipy interp1d + CubicHermiteSpline", lambda: ([c(0.37) for c in scipy_color], scipy_size(0.37)), 2000)
+    timed("curves 标量", lambda: (color.rgba(0.37), size(0.37)), 20000)
+    print(f"\n--- {PARTICLES}个粒子 ---")
+    timed("scipy 逐粒子标量调用", lambda: [([c(t) for c in scipy_color], scipy_size(t)) for t in ages_list], 3)
+    timed("curves.evaluate 向量化", lambda: (color.evaluate(ages), size.evaluate(ages)), 2000)
+    timed("CurveLUT.evaluate 向量化", lambda: lut.evaluate(ages), 2000)
+
+
+if __name__ == "__main__":
+    ok = check_accuracy()
+    run_benchmark()
+    sys.exit(0 if ok else 1)
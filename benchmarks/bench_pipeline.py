@@ -0,0 +1,319 @@
+"""
+完整特效管线的无头基准测试
+
+用法（在仓库根目录）：
+    python benchmarks/bench_pipeline.py                         # 运行全部负载，输出JSON
+    python benchmarks/bench_pipeline.py --workload fast_drag    # 只运行一个负载
+    python benchmarks/bench_pipeline.py --output result.json
+    python benchmarks/bench_pipeline.py --compare baseline.json # 与基线比较，退化时以非零状态退出
+    python benchmarks/bench_pipeline.py --realtime              # 按真实帧间隔运行，帧间空闲留给后台线程
+    python benchmarks/bench_pipeline.py --backend numpy         # 使用NumPy合成后端（缺省为GlobalConstants.RENDER_BACKEND）
+    python benchmarks/bench_pipeline.py --sprite-transforms     # 以世界变换绘制特效帧，不经过帧图集
+
+在QT_QPA_PLATFORM=offscreen下启动TransparentWindow（不启动pynput监听），
+以合成的点击/拖动采样写入InputRingBuffer，按虚拟时钟逐帧驱动，
+并把每帧的重绘区域渲染到QImage中。每帧记录：
+    update  帧调度回调（处理鼠标采样 + 更新所有特效）的耗时
+    paint   按重绘区域渲染FullScreenWidget的耗时
+    blocks  本帧Python已分配内存块数的变化（sys.getallocatedblocks）
+每个负载在独立的子进程中运行，以便分别统计峰值RSS并使用各自的屏幕布局。
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+FPS = 60
+SAMPLE_RATE = 1000          # 合成鼠标采样的回报率（Hz）
+DRAIN_FRAMES = 90           # 输入结束后继续运行的最大帧数，直到特效全部结束
+DEFAULT_TOLERANCE = 1.25    # --compare时允许的p95退化倍数
+
+SINGLE_SCREEN = [(0, 0, 1920, 1080)]
+DUAL_SCREEN = [(0, 0, 1920, 1080), (1920, 0, 2560, 1440)]
+
+
+def click_burst(width: int, height: int, rng: random.Random):
+    """连续快速点击：每帧2次点击，持续1秒"""
+    for frame in range(FPS):
+        t = frame / FPS
+        clicks = [(t + i / (2 * FPS), rng.uniform(0, width), rng.uniform(0, height)) for i in range(2)]
+        yield [(ct, x, y, True) for ct, x, y in clicks] + [(ct + 0.001, x, y, False) for ct, x, y in clicks]
+
+
+def fast_drag(width: int, height: int, rng: random.Random, seconds: float = 3.0):
+    """按住鼠标沿李萨如曲线快速拖动（约3000像素/秒）"""
+    center_x, center_y = width / 2, height / 2
+    radius_x, radius_y = width * 0.3, height * 0.3
+    samples_per_frame = SAMPLE_RATE // FPS
+    for frame in range(int(seconds * FPS)):
+        samples = []
+        for i in range(samples_per_frame):
+            t = (frame * samples_per_frame + i) / SAMPLE_RATE
+            x = center_x + radius_x * math.sin(2.0 * t * 2)
+            y = center_y + radius_y * math.sin(3.0 * t * 2)
+            samples.append((t, x, y, True))
+        yield samples
+    yield [(seconds, samples[-1][1], samples[-1][2], False)]
+
+
+def mixed(width: int, height: int, rng: random.Random):
+    """拖动过程中穿插点击"""
+    for frame, samples in enumerate(fast_drag(width, height, rng, seconds=2.0)):
+        if frame % 6 == 0 and samples[-1][3]:
+            t = samples[-1][0]
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            samples = samples + [(t, x, y, True), (t + 0.0005, x, y, False)]
+        yield samples
+
+
+# 负载名 -> (生成器, 屏幕布局)
+WORKLOADS = {
+    "click_burst": (click_burst, SINGLE_SCREEN),
+    "fast_drag": (fast_drag, SINGLE_SCREEN),
+    "mixed": (mixed, SINGLE_SCREEN),
+    "multi_monitor_drag": (fast_drag, DUAL_SCREEN),
+}
+
+
+def write_screen_config(screens) -> str:
+    """生成offscreen平台插件的多屏配置文件"""
+    config = {"screens": [
+        {"name": f"Screen{i}", "x": x, "y": y, "width": w, "height": h,
+         "logicalDpiX": 96, "logicalDpiY": 96, "dpr": 1}
+        for i, (x, y, w, h) in enumerate(screens)
+    ]}
+    handle, path = tempfile.mkstemp(suffix=".json", prefix="offscreen_screens_")
+    with os.fdopen(handle, "w") as file:
+        json.dump(config, file)
+    return path
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "mean": None}
+    array = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(array, (50, 95, 99))
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(array.max()), "mean": float(array.mean())}
+
+
+def peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_workload(name: str, seed: int, realtime: bool = False, backend: str | None = None,
+                 sprite_transforms: bool = False) -> dict:
+    """在当前进程中运行一个负载（QApplication需在此之前按屏幕布局创建）
+
+    realtime为True时每帧结束后等待到该帧的真实时刻，与实际运行一样在帧间留出空闲，
+    否则逐帧连续运行（测得的是纯计算耗时，后台预渲染线程只能与主线程争用CPU）。
+    backend非空时覆盖GlobalConstants.RENDER_BACKEND（须在创建窗口之前设置）。
+    sprite_transforms为True时打开GlobalConstants.SPRITE_TRANSFORMS（须在导入generate_frame之前设置）。
+    """
+    from PySide6.QtCore import QPoint, Qt
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QApplication
+
+    from assets import ASSETS
+    from constants import GlobalConstants, BAKED_CACHE
+    if backend is not None:
+        GlobalConstants.RENDER_BACKEND = backend
+    if sprite_transforms:
+        GlobalConstants.SPRITE_TRANSFORMS = True
+
+    import main
+    from generate_frame import FRAME_ATLAS, TINT_CACHE, FRAME_PREFETCHER, SPRITE_TRANSFORMS
+
+    random.seed(seed)
+    np.random.seed(seed)
+    rng = random.Random(seed)
+
+    virtual_time = [0.0]
+    # 不启动系统鼠标监听，采样由基准测试写入
+    window = main.TransparentWindow(listen_mouse=False)
+    window.frame_scheduler.clock = lambda: virtual_time[0]
+    window.show()
+    # 与正常启动一样预热资源（烘焙结果从磁盘缓存读取），等待完成后再开始计时
+    ASSETS.warm_up().join()
+    QApplication.processEvents()
+    widget = window.fullscreen_widget
+
+    geometry = window.geometry()
+    canvas = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    canvas.fill(Qt.GlobalColor.transparent)
+
+    generator, _ = WORKLOADS[name]
+    update_times, paint_times, block_deltas, repaint_areas = [], [], [], []
+
+    def run_frame(frame_time: float):
+        virtual_time[0] = frame_time
+        blocks_before = sys.getallocatedblocks()
+        previous_region = widget.last_dirty_region
+
+        start = time.perf_counter()
+        window.on_timer_timeout(frame_time)
+        update_times.append(time.perf_counter() - start)
+
+        region = widget.last_dirty_region.united(previous_region)
+        start = time.perf_counter()
+        if not region.isEmpty():
+            # 与半透明窗口的后备缓冲区一样，先清空重绘区域再绘制
+            painter = QPainter(canvas)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            for rect in region:
+                painter.fillRect(rect, Qt.GlobalColor.transparent)
+            painter.end()
+            widget.render(canvas, QPoint(), region)
+        paint_times.append(time.perf_counter() - start)
+
+        block_deltas.append(sys.getallocatedblocks() - blocks_before)
+        repaint_areas.append(sum(rect.width() * rect.height() for rect in region))
+
+    wall_start = time.perf_counter()
+
+    def wait_for(frame_time: float):
+        if realtime:
+            time.sleep(max(0.0, wall_start + frame_time - time.perf_counter()))
+
+    frame = 0
+    for samples in generator(geometry.width(), geometry.height(), rng):
+        for t, x, y, pressed in samples:
+            global_x, global_y = int(geometry.x() + x), int(geometry.y() + y)
+            window.mouse_samples.push(global_x, global_y, t, pressed)
+            if pressed and not window.is_mouse_pressed:
+                # 与监听线程的on_click相同：按下时在该位置创建点击特效
+                virtual_time[0] = t
+                window.create_touch_effect(window.mapFromGlobal(QPoint(global_x, global_y)))
+            window.is_mouse_pressed = pressed
+        frame += 1
+        wait_for(frame / FPS)
+        run_frame(frame / FPS)
+
+    for _ in range(DRAIN_FRAMES):
+        if widget.is_idle():
+            break
+        frame += 1
+        wait_for(frame / FPS)
+        run_frame(frame / FPS)
+
+    window.frame_scheduler.stop()
+    return {
+        "workload": name,
+        "realtime": realtime,
+        "backend": GlobalConstants.RENDER_BACKEND,
+        "sprite_transforms": SPRITE_TRANSFORMS,
+        "screen_geometry": [geometry.x(), geometry.y(), geometry.width(), geometry.height()],
+        "frames": len(update_times),
+        "update_ms": percentiles([t * 1e3 for t in update_times]),
+        "paint_ms": percentiles([t * 1e3 for t in paint_times]),
+        "frame_ms": percentiles([(u + p) * 1e3 for u, p in zip(update_times, paint_times)]),
+        "allocated_blocks_per_frame": percentiles(block_deltas),
+        "repaint_area_px": percentiles(repaint_areas),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "frame_atlas": FRAME_ATLAS.stats(),
+        "tint_cache": TINT_CACHE.stats(),
+        "frame_prefetch": FRAME_PREFETCHER.stats() if FRAME_PREFETCHER is not None else None,
+        "baked_cache": BAKED_CACHE.stats(),
+    }
+
+
+def run_in_subprocess(name: str, seed: int, realtime: bool = False, backend: str | None = None,
+                      sprite_transforms: bool = False) -> dict:
+    """在独立进程中运行一个负载，返回其JSON结果"""
+    command = [sys.executable, os.path.abspath(__file__), "--workload", name, "--seed", str(seed), "--single"]
+    if realtime:
+        command.append("--realtime")
+    if backend is not None:
+        command += ["--backend", backend]
+    if sprite_transforms:
+        command.append("--sprite-transforms")
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"负载 {name} 运行失败：\n{completed.stderr}")
+    return json.loads(completed.stdout)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """对比各负载的p95耗时，返回退化项的说明"""
+    regressions = []
+    for name, result in results["workloads"].items():
+        reference = baseline.get("workloads", {}).get(name)
+        if reference is None:
+            continue
+        for metric in ("update_ms", "paint_ms", "frame_ms"):
+            current, previous = result[metric]["p95"], reference[metric]["p95"]
+            if current is not None and previous and current > previous * tolerance:
+                regressions.append(f"{name}.{metric}.p95: {previous:.3f} -> {current:.3f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无头特效管线基准测试")
+    parser.add_argument("--workload", choices=["all", *WORKLOADS], default="all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果JSON的写入路径，缺省时输出到标准输出")
+    parser.add_argument("--compare", help="基线JSON路径，p95退化超过容差时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--realtime", action="store_true", help="按真实帧间隔运行，而不是逐帧连续运行")
+    parser.add_argument("--backend", choices=["qpainter", "numpy"], help="合成后端，缺省为GlobalConstants.RENDER_BACKEND")
+    parser.add_argument("--sprite-transforms", action="store_true", help="以世界变换绘制特效帧，不经过帧图集")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # 子进程：按负载的屏幕布局启动offscreen平台后运行
+        config_path = write_screen_config(WORKLOADS[args.workload][1])
+        os.environ["QT_QPA_PLATFORM"] = f"offscreen:configfile={config_path}"
+        os.chdir(REPO_ROOT)
+        from PySide6.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+        try:
+            result = run_workload(args.workload, args.seed, args.realtime, args.backend, args.sprite_transforms)
+        finally:
+            os.remove(config_path)
+        json.dump(result, sys.stdout)
+        return 0
+
+    names = list(WORKLOADS) if args.workload == "all" else [args.workload]
+    results = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "seed": args.seed,
+        "workloads": {name: run_in_subprocess(name, args.seed, args.realtime, args.backend,
+                                                     args.sprite_transforms)
+                      for name in names},
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+冷启动耗时报告
+
+用法（在仓库根目录）：
+    python benchmarks/bench_startup.py              # 输出导入耗时排行与启动时间线
+    python benchmarks/bench_startup.py --top 30
+    python benchmarks/bench_startup.py --json       # 以JSON输出，便于对比
+
+导入耗时：在子进程中执行`python -X importtime -c "import main"`，
+按模块自身耗时与累计耗时排序，并单独列出仓库内的模块。
+启动时间线：在新的子进程中（offscreen平台，不启动pynput监听）依次记录
+    import      导入main模块
+    window      创建TransparentWindow
+    show        显示窗口并处理完首批事件
+    first_frame 在屏幕中心点击并把第一帧特效渲染到QImage
+分别在不预热（资源在第一帧中按需加载）与预热（show之后调用ASSETS.warm_up并等待其完成）两种情况下运行，
+同时列出各资源的加载耗时。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times() -> list[dict]:
+    """解析-X importtime的输出，返回每个模块的自身与累计耗时（毫秒）"""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                               cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入main失败：\n{completed.stderr}")
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1e3,
+            "cumulative_ms": int(cumulative_us) / 1e3,
+        })
+    return modules
+
+
+def repo_modules() -> set[str]:
+    """仓库内的顶层模块与components包下的模块名"""
+    names = {os.path.splitext(name)[0] for name in os.listdir(REPO_ROOT) if name.endswith(".py")}
+    names |= {"components." + os.path.splitext(name)[0]
+              for name in os.listdir(os.path.join(REPO_ROOT, "components")) if name.endswith(".py")}
+    return names | {"components"}
+
+
+def startup_timeline(warm_up: bool) -> dict:
+    """在当前进程中测量启动各阶段的耗时（需在全新进程中调用）"""
+    timeline = {}
+    start = time.perf_counter()
+
+    def mark(stage: str):
+        timeline[stage] = (time.perf_counter() - start) * 1e3
+
+    from PySide6.QtCore import QPoint, Qt
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QApplication
+    import main
+    from assets import ASSETS
+    mark("import")
+
+    app = QApplication(sys.argv[:1])
+    window = main.TransparentWindow(listen_mouse=False)
+    mark("window")
+    window.show()
+    QApplication.processEvents()
+    mark("show")
+
+    if warm_up:
+        ASSETS.warm_up().join()
+        mark("warm_up")
+
+    # 第一次点击：与帧调度器的一帧相同，先更新特效再按重绘区域渲染
+    widget = window.fullscreen_widget
+    geometry = window.geometry()
+    window.create_touch_effect(QPoint(geometry.width() // 2, geometry.height() // 2))
+    window.on_timer_timeout(window.frame_scheduler.now())
+    canvas = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    canvas.fill(Qt.GlobalColor.transparent)
+    widget.render(canvas, QPoint(), widget.last_dirty_region)
+    mark("first_frame")
+
+    window.frame_scheduler.stop()
+    return {
+        "timeline_ms": timeline,
+        "asset_load_ms": {name: seconds * 1e3 for name, seconds in ASSETS.load_times.items()},
+    }
+
+
+def run_timeline(warm_up: bool) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--timeline"] + (["--warm-up"] if warm_up else [])
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    completed = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"启动时间线测量失败：\n{completed.stderr}")
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def print_report(report: dict, top: int):
+    modules = report["imports"]
+    print(f"== 导入耗时（自身耗时前{top}） ==")
+    for module in sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top]:
+        print(f"{module['self_ms']:9.2f} ms  {module['cumulative_ms']:9.2f} ms  {module['module']}")
+
+    print("\n== 仓库内模块（自身耗时 / 累计耗时） ==")
+    local = repo_modules()
+    for module in sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True):
+        if module["module"] in local:
+            print(f"{module['self_ms']:9.2f} ms  {module['cumulative_ms']:9.2f} ms  {module['module']}")
+
+    for label, key in (("不预热", "lazy"), ("预热", "warm_up")):
+        result = report[key]
+        print(f"\n== 启动时间线（{label}，自进程内计时起点） ==")
+        for stage, ms in result["timeline_ms"].items():
+            print(f"{ms:9.2f} ms  {stage}")
+        print("资源加载耗时：")
+        for name, ms in sorted(result["asset_load_ms"].items(), key=lambda item: item[1], reverse=True):
+            print(f"{ms:9.2f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动耗时报告")
+    parser.add_argument("--top", type=int, default=20, help="按自身耗时列出的模块数")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    parser.add_argument("--timeline", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm-up", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.timeline:
+        # 子进程：测量一次冷启动
+        sys.path.insert(0, REPO_ROOT)
+        os.chdir(REPO_ROOT)
+        print(json.dumps(startup_timeline(args.warm_up)))
+        return 0
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "imports": import_times(),
+        "lazy": run_timeline(warm_up=False),
+        "warm_up": run_timeline(warm_up=True),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+分块并行合成的线程数扩展性测试
+
+用法（在仓库根目录）：
+    python benchmarks/bench_tiles.py                    # 1到max(CPU核数, 4)个线程
+    python benchmarks/bench_tiles.py --threads 8 --tile-size 64
+    python benchmarks/bench_tiles.py --sprites 400 --segments 2000
+
+在1920x1080的画布上随机放置着色后的特效图案，再叠加一条正弦形的拖尾，
+分别以NumpyCompositor（不分块）与1到N个线程的TiledCompositor合成同一帧，
+输出每帧耗时的中位数与相对不分块时的加速比，并校验各结果与不分块时逐像素一致，不一致时以非零状态退出。
+img_utils按setup.py构建为Cython扩展时混合核释放GIL，纯NumPy实现只在大数组运算期间释放，
+后者的扩展性主要受绘制线程中的Python开销限制；单核机器上多线程只会增加调度开销。
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QGuiApplication, QImage, QPainter, QPixmap, QRegion
+
+CANVAS_WIDTH, CANVAS_HEIGHT = 1920, 1080
+TRAIL_WIDTH = 5
+
+
+def build_scene(sprite_count: int, segment_count: int, seed: int) -> dict:
+    """随机图案的位置与一条拖尾的线段数据"""
+    from img_utils import colorize_image
+    from compositor import tint_premultiplied
+    from constants import RingConstants
+
+    rng = random.Random(seed)
+    grayscale = RingConstants.GRAYSCALE_IMAGE
+    textures = []
+    for size in (32, 64, 96, 128):
+        image = colorize_image(grayscale.scaled(size, size), (rng.randrange(256), 160, 255), rng.randrange(64, 256))
+        textures.append(QPixmap.fromImage(image))
+    sprites = []
+    for _ in range(sprite_count):
+        pixmap = rng.choice(textures)
+        sprites.append((pixmap, rng.randrange(-32, CANVAS_WIDTH), rng.randrange(-32, CANVAS_HEIGHT), rng.random() < 0.5))
+
+    # 横贯画布的正弦拖尾，线段首尾相接
+    t = np.linspace(0.0, 1.0, segment_count + 1)
+    points = np.stack([100 + t * (CANVAS_WIDTH - 200), CANVAS_HEIGHT / 2 + 300 * np.sin(t * 12)], axis=1)
+    delta = np.diff(points, axis=0)
+    np_rng = np.random.default_rng(seed)
+    gray = np_rng.integers(64, 256, (segment_count, TRAIL_WIDTH))
+    colors = np.column_stack([np.full(segment_count, 40), np.full(segment_count, 120),
+                              np.full(segment_count, 255), np.linspace(255, 0, segment_count)])
+    trail = {
+        "starts": points[:-1],
+        "angles": np.arctan2(delta[:, 1], delta[:, 0]),
+        "lengths": np.hypot(delta[:, 0], delta[:, 1]),
+        "rows": tint_premultiplied(gray, colors),
+        "heights": np.full(segment_count, TRAIL_WIDTH, dtype=np.int64),
+    }
+
+    region = QRegion()
+    for pixmap, x, y, _ in sprites:
+        region = region.united(QRect(x, y, pixmap.width(), pixmap.height()))
+    min_x, min_y = points.min(axis=0) - TRAIL_WIDTH
+    max_x, max_y = points.max(axis=0) + TRAIL_WIDTH
+    region = region.united(QRect(int(min_x), int(min_y), int(max_x - min_x) + 1, int(max_y - min_y) + 1))
+    region = region.intersected(QRect(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT))
+    return {"sprites": sprites, "trail": trail, "region": region}
+
+
+def composite_frame(compositor, scene: dict, canvas: QImage):
+    """与FullScreenWidget的NumPy后端相同：合成后一次绘制到画布"""
+    compositor.begin(scene["region"])
+    for pixmap, x, y, flip in scene["sprites"]:
+        compositor.blend_sprite(pixmap, x, y, flip)
+    compositor.blend_quads(**scene["trail"])
+    painter = QPainter(canvas)
+    compositor.draw(painter)
+    painter.end()
+
+
+def measure(compositor, scene: dict, frames: int) -> tuple[float, np.ndarray]:
+    """返回每帧耗时的中位数（毫秒）与最后一帧的画布像素"""
+    canvas = QImage(CANVAS_WIDTH, CANVAS_HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+    canvas.fill(Qt.GlobalColor.transparent)
+    # 预热：填充图案像素数组缓存
+    composite_frame(compositor, scene, canvas)
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        composite_frame(compositor, scene, canvas)
+        times.append(time.perf_counter() - start)
+    pixels = np.frombuffer(canvas.constBits(), dtype=np.uint32).copy()
+    return statistics.median(times) * 1e3, pixels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块并行合成的线程数扩展性测试")
+    parser.add_argument("--threads", type=int, default=max(os.cpu_count() or 1, 4), help="最大线程数")
+    parser.add_argument("--tile-size", type=int, default=128)
+    parser.add_argument("--sprites", type=int, default=200)
+    parser.add_argument("--segments", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv[:1])
+    import img_utils
+    from compositor import NumpyCompositor, TiledCompositor
+
+    scene = build_scene(args.sprites, args.segments, args.seed)
+    print(f"img_utils: {os.path.basename(img_utils.__file__)}，CPU核数 {os.cpu_count()}")
+    print(f"{args.sprites} 个图案 + {args.segments} 条拖尾线段，分块 {args.tile_size}px，每项 {args.frames} 帧\n")
+
+    baseline_ms, expected = measure(NumpyCompositor(), scene, args.frames)
+    print(f"{'不分块':<12} {baseline_ms:8.2f} ms")
+    ok = True
+    for threads in range(1, args.threads + 1):
+        milliseconds, pixels = measure(TiledCompositor(args.tile_size, threads), scene, args.frames)
+        identical = np.array_equal(pixels, expected)
+        ok &= identical
+        print(f"{f'{threads} 线程':<12} {milliseconds:8.2f} ms  加速比 {baseline_ms / milliseconds:5.2f}"
+              f"{'' if identical else '  结果与不分块时不一致'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
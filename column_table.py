@@ -0,0 +1,88 @@
+from typing import Callable
+
+import numpy as np
+from PySide6.QtGui import QImage
+
+
+class ColumnTable:
+    """纹理列查找表
+
+    替代slice_image_vertically：纹理只读入一次，按列转置为形如(width, height)的uint32数组，
+    每一列再按该列对应年龄的宽度预先缩放为一条1像素宽的竖直条带。
+    所有条带存放在同一块连续缓冲区中，条带QImage直接引用这块内存，
+    绘制时按序号取出即可，不再有任何QImage的复制或缩放。
+    bake的结果只是两个NumPy数组，可以存入磁盘缓存，之后直接由映射的数组构造。
+    """
+    def __init__(self, heights: np.ndarray, strip_buffer: np.ndarray):
+        """
+        Args:
+            heights (np.ndarray): 每列条带的高度
+            strip_buffer (np.ndarray): 所有条带首尾相接的uint32像素，通常由bake生成（可为只读的内存映射）
+        """
+        self.heights = np.asarray(heights, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.heights)))
+        self.strip_buffer = strip_buffer
+        width = len(self.heights)
+
+        # 条带QImage不拥有像素数据，strip_buffer需与本对象同生命周期
+        self.strips = [
+            QImage(self.strip_buffer[self.offsets[x]:self.offsets[x + 1]].data,
+                   1, int(self.heights[x]), 4, QImage.Format.Format_ARGB32)
+            for x in range(width)
+        ]
+
+    @staticmethod
+    def column_heights(width: int, height_at: Callable[[float], float]) -> np.ndarray:
+        """每列的条带高度取该列起始年龄处的宽度"""
+        return np.array([max(1, int(height_at(x / width))) for x in range(width)], dtype=np.int64)
+
+    @staticmethod
+    def bake(image: QImage, heights: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        按列转置纹理并把每列缩放为对应高度的条带
+
+        Args:
+            image (QImage): 灰度纹理，横向为年龄方向
+            heights (np.ndarray): column_heights的返回值
+
+        Returns:
+            dict[str, np.ndarray]: 构造函数的参数heights与strip_buffer
+        """
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+        height = image.height()
+        pixels = np.frombuffer(image.constBits(), dtype=np.uint32).reshape(
+            (height, image.bytesPerLine() // 4))[:, :image.width()]
+
+        # 紧凑的列表：columns[x]为第x列自上而下的像素
+        columns = np.ascontiguousarray(pixels.T)
+        offsets = np.concatenate(([0], np.cumsum(heights)))
+
+        # 按像素中心做最近邻竖直缩放（与QImage.scaled的默认FastTransformation一致），所有条带首尾相接
+        # 同高度的列一次完成缩放（宽度为常数时只有一组）
+        strip_buffer = np.empty(int(offsets[-1]), dtype=np.uint32)
+        for strip_height in np.unique(heights).tolist():
+            xs = np.flatnonzero(heights == strip_height)
+            rows = ((2 * np.arange(strip_height) + 1) * height) // (2 * strip_height)
+            targets = offsets[xs, None] + np.arange(strip_height)
+            strip_buffer[targets] = columns[xs[:, None], rows]
+        return {"heights": heights, "strip_buffer": strip_buffer}
+
+    @classmethod
+    def from_image(cls, image: QImage, height_at: Callable[[float], float]) -> "ColumnTable":
+        """
+        Args:
+            image (QImage): 灰度纹理，横向为年龄方向
+            height_at: 年龄比例 -> 条带高度（像素），通常为TrailConstants.WIDTH
+        """
+        return cls(**cls.bake(image, cls.column_heights(image.width(), height_at)))
+
+    def __len__(self) -> int:
+        return len(self.strips)
+
+    def index(self, age_ratio: float) -> int:
+        """年龄比例 -> 列序号（截断到有效范围）"""
+        return min(max(int(age_ratio * len(self.strips)), 0), len(self.strips) - 1)
+
+    def strip(self, index: int) -> QImage:
+        """取出预缩放好的条带"""
+        return self.strips[index]
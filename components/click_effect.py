@@ -0,0 +1,111 @@
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtCore import QPointF, QRect, QRectF
+
+from components.mesh_tri import MeshTri
+from components.ring import Ring
+from components.ring_3 import Ring3
+from constants import GlobalConstants
+from sprite import Sprite
+
+class ClickEffect:
+    """单次点击特效（Ring + Ring3）
+    
+    不再拥有独立的widget，由FullScreenWidget在同一次绘制中统一合成。
+    实例由EffectPool复用：activate重置特效，deactivate清空当前帧。
+    """
+    
+    def __init__(self):
+        self.center_pos = QPointF()
+        self.initial_time = 0.0
+        self.time = 0.0
+        #self.mesh_tri_pixmap = None
+        self.ring_pixmap = None
+        self.ring_3_pixmap = None
+        
+        side = GlobalConstants.TOUCH_EFFECT_WIDGET_SIDE
+        self.target_rect = QRect(0, 0, side, side)
+        
+        self.mesh_tri = MeshTri()
+        self.ring = Ring()
+        self.ring_3 = Ring3()
+
+    def activate(self, position, initial_time: float):
+        """在指定位置重新开始播放特效"""
+        self.center_pos = QPointF(position)
+        self.initial_time = initial_time
+        self.time = 0.0
+        self.ring_pixmap = None
+        self.ring_3_pixmap = None
+        
+        # 重新随机化各子特效
+        self.mesh_tri.reset()
+        self.ring.reset()
+        self.ring_3.reset()
+
+    def prefetch(self, prefetcher, next_frame_time: float, frame_interval: float):
+        """提交Ring与Ring3之后各帧的预渲染（参数同FramePrefetcher.prefetch）"""
+        prefetcher.prefetch(self.ring.constants, self.ring.params, self.initial_time,
+                            next_frame_time, frame_interval)
+        emission = self.ring_3.constants.Emission
+        prefetcher.prefetch(self.ring_3.constants, self.ring_3.params, self.initial_time,
+                            next_frame_time, frame_interval,
+                            delays=[i * emission.INTERVAL for i in range(emission.COUNT)])
+
+    def deactivate(self):
+        """清空当前帧，等待下次复用"""
+        self.ring_pixmap = None
+        self.ring_3_pixmap = None
+
+    def is_alive(self) -> bool:
+        return self.ring_pixmap is not None or self.ring_3_pixmap is not None
+        
+    def bounding_rect(self) -> QRectF:
+        """当前帧在全屏控件坐标系下的覆盖区域"""
+        rect = QRectF()
+        side = self.target_rect.width()
+        if self.ring_pixmap:
+            rect = rect.united(self.ring.get_bounding_rect(self.ring_pixmap, self.target_rect))
+        if self.ring_3_pixmap:
+            center = (self.target_rect.width() // 2, self.target_rect.height() // 2)
+            rect = rect.united(self.ring_3.get_bounding_rect(self.ring_3_pixmap, center))
+        return rect.translated(self.center_pos.x() - side / 2, self.center_pos.y() - side / 2)
+        
+    def update_effect(self, current_time: float) -> bool:
+        """更新特效动画，返回特效是否仍在播放"""
+        self.time = current_time - self.initial_time
+        #self.mesh_tri_pixmap = self.mesh_tri.get_frame(self.time)
+        self.ring_pixmap = self.ring.get_frame(self.time)
+        self.ring_3_pixmap = self.ring_3.get_frame(self.time)
+        return self.is_alive()
+            
+    def sprites(self) -> list[tuple[QPixmap | Sprite, float, float, bool]]:
+        """
+        当前帧各图案在全屏控件坐标系下的(图案, 左上角x, 左上角y, 是否上下翻转)，与draw的绘制位置一致
+        """
+        side = self.target_rect.width()
+        left, top = self.center_pos.x() - side / 2, self.center_pos.y() - side / 2
+        sprites = []
+        if self.ring_pixmap:
+            x, y = self.ring.get_position(self.ring_pixmap, self.target_rect)
+            sprites.append((self.ring_pixmap, left + x, top + y, False))
+        if self.ring_3_pixmap:
+            for pixmap, x, y in self.ring_3.get_positions(self.ring_3_pixmap, self.target_rect):
+                # 与drawPixmap(int, int, QPixmap)一样把坐标截断为整数
+                sprites.append((pixmap, left + int(x), top + int(y), True))
+        return sprites
+
+    def draw(self, painter: QPainter):
+        """以center_pos为中心绘制特效帧"""
+        painter.save()
+        try:
+            # 将坐标原点移到特效区域左上角，沿用各子特效按目标区域居中的绘制方式
+            side = self.target_rect.width()
+            painter.translate(self.center_pos.x() - side / 2, self.center_pos.y() - side / 2)
+            if self.ring_pixmap:
+                self.ring.draw_centered_pixmap(painter, self.ring_pixmap, self.target_rect)
+            if self.ring_3_pixmap:
+                self.ring_3.draw_centered_pixmap(painter, self.ring_3_pixmap, self.target_rect, self.time)
+            #if self.mesh_tri_pixmap:
+            #    self.mesh_tri.draw_centered_pixmap(painter, self.mesh_tri_pixmap, self.target_rect, self.time)
+        finally:
+            painter.restore()
@@ -0,0 +1,46 @@
+from typing import Callable, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+class EffectPool(Generic[T]):
+    """固定容量、可回收的特效槽位池
+
+    槽位对象需要实现 activate(*args) 与 deactivate()。
+    acquire 优先复用空闲槽位；槽位全部占用且已达到容量上限时，回收最早激活的槽位。
+    """
+    def __init__(self, factory: Callable[[], T], capacity: int):
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self.active: List[T] = []
+        self.free: List[T] = []
+        self.created = 0
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def acquire(self, *args) -> T:
+        """取出一个槽位并用args激活"""
+        if self.free:
+            item = self.free.pop()
+        elif self.created < self.capacity:
+            item = self.factory()
+            self.created += 1
+        else:
+            # 超出并发上限：回收最早的特效
+            item = self.active[0]
+            self.release(item)
+            self.free.pop()
+        item.activate(*args)
+        self.active.append(item)
+        return item
+
+    def release(self, item: T):
+        """停用槽位并放回空闲列表"""
+        self.active.remove(item)
+        item.deactivate()
+        self.free.append(item)
+
+    def release_where(self, predicate: Callable[[T], bool]):
+        """释放所有满足条件的槽位"""
+        for item in [item for item in self.active if predicate(item)]:
+            self.release(item)
@@ -2,14 +2,22 @@ import time
 from typing import List
 from PySide6.QtWidgets import QWidget
 from PySide6.QtCore import Qt, Signal, QRect, QPointF
-from PySide6.QtGui import QPainter, QColor, QPen, QPainterPath, QPixmap
+from PySide6.QtGui import QPainter, QColor, QPen, QPainterPath, QPixmap, QRegion, QFont
 
-from .trail import TrailRenderer, TrailSegment, TrailPoint
+from .trail import TrailRenderer
 from .ring_4 import Ring4
+from .particle_pool import ParticlePool
+from .click_effect import ClickEffect
+from .effect_pool import EffectPool
+from compositor import IMG_UTILS_COMPILED, NumpyCompositor, TiledCompositor
 from constants import Ring4Constants, GlobalConstants
+from generate_frame import FRAME_ATLAS, TINT_CACHE, FRAME_PREFETCHER
+from instrumentation import PROFILER, profiled
 
 class FullScreenWidget(QWidget):
     """统一的全屏特效绘制控件"""
+    # 每次绘制结束时发出，参数为本次paintEvent的耗时（秒），供帧调度器计入帧耗时
+    painted = Signal(float)
     
     def __init__(self, update_signal: Signal, parent=None):
         super().__init__(parent)
@@ -17,9 +25,20 @@ class FullScreenWidget(QWidget):
         # 初始化特效系统
         self.trail_renderer = TrailRenderer()
         self.ring_constants = Ring4Constants()
-        self.ring_effects = []
+        # 拖动圆环粒子：结构数组粒子池 + 每个粒子的当前帧
+        self.ring_particles = ParticlePool(GlobalConstants.MAX_DRAG_PARTICLES, GlobalConstants.SIZE)
+        self.ring_frames = []
         self.current_time = 0.0
         
+        # 上一帧绘制过的区域：本帧需要一起重绘以擦除旧图案
+        self.last_dirty_region = QRegion()
+        
+        # NumPy合成后端（RENDER_BACKEND为"numpy"时）：所有图案先在帧缓冲区中合成，多核时分块并行
+        self.compositor = self._create_compositor() if GlobalConstants.RENDER_BACKEND == "numpy" else None
+        
+        # 点击特效池：所有点击特效在本控件的一次绘制中合成
+        self.click_effects = EffectPool(ClickEffect, GlobalConstants.MAX_TOUCH_EFFECTS)
+        
         # 鼠标拖动距离追踪相关变量
         self.last_mouse_position = None
         self.accumulated_distance = 0.0
@@ -28,6 +47,15 @@ class FullScreenWidget(QWidget):
         if GlobalConstants.DEBUG_MODE:
             self.ring_centers = []
         
+        # 性能统计的计数器（只在生成快照或绘制覆盖层时求值）
+        PROFILER.register_counter("drag_particles", lambda: self.ring_particles.count)
+        PROFILER.register_counter("click_effects", lambda: len(self.click_effects.active))
+        PROFILER.register_counter("trail_points", lambda: len(self.trail_renderer.points))
+        PROFILER.register_counter("frame_atlas", lambda: self._cache_counter(FRAME_ATLAS.stats()))
+        PROFILER.register_counter("tint_cache", lambda: self._cache_counter(TINT_CACHE.stats()))
+        if FRAME_PREFETCHER is not None:
+            PROFILER.register_counter("frame_prefetch", lambda: self._prefetch_counter(FRAME_PREFETCHER.stats()))
+        
         # 连接更新信号
         update_signal.connect(self.update_effects)
         
@@ -37,28 +65,79 @@ class FullScreenWidget(QWidget):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setUpdatesEnabled(True)
         
+    @profiled("update_effects")
     def update_effects(self, current_time: float):
         """更新所有特效状态"""
+        PROFILER.frame(current_time)
         self.current_time = current_time
+        if FRAME_PREFETCHER is not None:
+            FRAME_PREFETCHER.collect(current_time)
         self.trail_renderer.update_frame(current_time)
         
-        # 更新Ring特效生命周期
-        self.ring_effects = [
-            effect for effect in self.ring_effects 
-            if current_time - effect['start_time'] < self.ring_constants.START_LIFETIME
-        ]
-        self.update()
+        # 向量化更新Ring粒子的年龄、位置并删除过期粒子
+        self.ring_particles.update(current_time)
+        # 生成Ring粒子当前帧，供计算重绘区域与绘制使用
+        self.ring_frames = Ring4.get_frames(self.ring_particles)
+        
+        # 更新点击特效并回收已经完成的特效
+        self.click_effects.release_where(lambda effect: not effect.update_effect(current_time))
+        
+        self.request_repaint()
+        
+    def is_idle(self) -> bool:
+        """没有存活特效且上一帧的图案已经擦除"""
+        return (not self.ring_particles.count
+                and not self.click_effects.active
+                and not self.trail_renderer.points
+                and self.last_dirty_region.isEmpty())
+        
+    def get_dirty_region(self) -> QRegion:
+        """汇总所有存活特效当前帧的覆盖区域"""
+        region = QRegion()
+        margin = GlobalConstants.DIRTY_RECT_MARGIN
+        
+        def add_rect(rect):
+            nonlocal region
+            if not rect.isEmpty():
+                region = region.united(rect.toAlignedRect().adjusted(-margin, -margin, margin, margin))
+        
+        add_rect(Ring4.get_bounding_rect(self.ring_particles, self.ring_frames))
+        for click_effect in self.click_effects.active:
+            add_rect(click_effect.bounding_rect())
+        add_rect(self.trail_renderer.bounding_rect())
+        return region
+        
+    def request_repaint(self):
+        """只重绘本帧与上一帧特效覆盖的区域；没有任何特效时不触发重绘"""
+        if GlobalConstants.DEBUG_MODE:
+            self.update()
+            return
+        
+        dirty_region = self.get_dirty_region()
+        repaint_region = dirty_region.united(self.last_dirty_region)
+        self.last_dirty_region = dirty_region
+        if not repaint_region.isEmpty():
+            self.update(repaint_region)
+        
+    def add_click_effect(self, position, initial_time: float):
+        """在指定位置添加点击特效"""
+        effect = self.click_effects.acquire(position, initial_time)
+        if FRAME_PREFETCHER is not None:
+            # 之后的帧按当前帧时刻与最高帧率推算
+            effect.prefetch(FRAME_PREFETCHER, *self._next_frame_times())
         
-    def add_trail_input(self, position, is_pressed: bool):
-        """处理拖尾输入"""
+    def add_trail_input(self, position, is_pressed: bool, timestamp: float | None = None):
+        """处理拖尾输入（timestamp为采样的原始时间，缺省时使用当前帧时间）"""
+        if timestamp is None:
+            timestamp = self.current_time
         if is_pressed:
             if not self.trail_renderer.is_drawing:
-                self.trail_renderer.start_drawing(position, self.current_time)
+                self.trail_renderer.start_drawing(position, timestamp)
                 # 初始化鼠标位置追踪
                 self.last_mouse_position = QPointF(position)  # 确保是QPointF类型
                 self.accumulated_distance = 0.0
             else:
-                self.trail_renderer.add_point(position, self.current_time)
+                self.trail_renderer.add_point(position, timestamp)
                 # 计算距离并生成Ring4特效
                 self._process_mouse_movement(position)
         else:
@@ -113,35 +192,91 @@ class FullScreenWidget(QWidget):
         # 确保位置是QPointF类型
         effect_pos = QPointF(position) if not isinstance(position, QPointF) else position
         
-        # 为每个特效创建独立的 Ring4 实例
-        ring_instance = Ring4()
-        
-        self.ring_effects.append({
-            'position': effect_pos,
-            'start_time': self.current_time + time_offset,  # 添加时间偏移
-            'ring_instance': ring_instance  # 存储独立的Ring4实例
-        })
+        # 向粒子池发射粒子
+        emitted = Ring4.emit(self.ring_particles, effect_pos.toTuple(), self.current_time + time_offset)
+        if FRAME_PREFETCHER is not None:
+            next_frame_time, frame_interval = self._next_frame_times()
+            for params, start_time in emitted:
+                FRAME_PREFETCHER.prefetch(self.ring_constants, params, start_time, next_frame_time, frame_interval)
         # 调试用：记录中心点位置
         if GlobalConstants.DEBUG_MODE:
             self.ring_centers.append(effect_pos)
     
+    @staticmethod
+    def _create_compositor() -> NumpyCompositor:
+        """只有显式设置了多个合成线程且img_utils为Cython扩展时才分块并行，否则单线程合成"""
+        threads = GlobalConstants.RENDER_THREADS
+        if threads is not None and threads > 1 and IMG_UTILS_COMPILED:
+            return TiledCompositor(GlobalConstants.RENDER_TILE_SIZE, threads)
+        return NumpyCompositor()
+    
+    def _next_frame_times(self) -> tuple[float, float]:
+        """预计的下一帧时刻与帧间隔"""
+        frame_interval = 1.0 / GlobalConstants.MAX_FPS
+        return self.current_time + frame_interval, frame_interval
+    
+    @staticmethod
+    def _cache_counter(stats: dict) -> str:
+        return f"{stats['entries']} entries {stats['bytes'] >> 10} KB hit {stats['hits']} miss {stats['misses']}"
+    
+    @staticmethod
+    def _prefetch_counter(stats: dict) -> str:
+        return f"queue {stats['queue_depth']} hit {stats['hits']} miss {stats['misses']} late {stats['late']}"
+    
+    def _draw_stats_overlay(self, painter: QPainter):
+        """调试用：在左上角绘制各阶段耗时与计数器"""
+        lines = PROFILER.overlay_lines()
+        if not lines:
+            return
+        painter.save()
+        painter.resetTransform()
+        painter.setFont(QFont("monospace", 9))
+        line_height = painter.fontMetrics().height()
+        width = max(painter.fontMetrics().horizontalAdvance(line) for line in lines) + 16
+        painter.fillRect(0, 0, width, line_height * len(lines) + 12, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        for i, line in enumerate(lines):
+            painter.drawText(8, 6 + line_height * (i + 1) - painter.fontMetrics().descent(), line)
+        painter.restore()
+    
+    def _draw_effects(self, painter: QPainter):
+        """QPainter后端：逐个绘制所有特效图案"""
+        # 绘制点击特效
+        for click_effect in self.click_effects.active:
+            click_effect.draw(painter)
+        
+        # 绘制Ring粒子
+        Ring4.draw_particles(painter, self.ring_particles, self.ring_frames)
+        
+        # 绘制拖尾特效
+        self.trail_renderer.draw(painter)
+    
+    @profiled("composite")
+    def _composite_effects(self, painter: QPainter, region: QRegion):
+        """NumPy后端：按与_draw_effects相同的顺序在帧缓冲区中合成，再一次绘制到重绘区域"""
+        compositor = self.compositor
+        compositor.begin(region)
+        for click_effect in self.click_effects.active:
+            for pixmap, x, y, flip in click_effect.sprites():
+                compositor.blend_sprite(pixmap, x, y, flip)
+        for pixmap, x, y, flip in Ring4.sprites(self.ring_particles, self.ring_frames):
+            compositor.blend_sprite(pixmap, x, y, flip)
+        self.trail_renderer.composite(compositor)
+        compositor.draw(painter)
+    
+    @profiled("paint")
     def paintEvent(self, event):
         """绘制所有特效"""
+        paint_start = time.perf_counter()
         painter = QPainter(self)
         try:
             painter.setRenderHint(QPainter.Antialiasing, True)
             painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
             
-            # 绘制Ring特效 - 使用每个特效自己的Ring4实例
-            for effect in self.ring_effects:
-                elapsed = self.current_time - effect['start_time']
-                # 使用该特效自己的Ring4实例
-                ring = effect['ring_instance']
-                frame = ring.get_frame(elapsed)
-                if frame:
-                    # 确保位置是QPointF类型
-                    pos = QPointF(effect['position']) if not isinstance(effect['position'], QPointF) else effect['position']
-                    ring.draw_centered_pixmap(painter, frame, pos, elapsed)
+            if self.compositor is not None:
+                self._composite_effects(painter, event.region())
+            else:
+                self._draw_effects(painter)
             
             if GlobalConstants.DEBUG_MODE:
                 # 调试用：绘制永久性Ring4中心点
@@ -151,13 +286,12 @@ class FullScreenWidget(QWidget):
                     # 确保位置是QPointF类型
                     center_pos = QPointF(center) if not isinstance(center, QPointF) else center
                     painter.drawEllipse(center_pos, 3, 3)      # 绘制半径为5的圆点
-            
-            # 绘制拖尾特效
-            segments = self.trail_renderer.generate_segments()
-            self.trail_renderer.draw_segments(painter, segments)
+                
+                self._draw_stats_overlay(painter)
                 
         finally:
-            pass
+            painter.end()
+            self.painted.emit(time.perf_counter() - paint_start)
     
     def set_fullscreen_geometry(self, screens):
         """设置全屏几何尺寸"""
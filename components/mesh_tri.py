@@ -2,6 +2,8 @@ from PySide6.QtGui import QPixmap, QPainter
 
 from constants import MeshTriConstants
 from generate_frame import generate_animated_frame
+from effect_params import EffectParams
+from sprite import draw_frame
 class MeshTri:
     """触摸圆环特效类
     
@@ -10,16 +12,18 @@ class MeshTri:
     """
     constants = MeshTriConstants()
     def __init__(self) -> None:
-        self.constants.START_SIZE = self.constants.get_start_size()
-        self.constants.START_ROTATION = self.constants.get_start_rotation()
-        self.constants.CustomData.CUSTOM1_X = self.constants.CustomData.get_custom1_x()
+        self.reset()
+
+    def reset(self) -> None:
+        """重新随机化初始参数，用于复用实例"""
+        self.params = EffectParams.sample(self.constants)
 
     def get_frame(self, time) -> QPixmap | None:
         """
         根据时间生成当前帧的QPixmap
         """
         
-        return generate_animated_frame(time, self.constants)
+        return generate_animated_frame(time, self.constants, params=self.params)
 
 
     def draw_centered_pixmap(self, painter: QPainter, pixmap: QPixmap, target_rect):
@@ -38,4 +42,4 @@ class MeshTri:
         x = (target_rect.width() - pixmap_rect.width()) // 2
         y = (target_rect.height() - pixmap_rect.height()) // 2
         
-        painter.drawPixmap(x, y, pixmap)
\ No newline at end of file
+        draw_frame(painter, x, y, pixmap)
\ No newline at end of file
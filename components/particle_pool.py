@@ -0,0 +1,77 @@
+import numpy as np
+
+class ParticlePool:
+    """结构数组（SoA）粒子池
+
+    所有粒子属性保存在定长NumPy数组中，前count个为存活粒子。
+    每帧用向量化运算一次更新全部粒子的年龄与位置，过期粒子通过与末尾粒子交换删除，
+    热路径中不再创建新的对象。
+    """
+    def __init__(self, capacity: int, distance_scale: float = 1.0):
+        """
+        Args:
+            capacity (int): 最大粒子数，超出时覆盖最早出生的粒子
+            distance_scale (float): 速度到像素的缩放（对应GlobalConstants.SIZE）
+        """
+        self.capacity = capacity
+        self.distance_scale = distance_scale
+        self.count = 0
+
+        self.spawn_position = np.zeros((capacity, 2), dtype=np.float64)  # 出生位置
+        self.position = np.zeros((capacity, 2), dtype=np.float64)        # 当前位置
+        self.velocity = np.zeros((capacity, 2), dtype=np.float64)
+        self.start_time = np.zeros(capacity, dtype=np.float64)
+        self.lifetime = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.rotation = np.zeros(capacity, dtype=np.float64)
+        self.time_offset = np.zeros(capacity, dtype=np.float64)          # 位置计算时预先经过的时间
+        self.age = np.zeros(capacity, dtype=np.float64)
+
+        self._fields = (self.spawn_position, self.position, self.velocity, self.start_time,
+                        self.lifetime, self.size, self.rotation, self.time_offset, self.age)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def spawn(self, position: tuple, velocity: tuple, start_time: float, lifetime: float,
+              size: float, rotation: float = 0.0, time_offset: float = 0.0) -> int:
+        """添加一个粒子，返回其下标"""
+        if self.count < self.capacity:
+            index = self.count
+            self.count += 1
+        else:
+            index = int(np.argmin(self.start_time[:self.count]))
+        self.spawn_position[index] = position
+        self.position[index] = position
+        self.velocity[index] = velocity
+        self.start_time[index] = start_time
+        self.lifetime[index] = lifetime
+        self.size[index] = size
+        self.rotation[index] = rotation
+        self.time_offset[index] = time_offset
+        self.age[index] = 0.0
+        return index
+
+    def update(self, current_time: float):
+        """向量化更新全部粒子的年龄与位置，并删除过期粒子"""
+        n = self.count
+        if n == 0:
+            return
+        np.subtract(current_time, self.start_time[:n], out=self.age[:n])
+
+        expired = np.flatnonzero(self.age[:n] >= self.lifetime[:n])
+        # 从后往前交换删除，保证被交换过来的末尾粒子一定存活
+        for index in expired[::-1]:
+            last = self.count - 1
+            if index != last:
+                for field in self._fields:
+                    field[index] = field[last]
+            self.count = last
+
+        n = self.count
+        elapsed = self.time_offset[:n] + self.age[:n]
+        np.multiply(self.velocity[:n], (elapsed * self.distance_scale)[:, None], out=self.position[:n])
+        self.position[:n] += self.spawn_position[:n]
+
+    def clear(self):
+        self.count = 0
@@ -1,7 +1,10 @@
 from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtCore import QRectF
 
 from constants import RingConstants
 from generate_frame import generate_animated_frame
+from effect_params import EffectParams
+from sprite import draw_frame
 class Ring:
     """触摸圆环特效类
     
@@ -10,14 +13,18 @@ class Ring:
     """
     constants = RingConstants()
     def __init__(self) -> None:
-        self.constants.START_ROTATION = self.constants.get_start_rotation()
+        self.reset()
+
+    def reset(self) -> None:
+        """重新随机化初始参数，用于复用实例"""
+        self.params = EffectParams.sample(self.constants)
 
     def get_frame(self, time) -> QPixmap | None:
         """
         根据时间生成当前帧的QPixmap
         """
         
-        return generate_animated_frame(time, self.constants)
+        return generate_animated_frame(time, self.constants, params=self.params)
 
 
     def draw_centered_pixmap(self, painter: QPainter, pixmap: QPixmap, target_rect):
@@ -32,8 +39,20 @@ class Ring:
         if pixmap.isNull():
             return
             
+        draw_frame(painter, *self.get_position(pixmap, target_rect), pixmap)
+
+    def get_position(self, pixmap: QPixmap, target_rect) -> tuple[int, int]:
+        """
+        pixmap在目标区域内居中时的左上角位置
+        """
         pixmap_rect = pixmap.rect()
         x = (target_rect.width() - pixmap_rect.width()) // 2
         y = (target_rect.height() - pixmap_rect.height()) // 2
-        
-        painter.drawPixmap(x, y, pixmap)
\ No newline at end of file
+        return x, y
+
+    def get_bounding_rect(self, pixmap: QPixmap, target_rect) -> QRectF:
+        """
+        计算draw_centered_pixmap在目标区域内实际绘制的区域
+        """
+        x, y = self.get_position(pixmap, target_rect)
+        return QRectF(x, y, pixmap.width(), pixmap.height())
@@ -5,6 +5,7 @@ from PySide6.QtGui import QPixmap, QPainter
 from constants import Ring3Constants
 from generate_frame import generate_animated_frame
 from components.ring_x import RingX
+from sprite import draw_frame
 
 class Ring3(RingX):
     """触摸圆环特效类"""
@@ -27,28 +28,32 @@ class Ring3(RingX):
                 
             # 调整时间为相对于该图案开始时间的时间
             adjusted_time = time - delay
-            pixmap = generate_animated_frame(adjusted_time, self.constants)
+            pixmap = generate_animated_frame(adjusted_time, self.constants, params=self.params)
             pixmap_list.append((pixmap, adjusted_time) if pixmap else None)
-        if all(pixmap_list) is None:
+        if not any(pixmap_list):
             return None
         else:
             return pixmap_list
     
-    def draw_centered_pixmap(self, painter: QPainter, pixmap_list: List[tuple[QPixmap, float] | None], target_rect, time):
+    def get_positions(self, pixmap_list: List[tuple[QPixmap, float] | None], target_rect) -> List[tuple[QPixmap, float, float]]:
         """
-        在目标区域内居中绘制pixmap，每个图案依次间隔出现
+        各图案在目标区域内的当前左上角位置（按上下翻转前的图案计算，翻转不改变尺寸）
         """
+        positions = []
+        center_pos = (target_rect.width() // 2, target_rect.height() // 2)
         for i, temp in enumerate(pixmap_list):
             if temp is None: continue
             pixmap, adjusted_time = temp
-            
-            pixmap = pixmap.transformed(self.flip_transform)
-                
-            pixmap_rect = pixmap.rect()
-            center_pos = (target_rect.width() // 2, target_rect.height() // 2)
-            delta_pos = (pixmap_rect.width() // 2, pixmap_rect.height() // 2)
+            delta_pos = (pixmap.width() // 2, pixmap.height() // 2)
 
             current_pos = self.calculate_current_position(center_pos, self.velocities[i], adjusted_time)
-            painter.drawPixmap(current_pos[0] - delta_pos[0], current_pos[1] - delta_pos[1], pixmap)
-
-        
\ No newline at end of file
+            positions.append((pixmap, current_pos[0] - delta_pos[0], current_pos[1] - delta_pos[1]))
+        return positions
+    
+    def draw_centered_pixmap(self, painter: QPainter, pixmap_list: List[tuple[QPixmap, float] | None], target_rect, time):
+        """
+        在目标区域内居中绘制pixmap，每个图案依次间隔出现
+        """
+        for pixmap, x, y in self.get_positions(pixmap_list, target_rect):
+            # 与drawPixmap(int, int, QPixmap)一样把坐标截断为整数
+            draw_frame(painter, int(x), int(y), pixmap, flip=True)
@@ -1,55 +1,93 @@
+import math
+import random
 from typing import List
 
 from PySide6.QtGui import QPixmap, QPainter
-from PySide6.QtCore import QPointF
+from PySide6.QtCore import QRectF
 
 from constants import Ring4Constants
-from generate_frame import generate_animated_frame
-from components.ring_x import RingX
+from generate_frame import get_effect_frame
+from effect_params import EffectParams
+from components.particle_pool import ParticlePool
+from sprite import Sprite, draw_frame
 
-class Ring4(RingX):
-    """触摸圆环特效类"""
-    constants = Ring4Constants()
-    def __init__(self) -> None:
-        super().__init__(self.constants)
-
-    def get_frame(self, time) -> List[tuple[QPixmap, float]] | None:
-        """
-        根据时间生成当前帧的QPixmap
-        """
-        pixmap_list = []
-        for i in range(self.constants.Emission.COUNT):
-            # 计算每个图案的延迟时间
-            delay = i * self.constants.Emission.INTERVAL
-            
-            # 如果当前时间还没到该图案的出现时间，则跳过
-            if time < delay:
-                continue
-                
-            # 调整时间为相对于该图案开始时间的时间
-            adjusted_time = time - delay
-            pixmap = generate_animated_frame(adjusted_time, self.constants)
-            pixmap_list.append((pixmap, adjusted_time) if pixmap else None)
-        if all(pixmap_list) is None:
-            return None
-        else:
-            return pixmap_list
+class Ring4:
+    """拖动圆环粒子特效类
     
-    def draw_centered_pixmap(self, painter: QPainter, pixmap_list: List[tuple[QPixmap, float] | None], center_pos: QPointF, time):
-        """
-        在目标区域内居中绘制pixmap，每个图案依次间隔出现
-        """
-        for i, temp in enumerate(pixmap_list):
-            if temp is None: continue
-            pixmap, adjusted_time = temp
-            
-            pixmap = pixmap.transformed(self.flip_transform)
-                
-            pixmap_rect = pixmap.rect()
-            delta_pos = (pixmap_rect.width() // 2, pixmap_rect.height() // 2)
-
-            current_pos = self.calculate_current_position(center_pos.toTuple(), self.velocities[i], adjusted_time)
-            x = int(current_pos[0] - delta_pos[0])
-            y = int(current_pos[1] - delta_pos[1])
-            #print(x, y)
-            painter.drawPixmap(x, y, pixmap)
\ No newline at end of file
+    粒子数据全部保存在ParticlePool中，本类只负责按Emission配置发射粒子、
+    生成每个粒子的当前帧以及绘制。
+    """
+    constants = Ring4Constants()
+
+    @classmethod
+    def emit(cls, pool: ParticlePool, position: tuple, start_time: float) -> List[tuple[EffectParams, float]]:
+        """
+        在指定位置按Emission配置发射粒子（每个图案依次间隔出现）
+        
+        Returns:
+            List[tuple[EffectParams, float]]: 每个粒子的参数与起始时刻，供预渲染使用
+        """
+        constants = cls.constants
+        emitted = []
+        for i in range(constants.Emission.COUNT):
+            params = EffectParams.sample(constants)
+            # 生成随机方向的速度分量
+            angle_rad = math.radians(random.uniform(0, constants.Shape.ARC))
+            velocity = (params.start_speed * math.cos(angle_rad) * constants.Shape.SCALE[0],
+                        params.start_speed * math.sin(angle_rad) * constants.Shape.SCALE[1])
+            pool.spawn(
+                position,
+                velocity,
+                start_time + i * constants.Emission.INTERVAL,
+                lifetime=params.start_lifetime,
+                size=params.start_size,
+                rotation=params.start_rotation,
+                time_offset=constants.Shape.RADIUS / params.start_speed,
+            )
+            emitted.append((params, start_time + i * constants.Emission.INTERVAL))
+        return emitted
+
+    @classmethod
+    def get_frames(cls, pool: ParticlePool) -> List[QPixmap | Sprite | None]:
+        """
+        根据每个粒子的年龄生成当前帧（尚未出现的粒子为None）
+        """
+        n = pool.count
+        # 一次计算所有粒子的生命周期百分比
+        time_percentages = pool.age[:n] / pool.lifetime[:n]
+        visible = ((time_percentages >= 0.0) & (time_percentages <= 1.0)).tolist()
+        return [
+            get_effect_frame(cls.constants, time_percentage, False, size, rotation) if is_visible else None
+            for time_percentage, size, rotation, is_visible in zip(
+                time_percentages.tolist(), pool.size[:n].tolist(), pool.rotation[:n].tolist(), visible)
+        ]
+
+    @classmethod
+    def get_bounding_rect(cls, pool: ParticlePool, frames: List[QPixmap | None]) -> QRectF:
+        """
+        计算所有粒子当前帧覆盖的区域
+        """
+        rect = QRectF()
+        for (x, y), pixmap in zip(pool.position[:pool.count].tolist(), frames):
+            if pixmap is None: continue
+            width, height = pixmap.width(), pixmap.height()
+            rect = rect.united(QRectF(x - width / 2, y - height / 2, width, height))
+        return rect
+
+    @classmethod
+    def sprites(cls, pool: ParticlePool, frames: List[QPixmap | None]) -> List[tuple[QPixmap, int, int, bool]]:
+        """
+        每个可见粒子的(当前帧, 左上角x, 左上角y, 是否上下翻转)，以粒子当前位置为中心
+        """
+        return [
+            (pixmap, int(x - pixmap.width() // 2), int(y - pixmap.height() // 2), True)
+            for (x, y), pixmap in zip(pool.position[:pool.count].tolist(), frames) if pixmap is not None
+        ]
+
+    @classmethod
+    def draw_particles(cls, painter: QPainter, pool: ParticlePool, frames: List[QPixmap | Sprite | None]):
+        """
+        以每个粒子的当前位置为中心绘制其当前帧
+        """
+        for pixmap, x, y, _ in cls.sprites(pool, frames):
+            draw_frame(painter, x, y, pixmap, flip=True)
@@ -2,30 +2,32 @@ import math
 import random
 from typing import List
 
-from PySide6.QtGui import QPixmap, QPainter, QTransform
+from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtCore import QRectF
 
 from constants import GlobalConstants
 from generate_frame import generate_animated_frame
+from effect_params import EffectParams
 
 class RingX:
     """触摸圆环特效类"""
     def __init__(self, constants) -> None:
         self.constants = constants
-        self.constants.START_LIFETIME = self.constants.get_start_lifetime()
-        self.constants.START_SPEED = self.constants.get_start_speed()
-        self.constants.START_SIZE = self.constants.get_start_size()
 
-        self.flip_transform = QTransform()
-        self.flip_transform.scale(1, -1)
+        self.reset()
 
-        self.assumed_elapsed_time = self.constants.Shape.RADIUS / self.constants.START_SPEED
+    def reset(self) -> None:
+        """重新随机化初始参数，用于复用实例"""
+        self.params = EffectParams.sample(self.constants)
+
+        self.assumed_elapsed_time = self.constants.Shape.RADIUS / self.params.start_speed
         self.velocities = tuple(self.get_random_velocity() for _ in range(self.constants.Emission.COUNT))
 
     def get_frame(self, time) -> List[QPixmap] | None:
         """
         根据时间生成当前帧的QPixmap
         """
-        return generate_animated_frame(time, self.constants, grayscale_image_transparent=True)
+        return generate_animated_frame(time, self.constants, grayscale_image_transparent=True, params=self.params)
 
     def get_random_velocity(self):
         """
@@ -40,8 +42,8 @@ class RingX:
         angle_rad = math.radians(angle)
         
         # 计算x和y方向的速度分量
-        velocity_x = self.constants.START_SPEED * math.cos(angle_rad) * self.constants.Shape.SCALE[0]
-        velocity_y = self.constants.START_SPEED * math.sin(angle_rad) * self.constants.Shape.SCALE[1]
+        velocity_x = self.params.start_speed * math.cos(angle_rad) * self.constants.Shape.SCALE[0]
+        velocity_y = self.params.start_speed * math.sin(angle_rad) * self.constants.Shape.SCALE[1]
         
         return (velocity_x, velocity_y)
         
@@ -50,4 +52,17 @@ class RingX:
         根据起始位置、速度和时间计算当前位置
         """
         return tuple((start_position[i] + velocity[i] * (self.assumed_elapsed_time + time) * GlobalConstants.SIZE)
-                     for i in range(2))
\ No newline at end of file
+                     for i in range(2))
+
+    def get_bounding_rect(self, pixmap_list: List[tuple[QPixmap, float] | None], center_pos: tuple) -> QRectF:
+        """
+        计算当前帧所有图案覆盖的区域（与draw_centered_pixmap的绘制位置一致）
+        """
+        rect = QRectF()
+        for i, temp in enumerate(pixmap_list):
+            if temp is None: continue
+            pixmap, adjusted_time = temp
+            x, y = self.calculate_current_position(center_pos, self.velocities[i], adjusted_time)
+            width, height = pixmap.width(), pixmap.height()
+            rect = rect.united(QRectF(x - width / 2, y - height / 2, width, height))
+        return rect
@@ -1,43 +1,38 @@
-import time
 import math
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
-from PySide6.QtCore import QPointF, Qt
-from PySide6.QtGui import QPainter, QPen, QColor, QPainterPath, QPixmap, QTransform
+from typing import List, Tuple
 
-from constants import TrailConstants, GlobalConstants
-from img_utils import change_image_by_grayscale
-
-@dataclass
-class TrailPoint:
-    """拖尾点数据结构"""
-    position: QPointF
-    timestamp: float
+import numpy as np
+from PySide6.QtCore import QPointF, QRectF
+from PySide6.QtGui import QPainter, QPixmap, QTransform
 
-@dataclass
-class TrailSegment:
-    """拖尾线段数据结构"""
-    start_point: TrailPoint
-    end_point: TrailPoint
-    width: float
-    color: tuple
-    age_ratio: float
+from compositor import NumpyCompositor, tint_premultiplied
+from constants import TrailConstants, GlobalConstants
+from generate_frame import TINT_CACHE
+from instrumentation import profiled
+from .trail_points import TrailPointBuffer
+from .trail_resampler import TrailResampler
 
 class TrailRenderer:
     """拖尾渲染器 - 专门负责生成拖尾绘制数据"""
     constants = TrailConstants()
     def __init__(self):
-        # 拖尾点存储
-        self.points: List[TrailPoint] = []
+        # 拖尾点存储（环形缓冲区，线段几何按下标缓存）
+        self.points = TrailPointBuffer(GlobalConstants.TRAIL_POINT_CAPACITY)
+        # 原始采样先经过重采样与平滑再写入
+        self.resampler = TrailResampler(
+            self.constants.RESAMPLE_MIN_SPACING,
+            self.constants.RESAMPLE_MAX_TURN,
+            self.constants.SMOOTHING,
+            self.constants.SMOOTHING_SPACING,
+            self.constants.SMOOTHING_MAX_SUBDIVISIONS,
+        )
         self.is_drawing = False
         self.last_update_time = 0.0    # 记录上次更新时间
-        # 添加缓存列表，格式：List[Dict{end_point的时间戳：Dict{线段长度：线段长度，线段倾斜角：线段倾斜角，切片坐标：切片坐标}}]
-        self.segments_cache: List[Dict[float, Dict[str, any]]] = []
-        self.max_cache_size = math.ceil(GlobalConstants.MAX_FPS * TrailConstants.TIME)
         
     def start_drawing(self, position: QPointF, timestamp: float):
         """开始绘制拖尾"""
         self.is_drawing = True
+        self.resampler.reset()
         self.add_point(position, timestamp)
         
     def stop_drawing(self):
@@ -45,97 +40,46 @@ class TrailRenderer:
         self.is_drawing = False
         
     def add_point(self, position: QPointF, timestamp: float):
-        """添加拖尾点"""
-        point = TrailPoint(position, timestamp)
-        self.points.append(point)
-        
-        # 限制点数
-        #if len(self.points) > self.max_points:
-        #    self.points.pop(0)
+        """添加拖尾点（经过重采样）"""
+        self.resampler.add(self.points, position.x(), position.y(), timestamp)
             
     def update_frame(self, current_time: float):
-        """更精确的过期点清理逻辑"""
+        """清理过期点：对截止时间二分查找，耗时与拖尾长度无关"""
         self.last_update_time = current_time
         
         # 计算绝对截止时间（比当前时间早lifetime秒的点需要移除）
         cutoff_time = current_time - self.constants.TIME
-
-        # 使用列表推导式高效过滤（保留时间戳大于等于cutoff_time的点）
-        self.points = [p for p in self.points if p.timestamp >= cutoff_time]
-        #print(cutoff_time, [self.points[i].timestamp for i in range(len(self.points))])
+        self.points.expire(cutoff_time)
         
-        # 清理过期的缓存数据
-        self.segments_cache = [cache for cache in self.segments_cache 
-                              if list(cache.keys())[0] >= cutoff_time]
+    def bounding_rect(self) -> QRectF:
+        """当前所有拖尾点覆盖的区域（按拖尾宽度外扩）"""
+        if len(self.points) < 2:
+            return QRectF()
+        min_x, min_y, max_x, max_y = self.points.bounds()
+        margin = self.constants.WIDTH(0) / 2 + 1
+        return QRectF(min_x, min_y, max_x - min_x, max_y - min_y).adjusted(-margin, -margin, margin, margin)
         
-    def generate_segments(self) -> List[TrailSegment]:
-        """每帧更新 - 生成拖尾线段数据用于绘制"""
+    @profiled("draw_segments")
+    def draw(self, painter: QPainter):
+        """绘制拖尾 - 直接由点缓冲区的数组驱动，不为每条线段创建对象；按TrailConstants.RENDER_MODE选择绘制方式"""
         if len(self.points) < 2:
-            return []
-            
-        segments = []
-        current_time = self.last_update_time  # 使用记录的时间
-        
-        # 检查是否有可用的缓存数据
-        cached_data = None
-        for cache in self.segments_cache:
-            if list(cache.keys())[0] == self.points[-1].timestamp:
-                cached_data = cache[self.points[-1].timestamp]
-                break
-        
-        for i in range(len(self.points) - 1):
-            start_point = self.points[i]
-            end_point = self.points[i + 1]
-            
-            # 计算线段属性
-            age_ratio = (current_time - start_point.timestamp) / self.constants.TIME
-            alpha = int(255 * (1 - age_ratio))  # 年龄越大越透明
-            
-            width = self.constants.WIDTH(age_ratio)
-            
-            # 如果有缓存数据则直接使用，否则重新计算
-            if cached_data and i < len(cached_data.get('segments', [])):
-                segment_data = cached_data['segments'][i]
-                length = segment_data['length']
-                angle = segment_data['angle']
-                slices = segment_data['slices']
-            else:
-                # 计算线段长度和角度
-                dx = end_point.position.x() - start_point.position.x()
-                dy = end_point.position.y() - start_point.position.y()
-                length = math.sqrt(dx * dx + dy * dy)
-                angle = math.atan2(dy, dx)  # 弧度制角度
-                
-                # 预生成切片
-                slices = self._generate_slices(start_point.position, end_point.position, length, angle, age_ratio, width)
-                
-                # 缓存新计算的数据
-                if not cached_data:
-                    cached_data = {'segments': []}
-                    self.segments_cache.append({end_point.timestamp: cached_data})
-                
-                # 限制缓存大小
-                if len(self.segments_cache) > self.max_cache_size:
-                    self.segments_cache.pop(0)
-                    
-                cached_data['segments'].append({
-                    'length': length,
-                    'angle': angle,
-                    'slices': slices
-                })
-            
-            segment = TrailSegment(
-                start_point=start_point,
-                end_point=end_point,
-                width=width,
-                color=self.constants.get_color(age_ratio),
-                age_ratio=age_ratio,
-            )
-            segments.append(segment)
-            
-        return segments
+            return
+        indices = self.points.indices()
+        points = self.points.points[indices]
+        # 线段i以第i+1个点结尾，其几何在写入该点时已经算好
+        geometry = self.points.geometry[indices[1:]]
+        
+        # 一次性计算所有线段的年龄与颜色
+        age_ratios = (self.last_update_time - points[:-1, TrailPointBuffer.T]) / self.constants.TIME
+        colors = self.constants.get_colors(age_ratios)
+        
+        if self.constants.RENDER_MODE == "per_pixel":
+            self._draw_segments_per_pixel(painter, indices, points, geometry, age_ratios, colors)
+        else:
+            self._draw_segments_batched(painter, points, geometry, age_ratios, colors)
     
-    def _generate_slices(self, start_pos: QPointF, end_pos: QPointF, length: float, angle: float, age_ratio: float, width: float) -> List[Tuple[float, float]]:
+    def _generate_slices(self, start_x: float, start_y: float, end_x: float, end_y: float,
+                         length: float, angle: float) -> List[Tuple[float, float]]:
         """预生成切片数据 - 直接使用元组存储坐标位置"""
         slices = []
         
@@ -150,8 +94,8 @@ class TrailRenderer:
         for i in range(math.ceil(length)):
             # 计算当前切片中心点的位置
             progress = (i + 0.5) / length  # 中心点位置
-            center_x = start_pos.x() + progress * (end_pos.x() - start_pos.x())
-            center_y = start_pos.y() + progress * (end_pos.y() - start_pos.y())
+            center_x = start_x + progress * (end_x - start_x)
+            center_y = start_y + progress * (end_y - start_y)
             
             # 计算切片左上角坐标
             half_width = 1 / 2.0
@@ -162,41 +106,102 @@ class TrailRenderer:
             
         return slices
 
-    def draw_segments(self, painter: QPainter, segments: List[TrailSegment]):
-        """绘制拖尾线段 - 动态生成图像切片进行绘制"""
-        if not segments:
+    @profiled("composite_trail")
+    def composite(self, compositor: NumpyCompositor):
+        """NumPy合成后端：由点缓冲区的数组一次算出所有线段的着色条带并混合
+
+        着色与_get_slice_pixmap相同（同样量化颜色），但条带不做双线性插值，线段两端也没有抗锯齿。
+        """
+        if len(self.points) < 2:
             return
-            
-        # 保存当前painter状态
+        indices = self.points.indices()
+        points = self.points.points[indices]
+        geometry = self.points.geometry[indices[1:]]
+        
+        age_ratios = (self.last_update_time - points[:-1, TrailPointBuffer.T]) / self.constants.TIME
+        colors = TINT_CACHE.quantize_array(self.constants.get_colors(age_ratios))
+        
+        # 每条线段的条带（与ColumnTable.index相同的取列方式），不足最大高度的部分为透明
+        column_table = self.constants.COLUMN_TABLE
+        columns = np.clip((age_ratios * len(column_table)).astype(np.int64), 0, len(column_table) - 1)
+        heights = column_table.heights[columns]
+        rows = np.arange(int(heights.max()))
+        valid = rows < heights[:, None]
+        strip_pixels = column_table.strip_buffer[np.where(valid, column_table.offsets[columns, None] + rows, 0)]
+        tinted = np.where(valid, tint_premultiplied((strip_pixels >> 8) & 0xFF, colors), 0)
+        
+        compositor.blend_quads(points[:-1, :2], geometry[:, 1], geometry[:, 0], tinted, heights)
+
+    def _get_slice_pixmap(self, age_ratio: float, color: list) -> QPixmap:
+        """按线段年龄从拖尾纹理取1像素宽的切片，并着色（经过着色结果缓存）"""
+        column_table = self.constants.COLUMN_TABLE
+        # 条带已按拖尾宽度预先缩放，直接按序号取出
+        grayscale_image_slice = column_table.strip(column_table.index(age_ratio))
+        
+        return TINT_CACHE.tint(
+            grayscale_image_slice, 
+            color[:-1], 
+            color[-1]
+        )
+
+    def _draw_segments_batched(self, painter: QPainter, points: np.ndarray, geometry: np.ndarray,
+                               age_ratios: np.ndarray, colors: np.ndarray):
+        """绘制拖尾线段 - 每条线段只绘制一次
+
+        将着色后的切片通过世界变换旋转到线段方向，并沿线段拉伸到线段长度，
+        绘制次数只与线段数量有关，与线段的像素长度无关。长度为0的线段在数组上先行剔除。
+        """
+        visible = np.flatnonzero(geometry[:, TrailPointBuffer.LENGTH] > 0)
+        starts = points[visible, :2].tolist()
+        lengths = geometry[visible, TrailPointBuffer.LENGTH].tolist()
+        degrees = np.degrees(geometry[visible, TrailPointBuffer.ANGLE]).tolist()
+        
         painter.save()
         
         try:
-            # 获取当前帧的缓存数据用于绘制
-            current_cache = None
-            if self.segments_cache:
-                latest_cache = self.segments_cache[-1]
-                current_cache = list(latest_cache.values())[0]
+            base_transform = painter.transform()
+            for (x, y), length, angle, age_ratio, color in zip(starts, lengths, degrees,
+                                                               age_ratios[visible].tolist(),
+                                                               colors[visible].tolist()):
+                rendered_image_slice = self._get_slice_pixmap(age_ratio, color)
                 
-            for i, segment in enumerate(segments):
-                # 获取当前segment的图像切片（动态生成）
-                grayscale_image_slice_index = int(segment.age_ratio * len(self.constants.GARYSCALE_IMAGE_SLICES))
-                grayscale_image_slice = self.constants.GARYSCALE_IMAGE_SLICES[grayscale_image_slice_index].scaled(1, segment.width)
+                # 以线段起点为原点、线段方向为x轴
+                painter.setTransform(base_transform)
+                painter.translate(x, y)
+                painter.rotate(angle)
                 
-                # 应用颜色和旋转
-                rendered_image_slice = change_image_by_grayscale(
-                    grayscale_image_slice, 
-                    segment.color[:-1], 
-                    segment.color[-1]
+                height = rendered_image_slice.height()
+                painter.drawPixmap(
+                    QRectF(0, -height / 2, length, height),
+                    rendered_image_slice,
+                    QRectF(rendered_image_slice.rect())
                 )
                 
-                # 从缓存获取角度信息
-                angle_degrees = 0
-                slices = []
-                if current_cache and i < len(current_cache.get('segments', [])):
-                    segment_data = current_cache['segments'][i]
-                    angle_degrees = math.degrees(segment_data['angle'])
-                    slices = segment_data['slices']
-                    rendered_image_slice = rendered_image_slice.transformed(QTransform().rotate(angle_degrees))
+        finally:
+            # 恢复painter状态
+            painter.restore()
+
+    def _draw_segments_per_pixel(self, painter: QPainter, indices: np.ndarray, points: np.ndarray,
+                                 geometry: np.ndarray, age_ratios: np.ndarray, colors: np.ndarray):
+        """绘制拖尾线段 - 动态生成图像切片进行逐像素绘制（切片坐标按点的下标缓存）"""
+        # 保存当前painter状态
+        painter.save()
+        
+        try:
+            points = points.tolist()
+            for i, ((length, angle), age_ratio, color) in enumerate(zip(geometry.tolist(), age_ratios.tolist(),
+                                                                       colors.tolist())):
+                index = int(indices[i + 1])
+                slices = self.points.slices[index]
+                if slices is None:
+                    (start_x, start_y, _), (end_x, end_y, _) = points[i], points[i + 1]
+                    slices = self._generate_slices(start_x, start_y, end_x, end_y, length, angle)
+                    self.points.slices[index] = slices
+                if not slices:
+                    continue
+                # 获取当前线段的图像切片并着色，旋转到线段方向
+                rendered_image_slice = self._get_slice_pixmap(age_ratio, color)
+                rendered_image_slice = rendered_image_slice.transformed(QTransform().rotate(math.degrees(angle)))
                 
                 # 绘制每个切片
                 for corner_x, corner_y in slices:  # 直接解包元组
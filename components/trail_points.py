@@ -0,0 +1,87 @@
+import numpy as np
+
+class TrailPointBuffer:
+    """拖尾点环形缓冲区
+
+    拖尾点按时间顺序到达，保存在预分配的(x, y, t)数组中，
+    过期只需对截止时间二分查找并前移起点，不再每帧重建列表。
+    以某点结尾的线段几何（长度、角度）在该点写入时计算一次，按同一下标缓存。
+    缓冲区写满时丢弃最旧的点。
+    """
+    X, Y, T = range(3)
+    LENGTH, ANGLE = range(2)
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.points = np.zeros((capacity, 3), dtype=np.float64)     # (x, y, t)
+        self.geometry = np.zeros((capacity, 2), dtype=np.float64)   # 以该点结尾的线段(长度, 角度)
+        self.slices: list = [None] * capacity                       # 逐像素绘制模式的切片坐标
+        self.start = 0      # 最旧存活点的累计序号
+        self.end = 0        # 累计写入的点数
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def _time_at(self, position: int) -> float:
+        return self.points[position % self.capacity, self.T]
+
+    def append(self, x: float, y: float, t: float) -> int:
+        """写入一个点并计算以其结尾的线段几何，返回其在数组中的下标"""
+        if self.end > self.start:
+            previous = self.points[(self.end - 1) % self.capacity]
+            # 保证时间单调不减，二分查找才成立
+            t = max(t, previous[self.T])
+            dx = x - previous[self.X]
+            dy = y - previous[self.Y]
+            geometry = (np.hypot(dx, dy), np.arctan2(dy, dx))
+        else:
+            geometry = (0.0, 0.0)
+        if self.end - self.start >= self.capacity:
+            self.start += 1
+        index = self.end % self.capacity
+        self.points[index] = (x, y, t)
+        self.geometry[index] = geometry
+        self.slices[index] = None
+        self.end += 1
+        return index
+
+    def pop_last(self) -> np.ndarray | None:
+        """删除并返回最新的点(x, y, t)，缓冲区为空时返回None"""
+        if self.end == self.start:
+            return None
+        self.end -= 1
+        return self.points[self.end % self.capacity].copy()
+
+    def replace_last(self, x: float, y: float, t: float) -> int:
+        """用新位置替换最新的点（用于合并间距过小的采样，缓冲区为空时相当于append），返回其下标"""
+        self.pop_last()
+        return self.append(x, y, t)
+
+    def expire(self, cutoff_time: float) -> int:
+        """删除时间戳早于cutoff_time的点，返回删除的数量"""
+        low, high = self.start, self.end
+        while low < high:
+            middle = (low + high) // 2
+            if self._time_at(middle) < cutoff_time:
+                low = middle + 1
+            else:
+                high = middle
+        removed = low - self.start
+        self.start = low
+        return removed
+
+    def clear(self):
+        self.start = self.end
+
+    def indices(self) -> np.ndarray:
+        """存活点在数组中的下标（按时间顺序）"""
+        return np.arange(self.start, self.end) % self.capacity
+
+    def bounds(self) -> tuple[float, float, float, float] | None:
+        """存活点的(min_x, min_y, max_x, max_y)"""
+        if self.end == self.start:
+            return None
+        xy = self.points[self.indices(), :2]
+        min_x, min_y = xy.min(axis=0)
+        max_x, max_y = xy.max(axis=0)
+        return float(min_x), float(min_y), float(max_x), float(max_y)
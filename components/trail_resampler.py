@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+from .trail_points import TrailPointBuffer
+
+def catmull_rom(p0: np.ndarray, p1: np.ndarray, p2: np.ndarray, p3: np.ndarray, s: np.ndarray) -> np.ndarray:
+    """
+    均匀Catmull-Rom样条在p1与p2之间的插值（即切线取(p2-p0)/2与(p3-p1)/2的三次Hermite）
+
+    Args:
+        p0, p1, p2, p3 (np.ndarray): 形如(2,)的控制点
+        s (np.ndarray): 形如(n,)的参数，取值[0, 1]
+
+    Returns:
+        np.ndarray: 形如(n, 2)的插值点
+    """
+    s = s[:, None]
+    s2 = s * s
+    s3 = s2 * s
+    m1 = (p2 - p0) / 2
+    m2 = (p3 - p1) / 2
+    return ((2 * s3 - 3 * s2 + 1) * p1
+            + (s3 - 2 * s2 + s) * m1
+            + (-2 * s3 + 3 * s2) * p2
+            + (s3 - s2) * m2)
+
+class TrailResampler:
+    """拖尾输入预处理
+
+    按距离与转角对原始鼠标采样重采样后再写入TrailPointBuffer：
+    - 拖尾头部与上一个保留点的距离小于min_spacing且转角不大时，只移动头部而不新增点，
+      因此点数只与轨迹长度有关，与输入设备的回报率无关；
+    - 相邻关键点距离超过smoothing_spacing时（低回报率设备），按Catmull-Rom样条插入中间点，
+      消除折线拐角。样条需要后一个关键点，因此最新一段在下一个采样到达后才被平滑。
+    """
+    def __init__(self,
+                 min_spacing: float,
+                 max_turn: float,
+                 smoothing: bool = True,
+                 smoothing_spacing: float = 8.0,
+                 max_subdivisions: int = 8):
+        """
+        Args:
+            min_spacing (float): 保留点之间的最小间距（像素）
+            max_turn (float): 合并采样时允许的最大转角（弧度），超出时保留拐点
+            smoothing (bool): 是否对稀疏采样做样条插值
+            smoothing_spacing (float): 插值后相邻点的目标间距（像素）
+            max_subdivisions (int): 每段最多插入的点数
+        """
+        self.min_spacing = min_spacing
+        self.max_turn = max_turn
+        self.smoothing = smoothing
+        self.smoothing_spacing = smoothing_spacing
+        self.max_subdivisions = max_subdivisions
+        # 新一笔拖尾的第一个采样不与之前的点合并或插值
+        self.connected = False
+        # 最近至多3个关键点(x, y, t)，即未被合并、也不是插值生成的点
+        self.keys = []
+
+    def reset(self):
+        """开始新的一笔拖尾"""
+        self.connected = False
+        self.keys = []
+
+    def add(self, buffer: TrailPointBuffer, x: float, y: float, t: float):
+        """处理一个原始采样并写入buffer"""
+        sample = (x, y, t)
+        if not self.connected or len(buffer) == 0:
+            self.connected = True
+            self.keys = [sample]
+            buffer.append(x, y, t)
+            return
+
+        head = self.keys[-1]
+
+        # 头部离上一个关键点仍不足min_spacing且方向基本不变：头部尚未定型，直接移动到新采样
+        if len(self.keys) >= 2:
+            anchor = self.keys[-2]
+            if math.dist(anchor[:2], head[:2]) < self.min_spacing and self._turn(anchor, head, sample) <= self.max_turn:
+                buffer.replace_last(x, y, t)
+                self.keys[-1] = sample
+                return
+
+        # 新采样到达后，上一段(关键点 -> 头部)的后继点才确定，此时再对其插值，保证切线连续
+        if self.smoothing and len(self.keys) >= 2:
+            self._smooth_last_segment(buffer, sample)
+
+        buffer.append(x, y, t)
+        self.keys = self.keys[-2:] + [sample]
+
+    def _smooth_last_segment(self, buffer: TrailPointBuffer, following: tuple):
+        """在倒数第二个关键点与头部之间插入Catmull-Rom插值点"""
+        start, head = np.array(self.keys[-2]), np.array(self.keys[-1])
+        distance = math.dist(start[:2], head[:2])
+        if distance <= self.smoothing_spacing:
+            return
+        subdivisions = min(math.ceil(distance / self.smoothing_spacing), self.max_subdivisions + 1)
+        # 缺少更早的关键点时沿直线外推
+        previous = np.array(self.keys[-3]) if len(self.keys) >= 3 else 2 * start - head
+        s = np.arange(1, subdivisions) / subdivisions
+        interpolated = catmull_rom(previous[:2], start[:2], head[:2], np.array(following[:2]), s)
+        times = start[2] + (head[2] - start[2]) * s
+
+        # 头部是buffer中最新的点：先取下，写入插值点后再放回
+        buffer.pop_last()
+        for (px, py), pt in zip(interpolated.tolist(), times.tolist()):
+            buffer.append(px, py, pt)
+        buffer.append(*head.tolist())
+
+    @staticmethod
+    def _turn(a: tuple, b: tuple, c: tuple) -> float:
+        """折线a->b->c在b处的转角（弧度）"""
+        first = (b[0] - a[0], b[1] - a[1])
+        second = (c[0] - b[0], c[1] - b[1])
+        if first == (0, 0) or second == (0, 0):
+            return 0.0
+        angle = math.atan2(second[1], second[0]) - math.atan2(first[1], first[0])
+        return abs((angle + math.pi) % (2 * math.pi) - math.pi)
@@ -0,0 +1,401 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from importlib.machinery import EXTENSION_SUFFIXES
+
+import numpy as np
+from PySide6.QtCore import QPoint, QRect
+from PySide6.QtGui import QImage, QPainter, QPixmap, QRegion
+
+import img_utils
+from img_utils import RESULT_FORMAT, blend_over_into, scale_pixels, scatter_over_into
+from instrumentation import profiled
+from sprite import Sprite
+
+# img_utils是否为构建后的Cython扩展（混合核释放GIL，分块并行才有收益）
+IMG_UTILS_COMPILED = img_utils.__file__.endswith(tuple(EXTENSION_SUFFIXES))
+
+
+def tint_premultiplied(gray: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """
+    按灰度值逐像素着色并预乘（与img_utils中_get_premultiplied_lut的定点运算相同）
+
+    Args:
+        gray (np.ndarray): 形如(n, m)的灰度值
+        colors (np.ndarray): 形如(n, 4)的RGBA，第i行用于gray的第i行
+
+    Returns:
+        np.ndarray: 形如(n, m)的uint32预乘像素
+    """
+    gray = gray.astype(np.uint32)
+    colors = colors.astype(np.uint32)[:, None, :]
+    alpha = np.minimum(colors[..., 3] * gray // 255, 255)
+    result = alpha << 24
+    for channel, shift in enumerate((16, 8, 0)):
+        value = (colors[..., channel] * gray // 255) * alpha + 128
+        result |= ((value + (value >> 8)) >> 8) << shift
+    return result
+
+
+def _linear_interval(slope: np.ndarray, offset: np.ndarray, low, high) -> tuple[np.ndarray, np.ndarray]:
+    """满足low <= slope * t + offset <= high的t的闭区间（slope为0时为全体实数或空集）"""
+    flat = np.abs(slope) < 1e-12
+    safe_slope = np.where(flat, 1.0, slope)
+    t0, t1 = (low - offset) / safe_slope, (high - offset) / safe_slope
+    satisfied = (offset >= low) & (offset <= high)
+    start = np.where(flat, np.where(satisfied, -np.inf, np.inf), np.minimum(t0, t1))
+    end = np.where(flat, np.where(satisfied, np.inf, -np.inf), np.maximum(t0, t1))
+    return start, end
+
+
+class NumpyCompositor:
+    """NumPy软件合成器
+
+    每次绘制时在一块预乘ARGB32的NumPy帧缓冲区上合成所有图案，
+    缓冲区覆盖重绘区域的外接矩形（只增不减地复用），只清空重绘区域内的矩形。
+    图案按调用顺序做source-over混合：整张图案以切片一次混合，
+    拖尾线段这类大量的小图案则一次性光栅化为像素列表，再按顺序散射混合。
+    最后以一张QImage、一次drawImage绘制到控件上。
+    """
+    # 像素数组缓存的条目上限（按QPixmap.cacheKey）
+    MAX_SPRITE_ARRAYS = 4096
+
+    def __init__(self):
+        self.buffer = np.zeros((0, 0), dtype=np.uint32)
+        self.origin = QPoint()
+        self.rect = QRect()
+        self.region = QRegion()
+        self.sprite_arrays: dict[int, np.ndarray] = {}
+
+    def begin(self, region: QRegion):
+        """开始一帧：按重绘区域准备并清空帧缓冲区"""
+        self.region = region
+        self.rect = region.boundingRect()
+        self.origin = self.rect.topLeft()
+        height, width = self.rect.height(), self.rect.width()
+        if height > self.buffer.shape[0] or width > self.buffer.shape[1]:
+            self.buffer = np.zeros((max(height, self.buffer.shape[0]), max(width, self.buffer.shape[1])),
+                                   dtype=np.uint32)
+        for rect in region:
+            rect = rect.translated(-self.origin)
+            self.buffer[rect.top():rect.bottom() + 1, rect.left():rect.right() + 1] = 0
+
+    def sprite_array(self, pixmap: QPixmap) -> np.ndarray:
+        """QPixmap的预乘像素数组（按cacheKey缓存，图集中的帧反复使用）"""
+        key = pixmap.cacheKey()
+        pixels = self.sprite_arrays.get(key)
+        if pixels is None:
+            if len(self.sprite_arrays) >= self.MAX_SPRITE_ARRAYS:
+                self.sprite_arrays.clear()
+            image = pixmap.toImage().convertToFormat(RESULT_FORMAT)
+            pixels = np.frombuffer(image.constBits(), dtype=np.uint32).reshape(
+                (image.height(), image.bytesPerLine() // 4))[:, :image.width()].copy()
+            self.sprite_arrays[key] = pixels
+        return pixels
+
+    @staticmethod
+    def _shift_subpixel(pixels: np.ndarray, fx: float, fy: float) -> np.ndarray:
+        """以双线性插值把图案平移(fx, fy)（0 <= fx, fy < 1），结果的宽高各多1像素"""
+        height, width = pixels.shape
+        padded = np.zeros((height + 2, width + 2, 4), dtype=np.float32)
+        padded[1:-1, 1:-1] = pixels.view(np.uint8).reshape(height, width, 4)
+        horizontal = padded[:, :-1] * fx + padded[:, 1:] * (1 - fx)
+        shifted = horizontal[:-1] * fy + horizontal[1:] * (1 - fy)
+        return (shifted + 0.5).astype(np.uint8).view(np.uint32).reshape(height + 1, width + 1)
+
+    @staticmethod
+    def rasterize(sprite: Sprite, fx: float, fy: float, flip: bool) -> np.ndarray:
+        """
+        以QPainter把Sprite绘制到透明图像上，左上角偏移(fx, fy)（0 <= fx, fy < 1），结果的宽高各多1像素
+
+        旋转随帧连续变化，结果不缓存。
+        """
+        image = QImage(sprite.width() + 1, sprite.height() + 1, RESULT_FORMAT)
+        image.fill(0)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        sprite.draw(painter, fx, fy, flip)
+        painter.end()
+        return np.frombuffer(image.constBits(), dtype=np.uint32).reshape(
+            (image.height(), image.bytesPerLine() // 4))[:, :image.width()].copy()
+
+    def blend_sprite(self, pixmap: QPixmap | Sprite, x: float, y: float, flip: bool = False):
+        """
+        以(x, y)为左上角混合一张图案
+
+        整数坐标时直接混合（与QPainter.drawPixmap逐像素一致），
+        小数坐标按1/256像素量化后以双线性插值平移，对应QPainter开启SmoothPixmapTransform时的亚像素绘制。
+        需要旋转的Sprite先由rasterize绘制为像素数组。
+
+        Args:
+            pixmap (QPixmap | Sprite): 图案
+            x, y (float): 控件坐标系下的左上角
+            flip (bool): 是否上下翻转
+        """
+        if isinstance(pixmap, Sprite):
+            left, top = math.floor(x), math.floor(y)
+            pixels = self.rasterize(pixmap, x - left, y - top, flip)
+            self._blend_placed(pixels, left - self.origin.x(), top - self.origin.y())
+            return
+        pixels = self.sprite_array(pixmap)
+        if flip:
+            pixels = pixels[::-1]
+        left, top = math.floor(x), math.floor(y)
+        fx, fy = round((x - left) * 256), round((y - top) * 256)
+        left, fx = (left + 1, 0) if fx == 256 else (left, fx)
+        top, fy = (top + 1, 0) if fy == 256 else (top, fy)
+        if fx or fy:
+            pixels = self._shift_subpixel(pixels, fx / 256, fy / 256)
+        self._blend_placed(pixels, left - self.origin.x(), top - self.origin.y())
+
+    def _blend_placed(self, pixels: np.ndarray, left: int, top: int):
+        """以缓冲区坐标(left, top)为左上角混合像素数组（裁剪到帧缓冲区）"""
+        height, width = pixels.shape
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + width, self.rect.width()), min(top + height, self.rect.height())
+        if x0 >= x1 or y0 >= y1:
+            return
+        blend_over_into(self.buffer[y0:y1, x0:x1], pixels[y0 - top:y1 - top, x0 - left:x1 - left])
+
+    def blend_quads(self,
+                    starts: np.ndarray,
+                    angles: np.ndarray,
+                    lengths: np.ndarray,
+                    rows: np.ndarray,
+                    heights: np.ndarray):
+        """
+        混合一组旋转矩形：第i个矩形以starts[i]为起点沿angles[i]方向延伸lengths[i]，
+        宽heights[i]并以起点为中心，横截面第j行的颜色为rows[i, j]（沿长度方向不变）。
+        沿长度方向按像素中心是否落在矩形内取舍，两条长边做抗锯齿。
+
+        Args:
+            starts (np.ndarray): 形如(n, 2)的起点（控件坐标系）
+            angles (np.ndarray): 形如(n,)的方向（弧度）
+            lengths (np.ndarray): 形如(n,)的长度
+            rows (np.ndarray): 形如(n, max_height)的uint32预乘像素
+            heights (np.ndarray): 形如(n,)的整数宽度，不超过rows的列数
+        """
+        if len(lengths) == 0:
+            return
+        cos, sin = np.cos(angles), np.sin(angles)
+        half = heights / 2.0
+        start_x = starts[:, 0] - self.origin.x()
+        start_y = starts[:, 1] - self.origin.y()
+
+        # 抗锯齿覆盖到长边外0.5像素，按这一外扩后的矩形逐行扫描
+        outer = half + 0.5
+        corner_u = np.stack([np.zeros_like(lengths), lengths, np.zeros_like(lengths), lengths], axis=1)
+        corner_v = np.stack([-outer, -outer, outer, outer], axis=1)
+        corner_y = start_y[:, None] + corner_u * sin[:, None] + corner_v * cos[:, None]
+        y0 = np.maximum(np.floor(corner_y.min(axis=1)), 0).astype(np.int64)
+        y1 = np.minimum(np.ceil(corner_y.max(axis=1)), self.rect.height()).astype(np.int64)
+        row_counts = np.maximum(y1 - y0, 0)
+        total_rows = int(row_counts.sum())
+        if total_rows == 0:
+            return
+
+        # 每一行：像素中心所在水平线与矩形的交集（u与v的约束各给出一个区间），
+        # 只展开区间内的像素，长而倾斜的线段不会展开整个外接矩形
+        row_quad = np.repeat(np.arange(len(lengths)), row_counts)
+        row_y = y0[row_quad] + np.arange(total_rows) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        dy = row_y + 0.5 - start_y[row_quad]
+        u_start, u_end = _linear_interval(cos[row_quad], dy * sin[row_quad], 0.0, lengths[row_quad])
+        v_start, v_end = _linear_interval(-sin[row_quad], dy * cos[row_quad], -outer[row_quad], outer[row_quad])
+        row_x = start_x[row_quad] - 0.5
+        width = self.rect.width()
+        x0 = np.clip(np.ceil(row_x + np.maximum(u_start, v_start)), 0, width).astype(np.int64)
+        x1 = np.clip(np.floor(row_x + np.minimum(u_end, v_end)) + 1, 0, width).astype(np.int64)
+        counts = np.maximum(x1 - x0, 0)
+        total = int(counts.sum())
+        if total == 0:
+            return
+
+        # 展开所有行区间内的像素（保持矩形的先后顺序）
+        row = np.repeat(np.arange(total_rows), counts)
+        quad = row_quad[row]
+        px = x0[row] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        py = row_y[row]
+
+        # 像素中心换算到矩形的局部坐标
+        dx = px + 0.5 - start_x[quad]
+        dy = py + 0.5 - start_y[quad]
+        u = dx * cos[quad] + dy * sin[quad]
+        v = dy * cos[quad] - dx * sin[quad] + half[quad]
+        # 沿线段方向按像素中心取舍；两条长边按像素与矩形重叠的宽度做抗锯齿
+        coverage = np.minimum(np.minimum(v + 0.5, heights[quad] - v + 0.5), 1.0)
+        inside = (u >= 0) & (u < lengths[quad]) & (coverage > 0)
+        quad, px, py = quad[inside], px[inside], py[inside]
+        row = np.minimum(np.maximum(v[inside], 0), heights[quad] - 1).astype(np.int64)
+        colors = scale_pixels(rows[quad, row], (coverage[inside] * 255 + 0.5).astype(np.uint32))
+        self._scatter_over(py * self.buffer.shape[1] + px, colors)
+
+    def _scatter_over(self, indices: np.ndarray, colors: np.ndarray):
+        """按顺序把colors混合到帧缓冲区的扁平下标indices处"""
+        scatter_over_into(self.buffer.reshape(-1), indices, colors)
+
+    def image(self) -> QImage:
+        """帧缓冲区中重绘区域外接矩形部分的QImage（引用缓冲区内存，不复制）"""
+        return QImage(self.buffer.data, self.rect.width(), self.rect.height(),
+                      self.buffer.shape[1] * 4, RESULT_FORMAT)
+
+    def draw(self, painter: QPainter):
+        """把合成结果一次绘制到重绘区域"""
+        painter.save()
+        painter.setClipRegion(self.region)
+        painter.drawImage(self.origin, self.image())
+        painter.restore()
+
+
+class TiledCompositor(NumpyCompositor):
+    """分块并行的NumPy软件合成器
+
+    重绘区域的外接矩形按tile_size划分为分块。绘制期间的混合操作先按顺序记录
+    （拖尾线段照常在绘制线程中一次光栅化为像素列表），draw时以数组运算对整个绘制列表一次分块，
+    各分块在线程池中按记录顺序独立混合。分块互不重叠，每个像素的混合顺序与单线程时相同，结果逐像素一致。
+    img_utils按setup.py构建为Cython扩展时混合核全程释放GIL；
+    未构建时使用的NumPy实现只在大数组运算期间释放，多线程的收益有限。
+    所有分块完成后由绘制线程把整个缓冲区一次绘制出去。
+    """
+    def __init__(self, tile_size: int, threads: int):
+        """
+        Args:
+            tile_size (int): 分块边长（像素）
+            threads (int): 合成线程数
+        """
+        super().__init__()
+        self.tile_size = tile_size
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="compositor-tile")
+        # 按调用顺序记录的操作，sequence为全局顺序号：(顺序号, 像素数组, 左, 上) / (顺序号, 扁平下标, 颜色)
+        self.sprites: list[tuple[int, np.ndarray, int, int]] = []
+        self.scatters: list[tuple[int, np.ndarray, np.ndarray]] = []
+        self.sequence = 0
+        # 分块后的绘制列表：第i项为(类型, a, b)，类型0为self.sprites[a]，类型1为排序后像素的[a, b)区间
+        self.entry_kinds: list[int] = []
+        self.entry_a: list[int] = []
+        self.entry_b: list[int] = []
+        self.scatter_indices = np.zeros(0, dtype=np.int64)
+        self.scatter_colors = np.zeros(0, dtype=np.uint32)
+
+    def begin(self, region: QRegion):
+        super().begin(region)
+        self.sprites.clear()
+        self.scatters.clear()
+        self.sequence = 0
+
+    def _blend_placed(self, pixels: np.ndarray, left: int, top: int):
+        self.sprites.append((self.sequence, pixels, left, top))
+        self.sequence += 1
+
+    def _scatter_over(self, indices: np.ndarray, colors: np.ndarray):
+        self.scatters.append((self.sequence, indices, colors))
+        self.sequence += 1
+
+    def _bin_operations(self) -> list[tuple[int, int, int]]:
+        """
+        对整个绘制列表一次性分块（全部为数组运算，不逐个操作循环）
+
+        Returns:
+            list[tuple[int, int, int]]: 每个非空分块的(分块序号, 起, 止)，
+            绘制列表的[起, 止)为该分块内按顺序执行的操作
+        """
+        size = self.tile_size
+        columns = -(-self.rect.width() // size)
+        rows = -(-self.rect.height() // size)
+        empty = np.zeros(0, dtype=np.int64)
+        tiles, sequences, kinds, starts, ends = [empty], [empty], [empty], [empty], [empty]
+
+        if self.sprites:
+            sequence, left, top, height, width = np.array(
+                [(sequence, left, top, *pixels.shape) for sequence, pixels, left, top in self.sprites],
+                dtype=np.int64).T
+            tile_x0 = np.maximum(left // size, 0)
+            tile_y0 = np.maximum(top // size, 0)
+            tile_columns = np.maximum(np.minimum((left + width - 1) // size, columns - 1) - tile_x0 + 1, 0)
+            tile_rows = np.maximum(np.minimum((top + height - 1) // size, rows - 1) - tile_y0 + 1, 0)
+            counts = tile_columns * tile_rows
+            sprite = np.repeat(np.arange(len(self.sprites)), counts)
+            offset = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            tiles.append((tile_y0[sprite] + offset // tile_columns[sprite]) * columns
+                         + tile_x0[sprite] + offset % tile_columns[sprite])
+            sequences.append(sequence[sprite])
+            kinds.append(np.zeros(len(sprite), dtype=np.int64))
+            starts.append(sprite)
+            ends.append(sprite)
+
+        if self.scatters:
+            stride = self.buffer.shape[1]
+            indices = np.concatenate([indices for _, indices, _ in self.scatters])
+            colors = np.concatenate([colors for _, _, colors in self.scatters])
+            sequence = np.repeat([sequence for sequence, _, _ in self.scatters],
+                                 [len(indices) for _, indices, _ in self.scatters])
+            tile = (indices // stride // size) * columns + (indices % stride) // size
+            # 拼接后顺序号已经递增，按分块稳定排序即按(分块, 顺序号)排序
+            order = np.argsort(tile, kind="stable")
+            self.scatter_indices, self.scatter_colors = indices[order], colors[order]
+            tile, sequence = tile[order], sequence[order]
+            bounds = np.flatnonzero(np.r_[True, (tile[1:] != tile[:-1]) | (sequence[1:] != sequence[:-1])])
+            tiles.append(tile[bounds])
+            sequences.append(sequence[bounds])
+            kinds.append(np.ones(len(bounds), dtype=np.int64))
+            starts.append(bounds)
+            ends.append(np.r_[bounds[1:], len(tile)])
+
+        tiles, sequences = np.concatenate(tiles), np.concatenate(sequences)
+        order = np.lexsort((sequences, tiles))
+        tiles, kinds = tiles[order], np.concatenate(kinds)[order]
+        starts, ends = np.concatenate(starts)[order], np.concatenate(ends)[order]
+        # 同一分块内相邻的像素区间在排序后的像素数组中首尾相接，合并为一次散射
+        previous_same = np.r_[False, (tiles[1:] == tiles[:-1]) & (kinds[1:] == 1) & (kinds[:-1] == 1)]
+        keep = np.flatnonzero(~previous_same)
+        last = np.r_[keep[1:], len(tiles)] - 1
+        tiles, kinds, starts, ends = tiles[keep], kinds[keep], starts[keep], ends[last]
+
+        self.entry_kinds, self.entry_a, self.entry_b = kinds.tolist(), starts.tolist(), ends.tolist()
+        bounds = np.flatnonzero(np.r_[True, tiles[1:] != tiles[:-1], True])
+        return list(zip(tiles[bounds[:-1]].tolist(), bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _render_tiles(self, tiles: list[tuple[int, int, int]]):
+        """在工作线程中依次合成一组分块"""
+        for tile, start, end in tiles:
+            self._render_tile(tile, start, end)
+
+    def _render_tile(self, tile: int, start: int, end: int):
+        """在工作线程中按顺序执行绘制列表[start, end)内一个分块的操作"""
+        size = self.tile_size
+        tile_y, tile_x = divmod(tile, -(-self.rect.width() // size))
+        tile_left, tile_top = tile_x * size, tile_y * size
+        tile_right = min(tile_left + size, self.rect.width())
+        tile_bottom = min(tile_top + size, self.rect.height())
+        flat = self.buffer.reshape(-1)
+        for kind, a, b in zip(self.entry_kinds[start:end], self.entry_a[start:end], self.entry_b[start:end]):
+            if kind == 0:
+                _, pixels, left, top = self.sprites[a]
+                height, width = pixels.shape
+                x0, y0 = max(left, tile_left), max(top, tile_top)
+                x1, y1 = min(left + width, tile_right), min(top + height, tile_bottom)
+                if x0 < x1 and y0 < y1:
+                    blend_over_into(self.buffer[y0:y1, x0:x1], pixels[y0 - top:y1 - top, x0 - left:x1 - left])
+            else:
+                scatter_over_into(flat, self.scatter_indices[a:b], self.scatter_colors[a:b])
+
+    @profiled("composite_tiles")
+    def render_tiles(self):
+        """并行合成所有分块，返回时帧缓冲区已经完整"""
+        if self.sequence == 0:
+            return
+        tiles = self._bin_operations()
+        if not tiles:
+            return
+        # 按操作数把分块分成每个线程两批，减少提交任务与等待的次数
+        batches = self.threads * 2
+        boundaries = np.searchsorted([end for _, _, end in tiles],
+                                     np.arange(1, batches) * (tiles[-1][2] / batches), side="right")
+        for future in [self.executor.submit(self._render_tiles, tiles[start:end])
+                       for start, end in zip([0, *boundaries.tolist()], [*boundaries.tolist(), len(tiles)])
+                       if start < end]:
+            future.result()
+
+    def draw(self, painter: QPainter):
+        self.render_tiles()
+        super().draw(painter)
@@ -1,23 +1,100 @@
 import random
 
 import numpy as np
-from scipy.interpolate import interp1d, CubicHermiteSpline
-from pynput import mouse
 
-from img_utils import load_grayscale_image, slice_image_vertically
-from utils import evaluate_piecewise_hermite
+from assets import Asset
+from baked_cache import BakedCache
+from img_utils import load_grayscale_image, read_image_size
+from column_table import ColumnTable
+from curves import compile_color_curve, compile_hermite_curve, ColorCurve, CurveLUT, HermiteCurve, PiecewiseCurve
 
-class GlobalConstants:
+# 纹理、曲线与列查找表都声明为Asset：导入本模块时不做任何加载，首次使用或后台预热时才加载
+
+def _get_mouse_hit_area() -> tuple:
     # (mouse.Button.left, mouse.Button.right, mouse.Button.middle, mouse.Button.x1, mouse.Button.x2)
-    MOUSE_HIT_AREA = (mouse.Button.left, mouse.Button.right, mouse.Button.middle, mouse.Button.x1, mouse.Button.x2)
+    # x1/x2只在部分平台的pynput后端中存在
+    try:
+        from pynput import mouse
+    except ImportError:
+        # 无显示环境（如在无头Linux上运行基准测试）时pynput无法加载后端，此时不监听鼠标
+        return ()
+    return tuple(getattr(mouse.Button, name) for name in ("left", "right", "middle", "x1", "x2")
+                 if hasattr(mouse.Button, name))
+
+class GlobalConstants:
+    MOUSE_HIT_AREA = Asset(_get_mouse_hit_area)
 
     SIZE = 256
     MAX_FPS = 60
+    MIN_FPS = 30                    # 自适应帧率的下限
+    ADAPTIVE_FRAME_PACING = False   # 帧耗时持续超出预算时自动降低帧率
 
     TOUCH_EFFECT_WIDGET_SIDE = SIZE
+    MAX_TOUCH_EFFECTS = 16      # 同时存在的点击特效上限，超出时回收最早的特效
+    MAX_DRAG_PARTICLES = 1024   # 拖动粒子池容量，超出时覆盖最早的粒子
+    INPUT_BUFFER_CAPACITY = 4096    # 鼠标采样环形缓冲区容量
+    TRAIL_POINT_CAPACITY = 2048     # 拖尾点环形缓冲区容量，超出时丢弃最旧的点
+    DIRTY_RECT_MARGIN = 2       # 重绘区域外扩像素，覆盖抗锯齿与取整误差
+
+    # === 帧图集缓存配置 ===
+    FRAME_CACHE_FRAMES_PER_LIFETIME = 64        # 每个生命周期预渲染的帧数
+    FRAME_CACHE_MAX_BYTES = 64 * 1024 * 1024    # 缓存内存上限
+
+    # === 帧预渲染配置 ===
+    FRAME_PREFETCH = True               # 新特效的后续帧在工作线程中预先渲染
+    FRAME_PREFETCH_WORKERS = None       # 预渲染线程数，缺省为CPU核数-1（至多2个），为0时不预渲染
+    FRAME_PREFETCH_MAX_PENDING = 512    # 未领取的预渲染帧数上限
+
+    # === 合成后端配置（启动时选定） ===
+    # "qpainter"：逐个图案用QPainter绘制；"numpy"：在NumPy帧缓冲区中合成后一次绘制
+    # 拖尾线段多时numpy更快，大尺寸点击图案多时QPainter更快（见benchmarks/bench_pipeline.py --backend）
+    RENDER_BACKEND = "qpainter"
+    RENDER_THREADS = None           # numpy后端的分块合成线程数，缺省（None）或为1时不分块；仅在img_utils为Cython扩展时生效
+    RENDER_TILE_SIZE = 128          # numpy后端分块合成的分块边长（像素）
+    SPRITE_TRANSFORMS = False       # qpainter后端：特效帧以未旋转、未缩放的着色纹理加世界变换绘制，不经过帧图集
+
+    # === 着色结果缓存配置 ===
+    TINT_CACHE_MAX_BYTES = 16 * 1024 * 1024     # 缓存内存上限
+    TINT_CACHE_COLOR_STEP = 4                   # RGB与Alpha的量化步长，1表示不量化
+
+    # === 性能统计配置（DEBUG_MODE下总是开启，并在屏幕左上角显示统计） ===
+    PROFILING = False               # 记录各阶段耗时
+    PROFILING_WINDOW = 600          # 每个阶段的滚动直方图保留的样本数
+    PROFILING_DUMP_PATH = None      # 非空时定期把统计写入该JSON文件
+    PROFILING_DUMP_INTERVAL = 5.0   # 写入间隔（秒）
+
+    # === 烘焙结果磁盘缓存配置 ===
+    BAKED_CACHE_ENABLED = True      # 把拖尾条带、特效着色帧等烘焙结果保存到磁盘，之后启动时直接映射
+    BAKED_CACHE_DIR = None          # 缺省为用户缓存目录下的DesktopTouch/baked
+    CURVE_LUT_SAMPLES = 1024        # 颜色、尺寸等关键帧曲线烘焙为查找表（保存在磁盘缓存中）的采样数，为0时按解析式求值
 
     DEBUG_MODE = False
 
+# 全局烘焙结果缓存
+BAKED_CACHE = BakedCache(GlobalConstants.BAKED_CACHE_DIR, GlobalConstants.BAKED_CACHE_ENABLED)
+
+def _load_curve_tables(name: str, compile_channels, key_points) -> list[CurveLUT]:
+    """读取（必要时烘焙并写入磁盘缓存）曲线各通道的查找表，键为关键帧定义与采样数"""
+    samples = GlobalConstants.CURVE_LUT_SAMPLES
+    arrays = BAKED_CACHE.load_or_bake(
+        f"curve-{name}",
+        lambda: {"tables": np.stack([channel.to_lut(samples).table for channel in compile_channels(key_points)])},
+        params=(key_points, samples),
+    )
+    return [CurveLUT(table) for table in arrays["tables"]]
+
+def _load_color_curve(name: str, color_key_points: list[dict]) -> ColorCurve:
+    """COLOR_KEY_POINTS编译的颜色曲线；CURVE_LUT_SAMPLES非0时为磁盘缓存中的查找表"""
+    if not GlobalConstants.CURVE_LUT_SAMPLES:
+        return compile_color_curve(color_key_points)
+    return ColorCurve(_load_curve_tables(name, compile_color_curve, color_key_points))
+
+def _load_hermite_curve(name: str, key_points: dict) -> HermiteCurve | CurveLUT:
+    """带tangents的*_KEY_POINTS编译的曲线；CURVE_LUT_SAMPLES非0时为磁盘缓存中的查找表"""
+    if not GlobalConstants.CURVE_LUT_SAMPLES:
+        return compile_hermite_curve(key_points)
+    return _load_curve_tables(name, lambda points: (compile_hermite_curve(points),), key_points)[0]
+
 class MeshTriConstants:
     START_LIFETIME = 0.6
     START_SIZE = 0.12
@@ -32,10 +109,7 @@ class MeshTriConstants:
         {"channel": "b", "time_percentages": (0.0, 0.112, 0.5, 1.0), "values": (255, 255, 255, 255)},
         {"channel": "a", "time_percentages": (0.0, 1.0), "values": (255, 255)},
     ]
-    COLOR_OVER_LIFETIME = tuple(
-        interp1d(np.array(channel["time_percentages"]), np.array(channel["values"]), kind="linear")
-        for channel in COLOR_KEY_POINTS
-    )
+    COLOR_OVER_LIFETIME = Asset(_load_color_curve, "MeshTriConstants.COLOR_OVER_LIFETIME", COLOR_KEY_POINTS)
 
     # === 尺寸变化配置 ===
     SIZE_KEY_POINTS = {
@@ -43,11 +117,7 @@ class MeshTriConstants:
         "values": (0.652, 1.432, 2.0),          # 已预计算：0.326 * 2, 0.716 * 2
         "tangents": (2.4, 0.9, 0.0),
     }
-    SIZE_OVER_LIFETIME = CubicHermiteSpline(
-        SIZE_KEY_POINTS["time_percentages"],
-        SIZE_KEY_POINTS["values"],
-        SIZE_KEY_POINTS["tangents"]
-    )
+    SIZE_OVER_LIFETIME = Asset(_load_hermite_curve, "MeshTriConstants.SIZE_OVER_LIFETIME", SIZE_KEY_POINTS)
 
     # === 旋转变化配置 ===
     ROTATION_KEY_POINTS_MIN = {
@@ -55,22 +125,14 @@ class MeshTriConstants:
         "values": (511.36, 511.36, -41.6),    # 已预计算：0.799 * 640, -0.065 * 640
         "tangents": (0.0, 0.0, 0.0),
     }
-    ROTATION_OVER_LIFETIME_MIN = CubicHermiteSpline(
-        ROTATION_KEY_POINTS_MIN["time_percentages"],
-        ROTATION_KEY_POINTS_MIN["values"],
-        ROTATION_KEY_POINTS_MIN["tangents"]
-    )
+    ROTATION_OVER_LIFETIME_MIN = Asset(_load_hermite_curve, "MeshTriConstants.ROTATION_OVER_LIFETIME_MIN", ROTATION_KEY_POINTS_MIN)
 
     ROTATION_KEY_POINTS_MAX = {
         "time_percentages": (0.0, 0.149, 1.0),
         "values": (640.0, 640.0, 291.84),     # 已预计算：1 * 640, 0.456 * 640
         "tangents": (0.0, 0.0, 0.0),
     }
-    ROTATION_OVER_LIFETIME_MAX = CubicHermiteSpline(
-        ROTATION_KEY_POINTS_MAX["time_percentages"],
-        ROTATION_KEY_POINTS_MAX["values"],
-        ROTATION_KEY_POINTS_MAX["tangents"]
-    )
+    ROTATION_OVER_LIFETIME_MAX = Asset(_load_hermite_curve, "MeshTriConstants.ROTATION_OVER_LIFETIME_MAX", ROTATION_KEY_POINTS_MAX)
 
     ROTATION_OVER_LIFETIME = lambda self, time: random.uniform(MeshTriConstants.ROTATION_OVER_LIFETIME_MIN(time), 
                                                          MeshTriConstants.ROTATION_OVER_LIFETIME_MAX(time))
@@ -88,15 +150,16 @@ class MeshTriConstants:
             "tangents": ((0, 0), (2.425, 0.277))
         }
 
-        CUSTOM1_X = lambda time: 0
+        # 自定义数据曲线只依赖关键帧定义，首次使用时编译一次
+        CUSTOM1_X = Asset(lambda: MeshTriConstants.CustomData.get_custom1_x())
         @staticmethod
         def get_custom1_x():
-            CUSTOM1_X_FUNCS = tuple(CubicHermiteSpline(
+            CUSTOM1_X_FUNCS = tuple(HermiteCurve(
             MeshTriConstants.CustomData.CUSTOM1_X_KEY_POINTS["time_percentages"][i],
             MeshTriConstants.CustomData.CUSTOM1_X_KEY_POINTS["values"][i],
             MeshTriConstants.CustomData.CUSTOM1_X_KEY_POINTS["tangents"][i]) 
             for i in range(2))
-            CUSTOM1_X = evaluate_piecewise_hermite(0.2, *CUSTOM1_X_FUNCS)
+            CUSTOM1_X = PiecewiseCurve(0.2, *CUSTOM1_X_FUNCS)
             return CUSTOM1_X
 
 class RingConstants:
@@ -113,10 +176,7 @@ class RingConstants:
         {"channel": "b", "time_percentages": (0.0, 0.121, 1.0), "values": (255, 255, 255)},
         {"channel": "a", "time_percentages": (0.0, 0.109, 1.0), "values": (255, 255, 0)},
     ]
-    COLOR_OVER_LIFETIME = tuple(
-        interp1d(np.array(channel["time_percentages"]), np.array(channel["values"]), kind="linear")
-        for channel in COLOR_KEY_POINTS
-    )
+    COLOR_OVER_LIFETIME = Asset(_load_color_curve, "RingConstants.COLOR_OVER_LIFETIME", COLOR_KEY_POINTS)
 
     # === 尺寸变化配置 ===
     SIZE_KEY_POINTS = {
@@ -124,17 +184,14 @@ class RingConstants:
         "values": (0.652, 1.432, 2.0),          # 已预计算：0.326 * 2, 0.716 * 2
         "tangents": (2.4, 0.9, 0.0),
     }
-    SIZE_OVER_LIFETIME = CubicHermiteSpline(
-        SIZE_KEY_POINTS["time_percentages"],
-        SIZE_KEY_POINTS["values"],
-        SIZE_KEY_POINTS["tangents"]
-    )
+    SIZE_OVER_LIFETIME = Asset(_load_hermite_curve, "RingConstants.SIZE_OVER_LIFETIME", SIZE_KEY_POINTS)
 
-    ROTATION_OVER_LIFETIME = lambda self, time: self.START_ROTATION
+    # 旋转角度为相对于每个实例的start_rotation的增量
+    ROTATION_OVER_LIFETIME = lambda self, time: 0
 
     # === 资源路径 ===
     GRAYSCALE_IMAGE_PATH = 'pictures/effects/FX_TEX_Circle_01.png'
-    GRAYSCALE_IMAGE = load_grayscale_image(GRAYSCALE_IMAGE_PATH)
+    GRAYSCALE_IMAGE = Asset(load_grayscale_image, GRAYSCALE_IMAGE_PATH)
 
 
 class RingXConstants:
@@ -151,10 +208,7 @@ class RingXConstants:
         {"channel": "b", "time_percentages": (0.0, 0.182, 0.282, 0.462, 0.662, 0.826, 1.0), "values": (255, 255, 255, 255, 241, 255, 255)},
         {"channel": "a", "time_percentages": (0.0, 0.288, 0.365, 0.471, 0.574, 0.668, 0.756, 0.853, 1.0), "values": (255, 255, 0, 255, 0, 255, 0, 255, 255)},
     ]
-    COLOR_OVER_LIFETIME = tuple(
-        interp1d(np.array(channel["time_percentages"]), np.array(channel["values"]), kind="linear")
-        for channel in COLOR_KEY_POINTS
-    )
+    COLOR_OVER_LIFETIME = Asset(_load_color_curve, "RingXConstants.COLOR_OVER_LIFETIME", COLOR_KEY_POINTS)
 
     # === 尺寸变化配置 ===
     SIZE_KEY_POINTS = {
@@ -162,23 +216,19 @@ class RingXConstants:
         "values": (0.0, 1.0, 0.0),
         "tangents": (0.0, 0.0, -2.162),
     }
-    SIZE_OVER_LIFETIME = CubicHermiteSpline(
-        SIZE_KEY_POINTS["time_percentages"],
-        SIZE_KEY_POINTS["values"],
-        SIZE_KEY_POINTS["tangents"]
-    )
+    SIZE_OVER_LIFETIME = Asset(_load_hermite_curve, "RingXConstants.SIZE_OVER_LIFETIME", SIZE_KEY_POINTS)
 
     ROTATION_OVER_LIFETIME = lambda self, time: 0
 
     # === 资源路径 ===
-    GRAYSCALE_IMAGE_PATH = 'pictures/effects/FX_TEX_TRIangle_02.png'
-    GRAYSCALE_IMAGE = load_grayscale_image(GRAYSCALE_IMAGE_PATH)
+    GRAYSCALE_IMAGE_PATH = 'pictures/effects/FX_TEX_Triangle_02.png'
+    GRAYSCALE_IMAGE = Asset(load_grayscale_image, GRAYSCALE_IMAGE_PATH)
 
 
 class Ring3Constants(RingXConstants):
     
-    get_start_size = lambda self: random.uniform(0.1, 0.2)
-    get_start_size = lambda self: random.uniform(0.1, 0.2)
+    START_SIZE_RANGE = (0.1, 0.2)   # 随机start_size的范围，帧图集按此范围预先烘焙
+    get_start_size = lambda self: random.uniform(*Ring3Constants.START_SIZE_RANGE)
     get_start_lifetime = lambda self: random.uniform(0.6, 0.7)
     get_start_speed = lambda self: random.uniform(0.3, 0.4)
 
@@ -194,8 +244,8 @@ class Ring3Constants(RingXConstants):
     
 class Ring4Constants(RingXConstants):
 
-    get_start_size = lambda self: random.uniform(0.1, 0.2) * 0.5
-    get_start_size = lambda self: random.uniform(0.1, 0.2) * 0.5
+    START_SIZE_RANGE = (0.05, 0.1)  # 随机start_size的范围，帧图集按此范围预先烘焙
+    get_start_size = lambda self: random.uniform(*Ring4Constants.START_SIZE_RANGE)
     get_start_lifetime = lambda self: random.uniform(0.2, 0.4)
     get_start_speed = lambda self: random.uniform(0.2, 0.3)
 
@@ -210,10 +260,32 @@ class Ring4Constants(RingXConstants):
         SCALE = (0.15, 0.15)
 
 
+def _load_trail_column_table() -> ColumnTable:
+    """拖尾纹理的列查找表：每列按对应年龄的拖尾宽度预先缩放，烘焙结果保存在磁盘缓存中"""
+    path = TrailConstants.GRAYSCALE_IMAGE_PATH
+    heights = ColumnTable.column_heights(read_image_size(path).width(), TrailConstants().WIDTH)
+    arrays = BAKED_CACHE.load_or_bake(
+        "trail_strips",
+        lambda: ColumnTable.bake(TrailConstants.GRAYSCALE_IMAGE, heights),
+        files=(path,),
+        params=(heights,),
+    )
+    return ColumnTable(**arrays)
+
 class TrailConstants:
     WIDTH = lambda self, t: 5.0
     TIME = 0.3
 
+    # 绘制模式："batched" 每条线段一次drawPixmap；"per_pixel" 沿线段逐像素绘制（旧实现）
+    RENDER_MODE = "batched"
+
+    # === 输入重采样配置 ===
+    RESAMPLE_MIN_SPACING = 3.0                  # 保留点之间的最小间距（像素），更密的采样只移动拖尾头部
+    RESAMPLE_MAX_TURN = np.radians(15)          # 合并采样时允许的最大转角，超出时保留拐点
+    SMOOTHING = True                            # 对稀疏采样做Catmull-Rom插值
+    SMOOTHING_SPACING = 8.0                     # 插值后相邻点的目标间距（像素）
+    SMOOTHING_MAX_SUBDIVISIONS = 8              # 每段最多插入的点数
+
     # === 颜色渐变配置 ===
     COLOR_KEY_POINTS = [
         {"channel": "r", "time_percentages": (0.0, 0.021, 0.421, 1.0), "values": (0, 0, 0, 0)},
@@ -221,16 +293,17 @@ class TrailConstants:
         {"channel": "b", "time_percentages": (0.0, 0.021, 0.421, 1.0), "values": (255, 255, 72, 0)},
         {"channel": "a", "time_percentages": (0.0, 1.0), "values": (255, 255)},
     ]
-    COLOR = tuple(
-        interp1d(np.array(channel["time_percentages"]), np.array(channel["values"]), kind="linear")
-        for channel in COLOR_KEY_POINTS
-    )
+    COLOR = Asset(_load_color_curve, "TrailConstants.COLOR", COLOR_KEY_POINTS)
 
     # === 资源路径 ===
     GRAYSCALE_IMAGE_PATH = 'pictures/effects/FX_TEX_Trail_03.png'
-    GRAYSCALE_IMAGE = load_grayscale_image(GRAYSCALE_IMAGE_PATH)
-    GARYSCALE_IMAGE_SLICES = slice_image_vertically(GRAYSCALE_IMAGE)
+    GRAYSCALE_IMAGE = Asset(load_grayscale_image, GRAYSCALE_IMAGE_PATH)
+
+    COLUMN_TABLE = Asset(_load_trail_column_table)
 
     def get_color(self, time_ratio):
         return tuple(int(channel_interpolate(time_ratio)) for channel_interpolate in self.COLOR)
 
+    def get_colors(self, time_ratios):
+        """一次计算多个时间点的颜色，返回形如(n, 4)的uint8数组"""
+        return self.COLOR.evaluate(time_ratios).astype(np.uint8)
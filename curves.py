@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Sequence
+
+import numpy as np
+
+
+class Curve(ABC):
+    """曲线基类
+
+    `curve(t)` 对标量求值并返回float，`curve.evaluate(t_array)` 一次对整个数组求值，
+    便于上百个粒子在一次NumPy调用中完成计算。
+    """
+    def __call__(self, t):
+        if isinstance(t, (float, int)) or np.ndim(t) == 0:
+            return self.scalar(float(t))
+        return self.evaluate(t)
+
+    @abstractmethod
+    def scalar(self, t: float) -> float:
+        ...
+
+    @abstractmethod
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        ...
+
+    def to_lut(self, samples: int = 1024) -> "CurveLUT":
+        """将曲线在[0, 1]区间烘焙为稠密的float32查找表"""
+        return CurveLUT(self.evaluate(np.linspace(0.0, 1.0, samples), dtype=np.float32))
+
+
+class LinearCurve(Curve):
+    """分段线性曲线（等价于interp1d(kind="linear")，区间外取端点值）"""
+    def __init__(self, time_percentages: Sequence[float], values: Sequence[float]):
+        self.x = np.asarray(time_percentages, dtype=np.float64)
+        self.y = np.asarray(values, dtype=np.float64)
+        self._x = tuple(float(v) for v in time_percentages)
+        self._y = tuple(float(v) for v in values)
+
+    def scalar(self, t: float) -> float:
+        x, y = self._x, self._y
+        if t <= x[0]:
+            return y[0]
+        if t >= x[-1]:
+            return y[-1]
+        i = bisect_right(x, t) - 1
+        return y[i] + (y[i + 1] - y[i]) * (t - x[i]) / (x[i + 1] - x[i])
+
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        return np.interp(t, self.x, self.y).astype(dtype, copy=False)
+
+
+class HermiteCurve(Curve):
+    """三次Hermite样条（等价于CubicHermiteSpline，区间外按端点多项式外推）"""
+    def __init__(self, time_percentages: Sequence[float], values: Sequence[float], tangents: Sequence[float]):
+        self.x = np.asarray(time_percentages, dtype=np.float64)
+        self.y = np.asarray(values, dtype=np.float64)
+        self.m = np.asarray(tangents, dtype=np.float64)
+        self.h = np.diff(self.x)
+        self._x = tuple(float(v) for v in time_percentages)
+        self._y = tuple(float(v) for v in values)
+        self._m = tuple(float(v) for v in tangents)
+
+    def _segment(self, t: float) -> int:
+        return min(max(bisect_right(self._x, t) - 1, 0), len(self._x) - 2)
+
+    def scalar(self, t: float) -> float:
+        i = self._segment(t)
+        x0, x1 = self._x[i], self._x[i + 1]
+        h = x1 - x0
+        s = (t - x0) / h
+        s2 = s * s
+        s3 = s2 * s
+        return ((2 * s3 - 3 * s2 + 1) * self._y[i]
+                + (s3 - 2 * s2 + s) * h * self._m[i]
+                + (-2 * s3 + 3 * s2) * self._y[i + 1]
+                + (s3 - s2) * h * self._m[i + 1])
+
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        t = np.asarray(t, dtype=np.float64)
+        i = np.clip(np.searchsorted(self.x, t, side="right") - 1, 0, len(self.x) - 2)
+        h = self.h[i]
+        s = (t - self.x[i]) / h
+        s2 = s * s
+        s3 = s2 * s
+        result = ((2 * s3 - 3 * s2 + 1) * self.y[i]
+                  + (s3 - 2 * s2 + s) * h * self.m[i]
+                  + (-2 * s3 + 3 * s2) * self.y[i + 1]
+                  + (s3 - s2) * h * self.m[i + 1])
+        return result.astype(dtype, copy=False)
+
+
+class PiecewiseCurve(Curve):
+    """在break_point处拼接两条曲线"""
+    def __init__(self, break_point: float, first: Curve, second: Curve):
+        self.break_point = break_point
+        self.first = first
+        self.second = second
+
+    def scalar(self, t: float) -> float:
+        return self.first.scalar(t) if t < self.break_point else self.second.scalar(t)
+
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        t = np.asarray(t, dtype=np.float64)
+        return np.where(t < self.break_point,
+                        self.first.evaluate(t, dtype),
+                        self.second.evaluate(t, dtype))
+
+
+class CurveLUT(Curve):
+    """稠密float32查找表，在[0, 1]上等距采样，查表时做线性插值"""
+    def __init__(self, table: np.ndarray):
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.last_index = len(self.table) - 1
+        self._table = self.table.tolist()
+
+    def scalar(self, t: float) -> float:
+        position = min(max(t, 0.0), 1.0) * self.last_index
+        i = min(int(position), self.last_index - 1)
+        frac = position - i
+        return self._table[i] + (self._table[i + 1] - self._table[i]) * frac
+
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        position = np.clip(np.asarray(t, dtype=np.float32), 0.0, 1.0) * self.last_index
+        i = np.minimum(position.astype(np.int32), self.last_index - 1)
+        frac = position - i
+        result = self.table[i] + (self.table[i + 1] - self.table[i]) * frac
+        return result.astype(dtype, copy=False)
+
+
+class ColorCurve(tuple):
+    """RGBA四通道曲线
+
+    仍然可以像原来的COLOR_OVER_LIFETIME一样按下标取单通道，
+    另外提供evaluate一次返回形如(n, 4)的颜色数组。
+    """
+    def evaluate(self, t, dtype=np.float32) -> np.ndarray:
+        t = np.asarray(t)
+        result = np.empty(t.shape + (len(self),), dtype=dtype)
+        for i, channel in enumerate(self):
+            result[..., i] = channel.evaluate(t, dtype)
+        return result
+
+    def rgba(self, t: float) -> tuple[int, ...]:
+        """对单个时间点求值，并截断为0-255的整数颜色"""
+        return tuple([int(max(0.0, min(255.0, channel.scalar(t)))) for channel in self])
+
+
+def compile_color_curve(color_key_points: list[dict]) -> ColorCurve:
+    """将COLOR_KEY_POINTS编译为ColorCurve"""
+    return ColorCurve(
+        LinearCurve(channel["time_percentages"], channel["values"])
+        for channel in color_key_points
+    )
+
+
+def compile_hermite_curve(key_points: dict) -> HermiteCurve:
+    """将带tangents的*_KEY_POINTS编译为HermiteCurve"""
+    return HermiteCurve(key_points["time_percentages"], key_points["values"], key_points["tangents"])
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class EffectParams:
+    """单个特效实例的随机化参数
+
+    constants.py中的常量类作为不可变的特效定义在所有实例间共享，
+    每个实例的随机初始值保存在各自的EffectParams中，不再写回常量类。
+    """
+    start_lifetime: float
+    start_size: float
+    start_rotation: float = 0.0
+    start_speed: float = 0.0
+
+    @classmethod
+    def sample(cls, constants) -> "EffectParams":
+        """按特效定义的get_start_*随机生成参数，没有随机函数的参数使用START_*常量"""
+        def draw(name: str) -> float:
+            getter = getattr(constants, f"get_{name}", None)
+            if getter is not None:
+                return getter()
+            return getattr(constants, name.upper(), 0.0)
+
+        return cls(
+            start_lifetime=draw("start_lifetime"),
+            start_size=draw("start_size"),
+            start_rotation=draw("start_rotation"),
+            start_speed=draw("start_speed"),
+        )
+
+    @classmethod
+    def defaults(cls, constants) -> "EffectParams":
+        """直接使用特效定义上的START_*常量"""
+        return cls(
+            start_lifetime=constants.START_LIFETIME,
+            start_size=constants.START_SIZE,
+            start_rotation=getattr(constants, "START_ROTATION", 0.0),
+            start_speed=getattr(constants, "START_SPEED", 0.0),
+        )
@@ -0,0 +1,285 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+
+from constants import GlobalConstants
+from img_utils import RESULT_FORMAT
+
+
+def pixmap_nbytes(pixmap: QPixmap) -> int:
+    """估算QPixmap占用的字节数"""
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+
+class PixmapLRUCache:
+    """按字节预算淘汰的LRU缓存
+
+    以OrderedDict维护访问顺序，超出max_bytes时从最久未使用的条目开始淘汰。
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[QPixmap, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> QPixmap | None:
+        """查找缓存，命中时刷新其LRU位置"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, pixmap: QPixmap):
+        """写入缓存并按字节预算淘汰旧条目"""
+        nbytes = pixmap_nbytes(pixmap)
+        if nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+        self._entries[key] = (pixmap, nbytes)
+        self.current_bytes += nbytes
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_bytes
+            self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], QPixmap | None]) -> QPixmap | None:
+        """命中则直接返回，否则调用factory生成并写入缓存"""
+        pixmap = self.get(key)
+        if pixmap is None:
+            pixmap = factory()
+            if pixmap is not None:
+                self.put(key, pixmap)
+        return pixmap
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class FrameAtlasCache:
+    """特效帧图集缓存
+
+    帧的输出只取决于(特效定义, 生命周期百分比, 尺寸)，因此把生命周期量化为frames_per_lifetime帧，
+    每个组合只渲染一次，之后每帧只需一次字典查找。
+    图集中的帧都未经旋转，旋转在绘制时以世界变换完成（见generate_frame.get_effect_frame），
+    实例的随机旋转与逐帧抖动的ROTATION_OVER_LIFETIME都不会产生新的条目。
+    """
+    def __init__(self,
+                 render: Callable[[float, object, int, bool], QPixmap],
+                 frames_per_lifetime: int,
+                 max_bytes: int,
+                 render_image: Callable[[float, object, int, bool], QImage] | None = None):
+        """
+        Args:
+            render: 实际渲染函数 render(time_percentage, Constants, actual_size, grayscale_image_transparent)
+            frames_per_lifetime (int): 每个生命周期量化的帧数
+            max_bytes (int): 缓存字节预算
+            render_image: 与render逐像素相同但返回QImage、可在工作线程中调用的渲染函数，bake需要
+        """
+        self.render = render
+        self.render_image = render_image
+        self.frames_per_lifetime = max(2, frames_per_lifetime)
+        self.cache = PixmapLRUCache(max_bytes)
+        # 可选的预渲染服务（FramePrefetcher），未命中时先向其领取
+        self.prefetcher = None
+        # bake在后台线程中渲染的QImage，首次取用时在GUI线程中转换为QPixmap
+        self.baked: dict[Hashable, QImage] = {}
+        self.baked_hits = 0
+
+    def quantize_time(self, time_percentage: float) -> tuple[int, float]:
+        """将生命周期百分比量化为(帧序号, 量化后的百分比)"""
+        last_frame = self.frames_per_lifetime - 1
+        frame_index = int(round(time_percentage * last_frame))
+        return frame_index, frame_index / last_frame
+
+    def frame_key(self, Constants, time_percentage: float, grayscale_image_transparent: bool,
+                  start_size: float) -> tuple[tuple, float, int]:
+        """量化参数并返回(缓存键, 量化后的百分比, 尺寸)
+
+        缓存键只由显式传入的参数决定，不依赖常量类上的可变状态。
+        """
+        frame_index, quantized_percentage = self.quantize_time(time_percentage)
+        size_multiplier = float(Constants.SIZE_OVER_LIFETIME(quantized_percentage))
+        actual_size = max(1, int(GlobalConstants.SIZE * start_size * size_multiplier))
+
+        key = (type(Constants), frame_index, actual_size, grayscale_image_transparent)
+        return key, quantized_percentage, actual_size
+
+    def get_frame(self, Constants, time_percentage: float, grayscale_image_transparent: bool,
+                  start_size: float) -> QPixmap | None:
+        """获取(必要时渲染)量化后的未旋转帧，未命中时优先取预先烘焙或预渲染线程已完成的结果"""
+        key, quantized_percentage, actual_size = self.frame_key(
+            Constants, time_percentage, grayscale_image_transparent, start_size)
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            image = self.baked.pop(key, None)
+            if image is not None:
+                self.baked_hits += 1
+                pixmap = QPixmap.fromImage(image)
+            elif self.prefetcher is not None:
+                pixmap = self.prefetcher.take(key)
+            if pixmap is None:
+                pixmap = self.render(quantized_percentage, Constants, actual_size, grayscale_image_transparent)
+            if pixmap is not None:
+                self.cache.put(key, pixmap)
+        return pixmap
+
+    def bake(self, Constants, grayscale_image_transparent: bool = False,
+             start_sizes: tuple[float, float] | None = None) -> int:
+        """
+        预先渲染一个生命周期内的所有帧（只生成QImage，可在资源预热线程中调用）
+
+        Args:
+            Constants: 特效定义
+            grayscale_image_transparent (bool): 同generate_animated_frame
+            start_sizes: 实例start_size的取值范围(最小, 最大)，烘焙范围内每帧可能出现的所有尺寸；
+                缺省时只烘焙Constants.START_SIZE
+
+        Returns:
+            int: 新烘焙的帧数
+        """
+        low, high = start_sizes or (Constants.START_SIZE, Constants.START_SIZE)
+        last_frame = self.frames_per_lifetime - 1
+        baked = 0
+        for frame_index in range(self.frames_per_lifetime):
+            quantized_percentage = frame_index / last_frame
+            size_multiplier = float(Constants.SIZE_OVER_LIFETIME(quantized_percentage))
+            smallest = max(1, int(GlobalConstants.SIZE * low * size_multiplier))
+            largest = max(1, int(GlobalConstants.SIZE * high * size_multiplier))
+            for actual_size in range(smallest, largest + 1):
+                key = (type(Constants), frame_index, actual_size, grayscale_image_transparent)
+                if key in self.cache or key in self.baked:
+                    continue
+                self.baked[key] = self.render_image(quantized_percentage, Constants, actual_size,
+                                                    grayscale_image_transparent)
+                baked += 1
+        return baked
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "baked_entries": len(self.baked), "baked_hits": self.baked_hits}
+
+
+class TintCache:
+    """着色结果缓存
+
+    change_image_by_grayscale的输出只取决于(纹理, 颜色, 透明度, 标志位)，
+    同龄的拖尾线段、同一生命周期位置的特效帧会反复请求相同的组合。
+    可选地把颜色与透明度量化到color_step的整数倍，以少量色差换取更高的命中率。
+    由add_baked登记的预先烘焙结果在未命中时直接转换为QPixmap，不再调用recolor。
+    """
+    def __init__(self,
+                 recolor: Callable[..., QPixmap],
+                 max_bytes: int,
+                 color_step: int = 1):
+        """
+        Args:
+            recolor: 实际着色函数，签名同change_image_by_grayscale
+            max_bytes (int): 缓存字节预算
+            color_step (int): 颜色与透明度的量化步长，1表示不量化
+        """
+        self.recolor = recolor
+        self.color_step = max(1, int(color_step))
+        self.cache = PixmapLRUCache(max_bytes)
+        # 缓存键 -> (形如(n, height, width)的预乘像素, 序号)
+        self.baked: dict[Hashable, tuple[np.ndarray, int]] = {}
+        self.baked_hits = 0
+
+    def quantize(self, value) -> int:
+        value = int(value)
+        if self.color_step == 1:
+            return value
+        return min(255, round(value / self.color_step) * self.color_step)
+
+    def quantize_array(self, values: np.ndarray) -> np.ndarray:
+        """quantize的向量化版本（np.round与round同为四舍六入五成双）"""
+        values = np.asarray(values).astype(np.int64)
+        if self.color_step == 1:
+            return values
+        return np.minimum(255, np.round(values / self.color_step).astype(np.int64) * self.color_step)
+
+    def tint(self,
+             image: QImage | Callable[[], QImage],
+             color: tuple,
+             alpha: int,
+             grayscale_image_transparent: bool = False,
+             impact_on_transparency: int = 255,
+             invert_grayscale: bool = False,
+             texture_key: Hashable | None = None) -> QPixmap:
+        """获取(必要时生成)着色后的QPixmap
+
+        Args:
+            image: 灰度纹理，或返回灰度纹理的可调用对象（仅在未命中时调用）
+            texture_key: 纹理的缓存键，缺省时使用image.cacheKey()；image为可调用对象时必须提供
+            其余参数同change_image_by_grayscale
+        """
+        if texture_key is None:
+            texture_key = image.cacheKey()
+        color = tuple(self.quantize(channel) for channel in color)
+        alpha = self.quantize(alpha)
+        key = (texture_key, color, alpha, grayscale_image_transparent, impact_on_transparency, invert_grayscale)
+        return self.cache.get_or_create(
+            key,
+            lambda: self._from_baked(key) or self.recolor(image() if callable(image) else image, color, alpha,
+                                                          grayscale_image_transparent, impact_on_transparency,
+                                                          invert_grayscale)
+        )
+
+    def add_baked(self,
+                  texture_key: Hashable,
+                  colors: Iterable[tuple],
+                  alphas: Iterable[int],
+                  pixels: np.ndarray,
+                  grayscale_image_transparent: bool = False,
+                  impact_on_transparency: int = 255,
+                  invert_grayscale: bool = False):
+        """
+        登记预先烘焙的着色结果
+
+        Args:
+            texture_key: 与tint的texture_key相同
+            colors, alphas: 每帧量化后的颜色与透明度
+            pixels (np.ndarray): 形如(n, height, width)的RESULT_FORMAT像素，可为只读的内存映射
+            其余参数同change_image_by_grayscale
+        """
+        for index, (color, alpha) in enumerate(zip(colors, alphas)):
+            key = (texture_key, tuple(int(channel) for channel in color), int(alpha),
+                   grayscale_image_transparent, impact_on_transparency, invert_grayscale)
+            self.baked[key] = (pixels, index)
+
+    def _from_baked(self, key: Hashable) -> QPixmap | None:
+        entry = self.baked.get(key)
+        if entry is None:
+            return None
+        pixels, index = entry
+        height, width = pixels.shape[1:]
+        self.baked_hits += 1
+        # QPixmap.fromImage会复制像素，QImage只在本次调用中引用映射的内存
+        return QPixmap.fromImage(QImage(pixels[index].data, width, height, width * 4, RESULT_FORMAT))
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "baked_entries": len(self.baked), "baked_hits": self.baked_hits}
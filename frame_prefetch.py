@@ -0,0 +1,127 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Iterable
+
+from PySide6.QtGui import QImage, QPixmap
+
+from effect_params import EffectParams
+from frame_cache import FrameAtlasCache
+
+
+class FramePrefetcher:
+    """特效帧预渲染服务
+
+    特效生成时按预计的帧时刻算出它之后要用到的图集键，
+    在线程池中以QImage渲染（着色走释放GIL的Cython实现），
+    FrameAtlasCache未命中时调用take领取：已完成的结果只需转换为QPixmap，
+    尚未完成或没有提交过的帧仍由GUI线程同步渲染。
+    过了特效生命周期仍未被领取的结果由collect丢弃。
+    """
+    def __init__(self,
+                 atlas: FrameAtlasCache,
+                 render_image: Callable[[float, object, int, bool], QImage],
+                 max_workers: int,
+                 max_pending: int):
+        """
+        Args:
+            atlas (FrameAtlasCache): 预渲染结果对应的帧图集
+            render_image: 可在工作线程中调用的渲染函数，参数同FrameAtlasCache的render，返回QImage
+            max_workers (int): 工作线程数
+            max_pending (int): 未领取的帧数上限，超出时不再提交
+        """
+        self.atlas = atlas
+        self.render_image = render_image
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frame-prefetch")
+        # 图集键 -> (Future, 过期时刻)
+        self.pending: dict[Hashable, tuple[Future, float]] = {}
+
+        self.submitted = 0
+        self.hits = 0           # 未命中图集时领取到已完成的结果
+        self.misses = 0         # 未命中图集且没有可用结果，改为同步渲染
+        self.late = 0           # misses中已提交但尚未完成的部分
+        self.expired = 0        # 直到过期都未被领取的结果
+
+    def prefetch(self,
+                 Constants,
+                 params: EffectParams,
+                 spawn_time: float,
+                 next_frame_time: float,
+                 frame_interval: float,
+                 grayscale_image_transparent: bool = False,
+                 delays: Iterable[float] = (0.0,)):
+        """
+        提交一个特效实例在生命周期内各帧的渲染
+
+        Args:
+            Constants: 特效定义
+            params (EffectParams): 实例的随机化参数
+            spawn_time (float): 特效的起始时刻
+            next_frame_time (float): 预计的下一帧时刻，之后按frame_interval递增
+            frame_interval (float): 帧间隔（秒）
+            grayscale_image_transparent (bool): 同generate_animated_frame
+            delays: 同一参数的各次发射相对spawn_time的延迟（如Ring3依次出现的图案）
+        """
+        expire_time = spawn_time + max(delays) + params.start_lifetime + frame_interval
+        frame_time = next_frame_time
+        while frame_time <= expire_time:
+            for delay in delays:
+                time_percentage = (frame_time - spawn_time - delay) / params.start_lifetime
+                if 0.0 <= time_percentage <= 1.0:
+                    self._submit(Constants, time_percentage, grayscale_image_transparent, params, expire_time)
+            frame_time += frame_interval
+
+    def _submit(self, Constants, time_percentage: float, grayscale_image_transparent: bool,
+                params: EffectParams, expire_time: float):
+        key, quantized_percentage, actual_size = self.atlas.frame_key(
+            Constants, time_percentage, grayscale_image_transparent, params.start_size)
+        if key in self.pending:
+            # 同一帧被多个实例用到时，保留到最晚的过期时刻
+            future, previous_expire_time = self.pending[key]
+            self.pending[key] = (future, max(previous_expire_time, expire_time))
+            return
+        if key in self.atlas.cache or key in self.atlas.baked or len(self.pending) >= self.max_pending:
+            return
+        future = self.executor.submit(self.render_image, quantized_percentage, Constants, actual_size,
+                                      grayscale_image_transparent)
+        self.pending[key] = (future, expire_time)
+        self.submitted += 1
+
+    def take(self, key: Hashable) -> QPixmap | None:
+        """领取已完成的帧（在GUI线程中调用）"""
+        entry = self.pending.pop(key, None)
+        if entry is not None and entry[0].done() and entry[0].exception() is None:
+            self.hits += 1
+            return QPixmap.fromImage(entry[0].result())
+        self.misses += 1
+        if entry is not None:
+            # 由GUI线程同步渲染，工作线程的结果不再需要
+            entry[0].cancel()
+            self.late += 1
+        return None
+
+    def collect(self, current_time: float):
+        """每帧调用一次：丢弃已过期仍未被领取的结果"""
+        expired = [key for key, (_, expire_time) in self.pending.items() if expire_time < current_time]
+        for key in expired:
+            future, _ = self.pending.pop(key)
+            future.cancel()
+        self.expired += len(expired)
+
+    def queue_depth(self) -> int:
+        """已提交但尚未完成的帧数"""
+        return sum(1 for future, _ in self.pending.values() if not future.done())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "pending": len(self.pending),
+            "queue_depth": self.queue_depth(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "late": self.late,
+            "expired": self.expired,
+        }
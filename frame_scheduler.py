@@ -0,0 +1,98 @@
+import time
+from typing import Callable
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+class FrameScheduler(QObject):
+    """按需运行的帧调度器
+
+    没有存活特效时停止计时器，下一次鼠标事件通过wake()重新启动；
+    时间戳统一使用单调时钟。开启自适应帧率后，帧耗时持续超出预算时降低帧率，
+    耗时回落后再逐步恢复到max_fps。
+    tick只同步完成更新，绘制在之后由update()触发，因此帧耗时为更新耗时加上由report_paint报告的最近一次绘制耗时。
+    """
+    tick = Signal(float)
+
+    # 自适应帧率参数
+    OVERRUN_RATIO = 1.0     # 帧耗时超过预算的该倍数视为超时
+    RECOVER_RATIO = 0.5     # 帧耗时低于预算的该倍数时尝试恢复帧率
+    EMA_WEIGHT = 0.2        # 帧耗时指数滑动平均的权重
+    FPS_STEP = 0.8          # 每次调整帧率的倍数
+
+    def __init__(self,
+                 is_idle: Callable[[], bool],
+                 max_fps: int,
+                 min_fps: int | None = None,
+                 adaptive: bool = False,
+                 clock: Callable[[], float] = time.monotonic,
+                 parent: QObject | None = None):
+        super().__init__(parent)
+        self.is_idle = is_idle
+        self.max_fps = max_fps
+        self.min_fps = min_fps or max_fps
+        self.adaptive = adaptive
+        self.clock = clock
+
+        self.current_fps = float(max_fps)
+        self.average_frame_cost = 0.0
+        self.paint_cost = 0.0   # 最近一次绘制的耗时（秒）
+        self.frame_count = 0
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._on_timeout)
+
+    @property
+    def frame_budget(self) -> float:
+        """当前帧率下每帧的时间预算（秒）"""
+        return 1.0 / self.current_fps
+
+    def now(self) -> float:
+        return self.clock()
+
+    def is_running(self) -> bool:
+        return self.timer.isActive()
+
+    def wake(self):
+        """有新的输入时唤醒调度器，并立即推进一帧以刷新当前时间"""
+        if self.timer.isActive():
+            return
+        self.timer.start(round(1000.0 / self.current_fps))
+        self.tick.emit(self.now())
+
+    def stop(self):
+        self.timer.stop()
+        self.paint_cost = 0.0
+
+    def report_paint(self, paint_cost: float):
+        """绘制控件在每次paintEvent结束时报告绘制耗时（秒）"""
+        self.paint_cost = paint_cost
+
+    def advance(self):
+        """手动推进一帧（回放时不运行事件循环，由回放驱动按虚拟时钟调用）"""
+        self._on_timeout()
+
+    def _on_timeout(self):
+        """计时器超时：推进一帧，空闲时停止"""
+        frame_start = self.now()
+        self.tick.emit(frame_start)
+        self.frame_count += 1
+
+        if self.adaptive:
+            # 本帧的绘制尚未发生，以上一帧的绘制耗时近似
+            self._adapt(self.now() - frame_start + self.paint_cost)
+
+        if self.is_idle():
+            self.timer.stop()
+
+    def _adapt(self, frame_cost: float):
+        """根据帧耗时（更新 + 绘制）的滑动平均调整帧率"""
+        self.average_frame_cost += (frame_cost - self.average_frame_cost) * self.EMA_WEIGHT
+        budget = self.frame_budget
+        if self.average_frame_cost > budget * self.OVERRUN_RATIO and self.current_fps > self.min_fps:
+            self.current_fps = max(self.min_fps, self.current_fps * self.FPS_STEP)
+        elif self.average_frame_cost < budget * self.RECOVER_RATIO and self.current_fps < self.max_fps:
+            self.current_fps = min(self.max_fps, self.current_fps / self.FPS_STEP)
+        else:
+            return
+        self.timer.setInterval(round(1000.0 / self.current_fps))
@@ -1,60 +1,196 @@
-from PySide6.QtGui import QPixmap, QTransform
+import os
+
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtCore import Qt
 
-from img_utils import change_image_by_grayscale
-from constants import GlobalConstants, RingConstants
+from assets import ASSETS
+from img_utils import change_image_by_grayscale, colorize_image
+from constants import GlobalConstants, RingConstants, Ring3Constants, Ring4Constants, BAKED_CACHE
+from frame_cache import FrameAtlasCache, TintCache
+from frame_prefetch import FramePrefetcher
+from effect_params import EffectParams
+from instrumentation import PROFILER, profiled
+from sprite import Sprite
 
-def generate_animated_frame(time, Constants, grayscale_image_transparent=False) -> QPixmap | None:
+def render_animated_frame(time_percentage, Constants, actual_size, grayscale_image_transparent=False) -> QPixmap:
         """
-        根据时间生成当前帧的QPixmap
+        按给定的生命周期百分比和尺寸渲染一帧未旋转的帧（不经过缓存）
         """
-        time_percentage = time / Constants.START_LIFETIME
-        # 限制时间范围在0-1之间
-        if time_percentage < 0.0 or time_percentage > 1.0:
-            return None
-        
-        # 使用推导式一次性计算RGB颜色值
-        rgb_values = tuple(
-            int(max(0, min(255, Constants.COLOR_OVER_LIFETIME[i](time_percentage))))
-            for i in range(3)  # r, g, b三个通道
-        )
+        # 一次求出RGBA四个通道的颜色值
+        rgba = Constants.COLOR_OVER_LIFETIME.rgba(time_percentage)
+        rgb_values = rgba[:3]
+        alpha_value = rgba[3]
         
-        # 获取alpha值
-        alpha_value = int(max(0, min(255, Constants.COLOR_OVER_LIFETIME[3](time_percentage))))
-        
-        # 计算尺寸缩放因子
-        size_multiplier = float(Constants.SIZE_OVER_LIFETIME(time_percentage))
-        
-        # 计算实际尺寸
-        actual_size = max(1, int(GlobalConstants.SIZE * Constants.START_SIZE * size_multiplier))  # 确保至少为1像素
-        
-        # 应用颜色和透明度变换
-        result_pixmap = change_image_by_grayscale(
-            Constants.GRAYSCALE_IMAGE,
+        # 应用颜色和透明度变换（同一颜色的着色结果在不同尺寸之间共享）
+        # 以纹理路径为键：命中或命中预先烘焙的着色帧时不需要解码纹理
+        result_pixmap = TINT_CACHE.tint(
+            lambda: Constants.GRAYSCALE_IMAGE,
             rgb_values,
             alpha_value,
-            grayscale_image_transparent
+            grayscale_image_transparent,
+            texture_key=Constants.GRAYSCALE_IMAGE_PATH
         )
         
-        # 创建变换对象
-        transform = QTransform()
-        
-        # 应用缩放变换
-        #transform.scale(size_multiplier, size_multiplier)
-        
-        # 应用旋转变换
-        transform.rotate(Constants.ROTATION_OVER_LIFETIME(time_percentage))
-        #if Constants.ROTATION_OVER_LIFETIME(time_percentage) != 0:
-        #    print(Constants.ROTATION_OVER_LIFETIME(time_percentage))
-        
-        # 应用变换到pixmap
-        transformed_pixmap = result_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
-        
-        # 调整最终尺寸
-        final_pixmap = transformed_pixmap.scaled(
+        # 调整最终尺寸（旋转在绘制时完成）
+        return result_pixmap.scaled(
             actual_size, actual_size, 
             Qt.AspectRatioMode.KeepAspectRatio, 
             Qt.TransformationMode.SmoothTransformation
         )
 
-        return final_pixmap
\ No newline at end of file
+def render_animated_image(time_percentage, Constants, actual_size, grayscale_image_transparent=False) -> QImage:
+        """
+        与render_animated_frame逐像素相同的渲染，但全程使用QImage，可在预渲染与资源预热线程中调用
+        """
+        rgba = Constants.COLOR_OVER_LIFETIME.rgba(time_percentage)
+        color = tuple(TINT_CACHE.quantize(channel) for channel in rgba[:3])
+        alpha = TINT_CACHE.quantize(rgba[3])
+        image = colorize_image(Constants.GRAYSCALE_IMAGE, color, alpha, grayscale_image_transparent)
+        
+        # QPixmap.fromImage会把没有半透明像素的图像存为Format_RGB32，其平滑缩放的结果与预乘格式略有差异，
+        # 这里做同样的转换，保证与同步渲染的帧完全一致
+        pixels = np.frombuffer(image.constBits(), dtype=np.uint32)
+        if (pixels >> 24 == 0xFF).all():
+            image = image.convertToFormat(QImage.Format.Format_RGB32)
+        
+        return image.scaled(
+            actual_size, actual_size,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+
+def render_animated_sprite(time_percentage, Constants, start_rotation, start_size, grayscale_image_transparent=False) -> Sprite:
+        """
+        与render_animated_frame相同的帧，但只取着色后的纹理，旋转与缩放留到绘制时由世界变换完成
+
+        旋转与尺寸不经过帧图集，不需要量化（逐帧随机抖动的ROTATION_OVER_LIFETIME也不会产生新的缓存条目）
+        """
+        rgba = Constants.COLOR_OVER_LIFETIME.rgba(time_percentage)
+        source = TINT_CACHE.tint(
+            lambda: Constants.GRAYSCALE_IMAGE,
+            rgba[:3],
+            rgba[3],
+            grayscale_image_transparent,
+            texture_key=Constants.GRAYSCALE_IMAGE_PATH
+        )
+        rotation = start_rotation + float(Constants.ROTATION_OVER_LIFETIME(time_percentage))
+        size_multiplier = float(Constants.SIZE_OVER_LIFETIME(time_percentage))
+        actual_size = max(1, int(GlobalConstants.SIZE * start_size * size_multiplier))
+        return Sprite.create(source, rotation, actual_size)
+
+# 全局着色结果缓存：位于change_image_by_grayscale之前，供特效帧与拖尾共用
+TINT_CACHE = TintCache(
+    PROFILER.wrap("change_image_by_grayscale", change_image_by_grayscale),
+    max_bytes=GlobalConstants.TINT_CACHE_MAX_BYTES,
+    color_step=GlobalConstants.TINT_CACHE_COLOR_STEP,
+)
+
+def bake_tinted_frames(Constants, grayscale_image_transparent=False) -> dict[str, np.ndarray]:
+        """
+        按帧图集的量化生命周期位置，把纹理着色为每个位置的颜色（重复的颜色只保留一份）
+
+        Returns:
+            dict[str, np.ndarray]: colors形如(n, 3)、alphas形如(n,)、pixels形如(n, height, width)的预乘像素
+        """
+        last_frame = FRAME_ATLAS.frames_per_lifetime - 1
+        rgba = np.array([[TINT_CACHE.quantize(channel)
+                          for channel in Constants.COLOR_OVER_LIFETIME.rgba(frame_index / last_frame)]
+                         for frame_index in range(last_frame + 1)], dtype=np.int64)
+        _, first = np.unique(rgba, axis=0, return_index=True)
+        rgba = rgba[np.sort(first)]
+
+        image = Constants.GRAYSCALE_IMAGE
+        width, height = image.width(), image.height()
+        pixels = np.empty((len(rgba), height, width), dtype=np.uint32)
+        for index, (r, g, b, a) in enumerate(rgba.tolist()):
+            # colorize_image只返回QImage，可在预热线程中调用
+            tinted = colorize_image(image, (r, g, b), a, grayscale_image_transparent)
+            pixels[index] = np.frombuffer(tinted.constBits(), dtype=np.uint32).reshape(
+                (height, tinted.bytesPerLine() // 4))[:, :width]
+        return {"colors": rgba[:, :3], "alphas": rgba[:, 3], "pixels": pixels}
+
+def load_baked_tints(Constants, grayscale_image_transparent=False):
+        """读取（必要时烘焙并写入磁盘缓存）特效的着色帧，并登记到TINT_CACHE"""
+        path = Constants.GRAYSCALE_IMAGE_PATH
+        stem = os.path.splitext(os.path.basename(path))[0]
+        arrays = BAKED_CACHE.load_or_bake(
+            f"tints-{type(Constants).__name__}-{stem}-{int(grayscale_image_transparent)}",
+            lambda: bake_tinted_frames(Constants, grayscale_image_transparent),
+            files=(path,),
+            params=(Constants.COLOR_KEY_POINTS, GlobalConstants.CURVE_LUT_SAMPLES,
+                    FRAME_ATLAS.frames_per_lifetime, TINT_CACHE.color_step),
+        )
+        TINT_CACHE.add_baked(path, arrays["colors"], arrays["alphas"], arrays["pixels"], grayscale_image_transparent)
+        return arrays
+
+# 全局帧图集缓存：帧只依赖(常量类, 量化生命周期, 尺寸)，渲染一次后反复使用
+FRAME_ATLAS = FrameAtlasCache(
+    render_animated_frame,
+    frames_per_lifetime=GlobalConstants.FRAME_CACHE_FRAMES_PER_LIFETIME,
+    max_bytes=GlobalConstants.FRAME_CACHE_MAX_BYTES,
+    render_image=render_animated_image,
+)
+
+# 以世界变换绘制未旋转、未缩放的着色纹理时不使用帧图集；NumPy合成后端需要渲染好的帧，不支持这种方式
+SPRITE_TRANSFORMS = GlobalConstants.SPRITE_TRANSFORMS and GlobalConstants.RENDER_BACKEND == "qpainter"
+
+# 帧预渲染服务：新特效之后要用到的帧在工作线程中渲染，图集未命中时领取
+# 单核机器上工作线程只会与GUI线程争用CPU，此时不启用
+_prefetch_workers = GlobalConstants.FRAME_PREFETCH_WORKERS
+if _prefetch_workers is None:
+    _prefetch_workers = min(2, (os.cpu_count() or 1) - 1)
+FRAME_PREFETCHER = FramePrefetcher(
+    FRAME_ATLAS,
+    render_animated_image,
+    max_workers=_prefetch_workers,
+    max_pending=GlobalConstants.FRAME_PREFETCH_MAX_PENDING,
+) if GlobalConstants.FRAME_PREFETCH and _prefetch_workers > 0 and not SPRITE_TRANSFORMS else None
+FRAME_ATLAS.prefetcher = FRAME_PREFETCHER
+
+# 帧图集随其他资源在后台预热时烘焙（只生成QImage），特效第一次出现时不再同步渲染
+if not SPRITE_TRANSFORMS:
+    for _Constants in (RingConstants(), Ring3Constants(), Ring4Constants()):
+        ASSETS.register(f"frame_atlas.{type(_Constants).__name__}",
+                        lambda Constants=_Constants: FRAME_ATLAS.bake(
+                            Constants, start_sizes=getattr(Constants, "START_SIZE_RANGE", None)))
+
+# 点击特效的着色帧随其他资源在后台预热时读入；Ring3与Ring4的纹理和颜色相同，只需一份
+if GlobalConstants.BAKED_CACHE_ENABLED:
+    for _Constants in (RingConstants(), Ring3Constants()):
+        ASSETS.register(f"baked_tints.{type(_Constants).__name__}", lambda Constants=_Constants: load_baked_tints(Constants))
+
+def get_effect_frame(Constants, time_percentage: float, grayscale_image_transparent: bool,
+                     start_size: float, start_rotation: float = 0.0) -> QPixmap | Sprite:
+        """
+        取生命周期百分比处的帧：SPRITE_TRANSFORMS时为着色纹理的Sprite；
+        否则取帧图集中未旋转的QPixmap，需要旋转时包装为以世界变换绘制的Sprite
+        """
+        if SPRITE_TRANSFORMS:
+            return render_animated_sprite(time_percentage, Constants, start_rotation, start_size,
+                                          grayscale_image_transparent)
+        pixmap = FRAME_ATLAS.get_frame(Constants, time_percentage, grayscale_image_transparent, start_size)
+        rotation = (start_rotation + float(Constants.ROTATION_OVER_LIFETIME(time_percentage))) % 360
+        if pixmap is None or rotation == 0:
+            return pixmap
+        # 与先旋转再把外接矩形缩放到actual_size相同的几何，外接尺寸仍为actual_size
+        return Sprite.create(pixmap, rotation, max(pixmap.width(), pixmap.height()))
+
+@profiled("generate_animated_frame")
+def generate_animated_frame(time, Constants, grayscale_image_transparent=False,
+                            params: EffectParams | None = None) -> QPixmap | Sprite | None:
+        """
+        根据时间生成当前帧的QPixmap
+        
+        params为该特效实例的随机化参数，缺省时使用Constants上的START_*常量
+        """
+        if params is None:
+            params = EffectParams.defaults(Constants)
+        time_percentage = time / params.start_lifetime
+        # 限制时间范围在0-1之间
+        if time_percentage < 0.0 or time_percentage > 1.0:
+            return None
+        
+        # 从帧图集缓存中取帧，未命中时才真正渲染（或取以世界变换绘制的Sprite）
+        return get_effect_frame(Constants, time_percentage, grayscale_image_transparent,
+                                params.start_size, params.start_rotation)
@@ -1,18 +1,128 @@
+"""
+img_utils.pyx的纯Python/NumPy实现
+
+未构建Cython扩展时导入本模块（构建方法见setup.py）。两者的公开接口必须保持一致：
+constants在导入时即使用load_grayscale_image与read_image_size，扩展缺少任何一个都会导致启动失败，
+因此修改任一实现的接口时须同时修改另一个并重新构建扩展。
+"""
 import numpy as np
-from PySide6.QtGui import QImage, QPixmap, QPainter
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from PySide6.QtCore import QSize
 from functools import lru_cache
 from typing import Tuple
 
+# 可以直接读取的源图像格式（内存布局均为0xAARRGGBB）
+_SOURCE_FORMATS = (QImage.Format.Format_ARGB32, QImage.Format.Format_RGB32)
+# 输出预乘Alpha格式：QPainter在半透明窗口上绘制时可以走快速路径，无需逐次转换
+RESULT_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
 # 缓存常用颜色转换结果
-@lru_cache(maxsize=128)
-def _get_color_multiplier(color: Tuple[int, int, int]) -> np.ndarray:
-    """缓存颜色乘数计算"""
-    return np.array(color, dtype=np.float32) / 255.0
+@lru_cache(maxsize=256)
+def _get_colorize_lut(color: Tuple[int, int, int],
+                      alpha: int,
+                      impact_on_transparency: int,
+                      invert_grayscale: bool) -> np.ndarray:
+    """
+    按灰度值0-255预先计算输出像素（定点整数运算，与img_utils.pyx完全一致）
+    
+    Returns:
+        np.ndarray: 形如(256,)的uint32查找表，值为未预乘的0xAARRGGBB
+    """
+    gray = np.arange(256, dtype=np.int64)
+    if invert_grayscale:
+        gray = 255 - gray
+    r, g, b = (int(c) * gray // 255 for c in color)
+    a = np.minimum(int(alpha) * gray // max(1, int(impact_on_transparency)), 255)
+    return ((a << 24) | (r << 16) | (g << 8) | b).astype(np.uint32)
+
+def _div_255(value):
+    """对0-255*255范围内的整数做四舍五入的除以255"""
+    value = value + 128
+    return (value + (value >> 8)) >> 8
+
+def _premultiply(pixels: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """将未预乘像素的RGB通道乘以alpha，并以alpha作为结果的Alpha通道"""
+    alpha = alpha.astype(np.uint32)
+    result = alpha << 24
+    for shift in (16, 8, 0):
+        result |= _div_255(((pixels >> shift) & 0xFF) * alpha) << shift
+    return result
+
+@lru_cache(maxsize=256)
+def _get_premultiplied_lut(color: Tuple[int, int, int],
+                           alpha: int,
+                           impact_on_transparency: int,
+                           invert_grayscale: bool) -> np.ndarray:
+    """
+    预乘Alpha后的查找表，Alpha取自灰度值时可以直接查表得到最终像素
+    """
+    lut = _get_colorize_lut(color, alpha, impact_on_transparency, invert_grayscale)
+    return _premultiply(lut, lut >> 24).astype(np.uint32)
+
+def scale_pixels(pixels: np.ndarray, factor: np.ndarray) -> np.ndarray:
+    """
+    预乘像素的四个通道同乘factor/255（与Qt的BYTE_MUL相同的定点运算，两个通道打包在一个uint32中一起计算）
+
+    Args:
+        pixels (np.ndarray): uint32预乘像素
+        factor (np.ndarray): 0-255的uint32系数，可与pixels广播
+    """
+    rb = (pixels & 0x00FF00FF) * factor
+    ag = ((pixels >> 8) & 0x00FF00FF) * factor
+    rb = ((rb + ((rb >> 8) & 0x00FF00FF) + 0x00800080) >> 8) & 0x00FF00FF
+    ag = (ag + ((ag >> 8) & 0x00FF00FF) + 0x00800080) & 0xFF00FF00
+    return rb | ag
+
+def blend_over_into(destination: np.ndarray, source: np.ndarray, parallel: bool=False) -> np.ndarray:
+    """
+    预乘像素的source-over混合：destination = source + destination * (255 - source_alpha) / 255（纯NumPy实现）
+
+    整数坐标、不缩放时与QPainter.drawPixmap的结果逐像素一致。
+    
+    Args:
+        destination (np.ndarray): 形如(height, width)的uint32预乘像素，结果写回其中（可为带步长的视图）
+        source (np.ndarray): 同形状的uint32预乘像素（可为上下翻转的视图）
+        parallel (bool): 仅Cython实现使用，按行并行
+        
+    Returns:
+        np.ndarray: destination
+    """
+    destination[:] = source + scale_pixels(destination, 255 - (source >> 24))
+    return destination
+
+def scatter_over_into(destination: np.ndarray, indices: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """
+    按数组顺序把colors逐个source-over混合到destination的indices处（纯NumPy实现）
+
+    同一像素的多次混合按先后分轮进行，每轮内下标互不相同，可以一次散射完成。
+    
+    Args:
+        destination (np.ndarray): 一维uint32预乘像素，结果写回其中
+        indices (np.ndarray): int64下标
+        colors (np.ndarray): 与indices等长的uint32预乘像素
+        
+    Returns:
+        np.ndarray: destination
+    """
+    order = np.argsort(indices, kind="stable")
+    indices, colors = indices[order], colors[order]
+    positions = np.arange(len(indices))
+    group_start = np.maximum.accumulate(np.where(np.r_[True, indices[1:] != indices[:-1]], positions, 0))
+    rank = positions - group_start
+    for current in range(int(rank.max(initial=-1)) + 1):
+        selected = rank == current
+        targets = indices[selected]
+        source = colors[selected]
+        destination[targets] = source + scale_pixels(destination[targets], 255 - (source >> 24))
+    return destination
 
 def load_grayscale_image(image_path: str) -> QImage:
     return QImage(image_path)
 
+def read_image_size(image_path: str) -> QSize:
+    """只读取文件头获得图像尺寸，不解码像素"""
+    return QImageReader(image_path).size()
+
 def split_image_vertically(image: QImage) -> tuple[QImage, QImage]:
     """
     将QImage从中间竖直对半切割
@@ -59,6 +169,62 @@ def slice_image_vertically(image: QImage) -> list[QImage]:
     
     return slices
 
+def _as_uint32_array(bits: memoryview, image: QImage) -> np.ndarray:
+    """将QImage的像素缓冲区视为形如(height, width)的uint32数组（不复制）"""
+    return np.frombuffer(bits, dtype=np.uint32).reshape(
+        (image.height(), image.bytesPerLine() // 4))[:, :image.width()]
+
+def colorize_into(image: QImage,
+                  target: QImage,
+                  color: tuple,
+                  alpha: int,
+                  grayscale_image_transparent: bool=False,
+                  impact_on_transparency: int=255,
+                  invert_grayscale: bool=False,
+                  parallel: bool=False) -> QImage:
+    """
+    将灰度图像着色后直接写入target的像素缓冲区（纯NumPy实现）
+    
+    Args:
+        image (QImage): 输入的灰度图像
+        target (QImage): 与输入同尺寸的Format_ARGB32_Premultiplied结果图像
+        parallel (bool): 仅Cython实现使用，按行并行
+        其余参数同change_image_by_grayscale
+        
+    Returns:
+        QImage: target
+    """
+    if image.format() not in _SOURCE_FORMATS:
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    
+    source = _as_uint32_array(image.constBits(), image)
+    result = _as_uint32_array(target.bits(), target)
+    
+    # 提取灰度值（假设RGB相同，取绿色通道）
+    gray_values = ((source >> 8) & 0xFF).astype(np.uint8)
+    key = (tuple(color), int(alpha), int(impact_on_transparency), bool(invert_grayscale))
+    
+    if grayscale_image_transparent:
+        # 保留原始Alpha通道，需要逐像素按源Alpha预乘
+        result[:] = _premultiply(_get_colorize_lut(*key)[gray_values], source >> 24)
+    else:
+        np.take(_get_premultiplied_lut(*key), gray_values, out=result)
+    
+    return target
+
+def colorize_image(image: QImage,
+                   color: tuple,
+                   alpha: int,
+                   grayscale_image_transparent: bool=False,
+                   impact_on_transparency: int=255,
+                   invert_grayscale: bool=False) -> QImage:
+    """
+    将灰度图像着色为新的QImage（可在工作线程中调用）
+    """
+    target = QImage(image.width(), image.height(), RESULT_FORMAT)
+    return colorize_into(image, target, color, alpha, grayscale_image_transparent,
+                         impact_on_transparency, invert_grayscale)
+
 def change_image_by_grayscale(image: QImage, 
                               color: tuple, 
                               alpha: int, 
@@ -79,56 +245,6 @@ def change_image_by_grayscale(image: QImage,
     Returns:
         QPixmap: 转换后的彩色图像
     """
-    # 确保图像是Format_ARGB32格式
-    if image.format() != QImage.Format.Format_ARGB32:
-        image = image.convertToFormat(QImage.Format.Format_ARGB32)
-    
-    # 获取图像尺寸
-    width = image.width()
-    height = image.height()
-    
-    # 使用memoryview获取图像数据
-    ptr = image.constBits()  # 使用constBits避免修改原图像
-    img_array = np.frombuffer(ptr, dtype=np.uint8)
-    img_array = img_array.reshape((height, width, 4))  # ARGB格式
-    
-    # 提取灰度值（假设RGB相同，取其中一个通道）
-    gray_values = img_array[:, :, 1].astype(np.float32)  # Green channel
-    
-    # 处理灰度反转
-    if invert_grayscale:
-        gray_values = 255 - gray_values
-    
-    # 归一化灰度值
-    gray_normalized = gray_values / 255.0
-    
-    # 获取预计算的颜色乘数
-    color_multiplier = _get_color_multiplier(color)
-    target_r, target_g, target_b = color_multiplier * 255
-    
-    # 预分配结果数组
-    result_array = np.empty((height, width, 4), dtype=np.uint8)
-    
-    # 向量化计算RGB值
-    result_array[:, :, 2] = (target_r * gray_normalized).astype(np.uint8)  # R
-    result_array[:, :, 1] = (target_g * gray_normalized).astype(np.uint8)  # G
-    result_array[:, :, 0] = (target_b * gray_normalized).astype(np.uint8)  # B
-    
-    # 处理Alpha通道
-    if grayscale_image_transparent:
-        # 保留原始Alpha通道
-        result_array[:, :, 3] = img_array[:, :, 3]
-    else:
-        # 计算新的Alpha值
-        alpha_factor = alpha / impact_on_transparency
-        new_alpha = (alpha_factor * gray_values).astype(np.uint8)
-        result_array[:, :, 3] = np.clip(new_alpha, 0, 255)
-    
-    # 创建新的QImage（使用副本确保数据独立性）
-    result_image = QImage(result_array.data, width, height, 
-                         width * 4, QImage.Format.Format_ARGB32)
-    
-    # 创建独立副本避免内存问题
-    final_image = result_image.copy()
-    
-    return QPixmap.fromImage(final_image)
\ No newline at end of file
+    # QPixmap.fromImage与源图像隐式共享像素数据，复用源图像并不能省去分配，每次着色到新图像即可
+    return QPixmap.fromImage(colorize_image(image, color, alpha, grayscale_image_transparent,
+                                            impact_on_transparency, invert_grayscale))
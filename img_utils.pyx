@@ -1,24 +1,68 @@
 # cython: language_level=3
 import numpy as np
-cimport numpy as np
-from PySide6.QtGui import QImage, QPixmap
-from PySide6.QtCore import Qt
+from cython.parallel cimport prange
+from libc.stdint cimport int64_t, uint8_t, uint32_t
+from PySide6.QtGui import QImage, QImageReader, QPixmap
 from functools import lru_cache
 from typing import Tuple
 
-# 使用C类型声明
-ctypedef np.uint8_t uint8
-ctypedef np.float32_t float32
+# 可以直接读取的源图像格式（内存布局均为0xAARRGGBB）
+_SOURCE_FORMATS = (QImage.Format.Format_ARGB32, QImage.Format.Format_RGB32)
+# 输出预乘Alpha格式：QPainter在半透明窗口上绘制时可以走快速路径，无需逐次转换
+RESULT_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
 
-# 缓存颜色转换结果
-@lru_cache(maxsize=128)
-def _get_color_multiplier(color: Tuple[int, int, int]) -> np.ndarray:
-    """缓存颜色乘数计算"""
-    return np.array(color, dtype=np.float32) / 255.0
+# 行数不少于该值时才按行并行，避免小图像的线程调度开销
+cdef Py_ssize_t PARALLEL_MIN_ROWS = 64
+
+# 缓存常用颜色转换结果
+@lru_cache(maxsize=256)
+def _get_colorize_lut(color: Tuple[int, int, int],
+                      alpha: int,
+                      impact_on_transparency: int,
+                      invert_grayscale: bool) -> np.ndarray:
+    """
+    按灰度值0-255预先计算输出像素（定点整数运算，与img_utils.py完全一致，未预乘）
+    """
+    gray = np.arange(256, dtype=np.int64)
+    if invert_grayscale:
+        gray = 255 - gray
+    r, g, b = (int(c) * gray // 255 for c in color)
+    a = np.minimum(int(alpha) * gray // max(1, int(impact_on_transparency)), 255)
+    return ((a << 24) | (r << 16) | (g << 8) | b).astype(np.uint32)
+
+@lru_cache(maxsize=256)
+def _get_premultiplied_lut(color: Tuple[int, int, int],
+                           alpha: int,
+                           impact_on_transparency: int,
+                           invert_grayscale: bool) -> np.ndarray:
+    """
+    预乘Alpha后的查找表，Alpha取自灰度值时可以直接查表得到最终像素
+    """
+    lut = _get_colorize_lut(color, alpha, impact_on_transparency, invert_grayscale)
+    cdef uint32_t[::1] result = np.empty(256, dtype=np.uint32)
+    cdef const uint32_t[::1] straight = lut
+    cdef Py_ssize_t i
+    for i in range(256):
+        result[i] = _premultiply(straight[i], straight[i] >> 24)
+    return np.asarray(result)
+
+def scale_pixels(pixels, factor):
+    """
+    预乘像素的四个通道同乘factor/255（NumPy数组运算，与img_utils.py完全一致）
+    """
+    rb = (pixels & 0x00FF00FF) * factor
+    ag = ((pixels >> 8) & 0x00FF00FF) * factor
+    rb = ((rb + ((rb >> 8) & 0x00FF00FF) + 0x00800080) >> 8) & 0x00FF00FF
+    ag = (ag + ((ag >> 8) & 0x00FF00FF) + 0x00800080) & 0xFF00FF00
+    return rb | ag
 
 cpdef load_grayscale_image(str image_path):
     return QImage(image_path)
 
+cpdef read_image_size(str image_path):
+    """只读取文件头获得图像尺寸，不解码像素"""
+    return QImageReader(image_path).size()
+
 cpdef split_image_vertically(image):
     """
     将QImage从中间竖直对半切割
@@ -26,8 +70,8 @@ cpdef split_image_vertically(image):
     cdef int width = image.width()
     cdef int height = image.height()
     cdef int mid_x = width // 2
-    
-    return (image.copy(0, 0, mid_x, height), 
+
+    return (image.copy(0, 0, mid_x, height),
             image.copy(mid_x, 0, width - mid_x, height))
 
 cpdef slice_image_vertically(image):
@@ -36,9 +80,124 @@ cpdef slice_image_vertically(image):
     """
     cdef int width = image.width()
     cdef int height = image.height()
-    
+
     return [image.copy(x, 0, 1, height) for x in range(width)]
 
+cdef inline uint32_t _div_255(uint32_t value) noexcept nogil:
+    """对0-255*255范围内的整数做四舍五入的除以255"""
+    value = value + 128
+    return (value + (value >> 8)) >> 8
+
+cdef inline uint32_t _premultiply(uint32_t pixel, uint32_t alpha) noexcept nogil:
+    """将未预乘像素的RGB通道乘以alpha，并以alpha作为结果的Alpha通道"""
+    return ((alpha << 24)
+            | (_div_255(((pixel >> 16) & 0xFF) * alpha) << 16)
+            | (_div_255(((pixel >> 8) & 0xFF) * alpha) << 8)
+            | _div_255((pixel & 0xFF) * alpha))
+
+cdef void _colorize_row(const uint32_t[::1] source,
+                        uint32_t[::1] result,
+                        Py_ssize_t source_offset,
+                        Py_ssize_t result_offset,
+                        Py_ssize_t width,
+                        const uint32_t[::1] lut,
+                        bint keep_alpha) noexcept nogil:
+    """着色一行像素：查表得到颜色，必要时保留源Alpha
+
+    keep_alpha为False时lut已预乘，直接查表；否则lut未预乘，按源Alpha逐像素预乘
+    """
+    cdef Py_ssize_t x
+    cdef uint32_t pixel
+    for x in range(width):
+        pixel = source[source_offset + x]
+        if keep_alpha:
+            result[result_offset + x] = _premultiply(lut[(pixel >> 8) & 0xFF], pixel >> 24)
+        else:
+            result[result_offset + x] = lut[(pixel >> 8) & 0xFF]
+
+cdef inline uint32_t _byte_mul(uint32_t pixel, uint32_t factor) noexcept nogil:
+    """预乘像素的四个通道同乘factor/255（Qt的BYTE_MUL）"""
+    cdef uint32_t rb = (pixel & 0x00FF00FF) * factor
+    cdef uint32_t ag = ((pixel >> 8) & 0x00FF00FF) * factor
+    rb = ((rb + ((rb >> 8) & 0x00FF00FF) + 0x00800080) >> 8) & 0x00FF00FF
+    ag = (ag + ((ag >> 8) & 0x00FF00FF) + 0x00800080) & 0xFF00FF00U
+    return rb | ag
+
+cdef inline uint32_t _over(uint32_t destination, uint32_t source) noexcept nogil:
+    """预乘像素的source-over混合，完全透明与完全不透明的源像素直接返回"""
+    cdef uint32_t alpha = source >> 24
+    if alpha == 255:
+        return source
+    if source == 0:
+        return destination
+    return source + _byte_mul(destination, 255 - alpha)
+
+cdef void _blend_over_row(uint32_t[:, :] destination,
+                          const uint32_t[:, :] source,
+                          Py_ssize_t y,
+                          Py_ssize_t width) noexcept nogil:
+    """混合一行像素"""
+    cdef Py_ssize_t x
+    for x in range(width):
+        destination[y, x] = _over(destination[y, x], source[y, x])
+
+cpdef colorize_into(
+    image,
+    target,
+    tuple color,
+    int alpha,
+    bint grayscale_image_transparent=False,
+    int impact_on_transparency=255,
+    bint invert_grayscale=False,
+    bint parallel=False
+):
+    """
+    将灰度图像着色后直接写入target的像素缓冲区（释放GIL，可按行并行）
+    """
+    if image.format() not in _SOURCE_FORMATS:
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+
+    cdef Py_ssize_t width = image.width()
+    cdef Py_ssize_t height = image.height()
+    cdef Py_ssize_t source_stride = image.bytesPerLine() // 4
+    cdef Py_ssize_t result_stride = target.bytesPerLine() // 4
+
+    # 直接以uint32视图访问QImage的像素缓冲区，不做任何复制
+    cdef const uint32_t[::1] source = memoryview(image.constBits()).cast('B').cast('I')
+    cdef uint32_t[::1] result = memoryview(target.bits()).cast('B').cast('I')
+    cdef bint keep_alpha = grayscale_image_transparent
+    cdef const uint32_t[::1] lut
+    if keep_alpha:
+        lut = _get_colorize_lut(color, alpha, impact_on_transparency, invert_grayscale)
+    else:
+        lut = _get_premultiplied_lut(color, alpha, impact_on_transparency, invert_grayscale)
+
+    cdef Py_ssize_t y
+    with nogil:
+        if parallel and height >= PARALLEL_MIN_ROWS:
+            for y in prange(height, schedule='static'):
+                _colorize_row(source, result, y * source_stride, y * result_stride, width, lut, keep_alpha)
+        else:
+            for y in range(height):
+                _colorize_row(source, result, y * source_stride, y * result_stride, width, lut, keep_alpha)
+
+    return target
+
+cpdef colorize_image(
+    image,
+    tuple color,
+    int alpha,
+    bint grayscale_image_transparent=False,
+    int impact_on_transparency=255,
+    bint invert_grayscale=False
+):
+    """
+    将灰度图像着色为新的QImage（可在工作线程中调用）
+    """
+    target = QImage(image.width(), image.height(), RESULT_FORMAT)
+    return colorize_into(image, target, color, alpha, grayscale_image_transparent,
+                         impact_on_transparency, invert_grayscale)
+
 cpdef change_image_by_grayscale(
     image,
     tuple color,
@@ -48,58 +207,42 @@ cpdef change_image_by_grayscale(
     bint invert_grayscale=False
 ):
     """
-    修复后的灰度图像着色处理函数
+    灰度图像着色处理函数
     """
-    # 确保图像是ARGB32格式
-    if image.format() != QImage.Format_ARGB32:
-        image = image.convertToFormat(QImage.Format_ARGB32)
-    
-    cdef int width = image.width()
-    cdef int height = image.height()
-    
-    # 创建图像数据的深拷贝，确保数据独立
-    cdef np.ndarray[np.uint8_t, ndim=3] img_array = np.frombuffer(
-        image.constBits(), 
-        dtype=np.uint8
-    ).reshape((height, width, 4)).copy()  # 添加copy()确保数据独立
-    
-    # 预处理颜色乘数
-    cdef np.ndarray[np.float32_t] color_mult = _get_color_multiplier(color)
-    cdef np.ndarray[np.float32_t] color_mult_255 = color_mult * 255
-    
-    # 获取灰度值(向量化操作)
-    cdef np.ndarray[np.uint8_t, ndim=2] gray_values = img_array[:, :, 1].copy()
-    
-    # 灰度反转(向量化)
-    if invert_grayscale:
-        gray_values = 255 - gray_values
-    
-    # 归一化灰度(向量化)
-    cdef np.ndarray[np.float32_t, ndim=2] gray_normalized = gray_values.astype(np.float32) / 255.0
-    
-    # 创建结果数组
-    cdef np.ndarray[np.uint8_t, ndim=3] result = np.empty((height, width, 4), dtype=np.uint8)
-    
-    # 计算RGB通道(向量化)
-    result[:, :, 2] = (color_mult_255[0] * gray_normalized).astype(np.uint8)  # R
-    result[:, :, 1] = (color_mult_255[1] * gray_normalized).astype(np.uint8)  # G
-    result[:, :, 0] = (color_mult_255[2] * gray_normalized).astype(np.uint8)  # B
-    
-    # 处理Alpha通道(向量化)
-    cdef float32 alpha_factor = alpha / impact_on_transparency
-    if grayscale_image_transparent:
-        result[:, :, 3] = img_array[:, :, 3]  # 保留原Alpha
-    else:
-        result[:, :, 3] = np.clip((gray_values * alpha_factor).astype(np.uint8), 0, 255)
-    
-    # 创建QImage时确保数据独立
-    cdef bytes result_bytes = result.tobytes()
-    result_image = QImage(
-        result_bytes, 
-        width, 
-        height, 
-        width * 4, 
-        QImage.Format_ARGB32
-    )
-    
-    return QPixmap.fromImage(result_image.copy())
\ No newline at end of file
+    # QPixmap.fromImage与源图像隐式共享像素数据，复用源图像并不能省去分配，每次着色到新图像即可
+    return QPixmap.fromImage(colorize_image(image, color, alpha, grayscale_image_transparent,
+                                            impact_on_transparency, invert_grayscale))
+
+cpdef blend_over_into(uint32_t[:, :] destination, const uint32_t[:, :] source, bint parallel=False):
+    """
+    预乘像素的source-over混合，结果写回destination（释放GIL，可按行并行）
+    """
+    cdef Py_ssize_t height = destination.shape[0]
+    cdef Py_ssize_t width = destination.shape[1]
+    if source.shape[0] != height or source.shape[1] != width:
+        raise ValueError("destination与source的形状不同")
+
+    cdef Py_ssize_t y
+    with nogil:
+        if parallel and height >= PARALLEL_MIN_ROWS:
+            for y in prange(height, schedule='static'):
+                _blend_over_row(destination, source, y, width)
+        else:
+            for y in range(height):
+                _blend_over_row(destination, source, y, width)
+    return destination.base
+
+cpdef scatter_over_into(uint32_t[::1] destination, const int64_t[::1] indices, const uint32_t[::1] colors):
+    """
+    按数组顺序把colors逐个source-over混合到destination的indices处（释放GIL，顺序执行即满足先后关系）
+    """
+    if indices.shape[0] != colors.shape[0]:
+        raise ValueError("indices与colors的长度不同")
+
+    cdef Py_ssize_t i
+    cdef int64_t index
+    with nogil:
+        for i in range(indices.shape[0]):
+            index = indices[i]
+            destination[index] = _over(destination[index], colors[i])
+    return destination.base
@@ -0,0 +1,45 @@
+import threading
+
+import numpy as np
+
+class InputRingBuffer:
+    """鼠标采样环形缓冲区
+
+    pynput监听线程写入原始采样(x, y, t, pressed)，Qt线程每帧批量取出一次，
+    避免每个原始移动事件都跨线程派发信号。缓冲区写满时丢弃最旧的采样。
+    """
+    X, Y, T, PRESSED = range(4)
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, 4), dtype=np.float64)
+        self.write_count = 0    # 累计写入的采样数
+        self.read_count = 0     # 累计取出（或丢弃）的采样数
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.write_count - self.read_count
+
+    def push(self, x: float, y: float, t: float, pressed: bool) -> bool:
+        """写入一个采样，返回写入前缓冲区是否为空（调用方据此决定是否唤醒Qt线程）"""
+        with self.lock:
+            was_empty = self.write_count == self.read_count
+            if self.write_count - self.read_count >= self.capacity:
+                self.read_count += 1
+                self.dropped += 1
+            self.samples[self.write_count % self.capacity] = (x, y, t, pressed)
+            self.write_count += 1
+        return was_empty
+
+    def drain(self) -> np.ndarray:
+        """取出全部未读采样，返回形如(n, 4)的数组（按时间顺序）"""
+        with self.lock:
+            count = self.write_count - self.read_count
+            start = self.read_count % self.capacity
+            if start + count <= self.capacity:
+                drained = self.samples[start:start + count].copy()
+            else:
+                drained = np.concatenate((self.samples[start:], self.samples[:start + count - self.capacity]))
+            self.read_count = self.write_count
+        return drained
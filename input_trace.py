@@ -0,0 +1,160 @@
+import hashlib
+import os
+import random
+import struct
+import threading
+
+import numpy as np
+from PySide6.QtCore import QPoint, Qt
+from PySide6.QtGui import QImage, QPainter
+
+# 文件格式：文件头(魔数, 版本) + 若干条定长记录(t, x, y, kind)，小端序
+TRACE_MAGIC = b"DTTR"
+TRACE_VERSION = 1
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<diiB")
+RECORD_DTYPE = np.dtype([("t", "<f8"), ("x", "<i4"), ("y", "<i4"), ("kind", "u1")])
+
+# 记录类型
+MOVE, PRESS, RELEASE = range(3)
+
+class InputTraceRecorder:
+    """鼠标输入录制器
+
+    记录pynput监听线程中on_click/on_move的调用（仅MOUSE_HIT_AREA内的按键），
+    时间戳为帧调度器的单调时钟，写入时换算为相对第一条记录的秒数。
+    每条记录17字节，可由load_trace直接读成NumPy结构数组。
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION))
+        self.start_time = None
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, kind: int, x: float, y: float, timestamp: float):
+        with self.lock:
+            if self.file is None:
+                return
+            if self.start_time is None:
+                self.start_time = timestamp
+            self.file.write(RECORD.pack(timestamp - self.start_time, round(x), round(y), kind))
+            self.count += 1
+
+    def record_click(self, x: float, y: float, pressed: bool, timestamp: float):
+        self.record(PRESS if pressed else RELEASE, x, y, timestamp)
+
+    def record_move(self, x: float, y: float, timestamp: float):
+        self.record(MOVE, x, y, timestamp)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+def load_trace(path: str) -> np.ndarray:
+    """读取录制文件，返回按时间排序的结构数组（字段t, x, y, kind）"""
+    with open(path, "rb") as file:
+        magic, version = HEADER.unpack(file.read(HEADER.size))
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"不是有效的输入录制文件: {path}")
+    size = os.path.getsize(path) - HEADER.size
+    count = size // RECORD_DTYPE.itemsize
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+
+class VirtualClock:
+    """回放用的虚拟时钟，替换帧调度器的单调时钟"""
+    def __init__(self, start: float = 0.0):
+        self.time = start
+
+    def __call__(self) -> float:
+        return self.time
+
+class TraceReplayer:
+    """确定性回放驱动
+
+    按录制的时间戳把事件送入窗口的监听入口（与pynput回调相同的路径，经MouseSignalHandler派发），
+    帧调度器改用虚拟时钟并由本驱动按帧间隔手动推进，随机数使用固定种子，
+    因此同一录制文件每次回放都会绘制出完全相同的帧。
+    """
+    def __init__(self, window, trace: np.ndarray, seed: int = 0, frames_dir: str | None = None):
+        """
+        Args:
+            window: TransparentWindow（应以listen_mouse=False创建）
+            trace (np.ndarray): load_trace的返回值
+            seed (int): random与numpy.random的种子
+            frames_dir (str | None): 每帧渲染结果的PNG输出目录，缺省时只计算摘要
+        """
+        self.window = window
+        self.trace = trace
+        self.seed = seed
+        self.frames_dir = frames_dir
+        self.clock = VirtualClock()
+        self.frame_count = 0
+        self.digest = hashlib.sha256()
+
+        scheduler = window.frame_scheduler
+        scheduler.clock = self.clock
+        # 在窗口自身的帧回调之后渲染本帧
+        scheduler.tick.connect(self._render_frame)
+
+        widget = window.fullscreen_widget
+        self.canvas = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+        self.canvas.fill(Qt.GlobalColor.transparent)
+        self.previous_region = widget.last_dirty_region
+
+    def _render_frame(self, current_time: float):
+        """把本帧的重绘区域渲染到画布，并累计画布内容的摘要"""
+        widget = self.window.fullscreen_widget
+        region = widget.last_dirty_region.united(self.previous_region)
+        self.previous_region = widget.last_dirty_region
+        if not region.isEmpty():
+            # 与半透明窗口的后备缓冲区一样，先清空重绘区域再绘制
+            painter = QPainter(self.canvas)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            for rect in region:
+                painter.fillRect(rect, Qt.GlobalColor.transparent)
+            painter.end()
+            widget.render(self.canvas, QPoint(), region)
+        self.digest.update(struct.pack("<d", current_time))
+        self.digest.update(bytes(self.canvas.constBits()))
+        if self.frames_dir is not None:
+            self.canvas.save(os.path.join(self.frames_dir, f"frame_{self.frame_count:06d}.png"))
+        self.frame_count += 1
+
+    def _dispatch(self, event):
+        x, y, kind = int(event["x"]), int(event["y"]), int(event["kind"])
+        if kind == MOVE:
+            self.window.on_listener_move(x, y)
+        else:
+            self.window.on_listener_click(x, y, kind == PRESS)
+
+    def run(self) -> dict:
+        """回放全部事件并推进到特效结束，返回帧数与所有帧的摘要"""
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+        if self.frames_dir is not None:
+            os.makedirs(self.frames_dir, exist_ok=True)
+
+        scheduler = self.window.frame_scheduler
+        index, count = 0, len(self.trace)
+        next_frame = 0.0
+        while index < count or scheduler.is_running():
+            frame_interval = scheduler.timer.interval() / 1000.0
+            if scheduler.is_running() and (index >= count or next_frame <= self.trace[index]["t"]):
+                # 帧调度器运行中：在下一帧时刻推进一帧
+                self.clock.time = next_frame
+                scheduler.advance()
+                next_frame += frame_interval
+            else:
+                # 先送入该时刻之前的输入；唤醒调度器时会立即推进一帧，之后按帧间隔继续
+                was_running = scheduler.is_running()
+                self.clock.time = float(self.trace[index]["t"])
+                self._dispatch(self.trace[index])
+                index += 1
+                if not was_running and scheduler.is_running():
+                    next_frame = self.clock.time + frame_interval
+        scheduler.stop()
+        return {"events": count, "frames": self.frame_count, "digest": self.digest.hexdigest()}
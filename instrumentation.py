@@ -0,0 +1,142 @@
+import functools
+import json
+import time
+from typing import Callable
+
+import numpy as np
+
+from constants import GlobalConstants
+
+class RollingHistogram:
+    """保留最近capacity个样本的滚动统计（环形NumPy数组）"""
+    # 导出直方图的桶边界（毫秒）
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66)
+
+    def __init__(self, capacity: int):
+        self.samples = np.zeros(capacity, dtype=np.float64)
+        self.count = 0      # 累计样本数
+
+    def add(self, value: float):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+
+    def values(self) -> np.ndarray:
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def summary(self) -> dict:
+        """最近样本的百分位数与分桶计数（单位毫秒）"""
+        values = self.values() * 1e3
+        if len(values) == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        counts = np.bincount(np.searchsorted(self.BUCKETS_MS, values), minlength=len(self.BUCKETS_MS) + 1)
+        return {
+            "count": self.count,
+            "p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(values.max()), "mean": float(values.mean()),
+            "buckets_ms": dict(zip([f"<{b}" for b in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}"], counts.tolist())),
+        }
+
+class FrameProfiler:
+    """分阶段帧耗时统计
+
+    profiled(stage)装饰器把每次调用的耗时记入该阶段的滚动直方图；
+    未启用时装饰器原样返回被装饰函数，不引入任何额外开销。
+    计数器以回调注册，只在生成快照时求值。
+    """
+    def __init__(self, enabled: bool, window: int, dump_path: str | None = None, dump_interval: float = 5.0):
+        """
+        Args:
+            enabled (bool): 是否记录耗时
+            window (int): 每个阶段保留的样本数
+            dump_path (str | None): 非空时按dump_interval定期写入JSON快照
+            dump_interval (float): 写入间隔（秒，按帧时间计）
+        """
+        self.enabled = enabled
+        self.window = window
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.stages: dict[str, RollingHistogram] = {}
+        self.counters: dict[str, Callable[[], object]] = {}
+        self.last_frame_time = None
+        self.last_dump_time = None
+
+    def record(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = RollingHistogram(self.window)
+        histogram.add(seconds)
+
+    def profiled(self, stage: str):
+        """记录被装饰函数每次调用的耗时"""
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """与profiled相同，用于无法直接装饰的函数（如Cython实现）"""
+        return self.profiled(stage)(func)
+
+    def register_counter(self, name: str, getter: Callable[[], object]):
+        self.counters[name] = getter
+
+    def frame(self, current_time: float):
+        """每帧调用一次：记录帧间隔，并按需写入快照"""
+        if not self.enabled:
+            return
+        if self.last_frame_time is not None:
+            self.record("frame_interval", current_time - self.last_frame_time)
+        self.last_frame_time = current_time
+
+        if self.dump_path is None:
+            return
+        if self.last_dump_time is None:
+            self.last_dump_time = current_time
+        elif current_time - self.last_dump_time >= self.dump_interval:
+            self.last_dump_time = current_time
+            self.dump(self.dump_path)
+
+    def snapshot(self) -> dict:
+        return {
+            "stages": {stage: histogram.summary() for stage, histogram in self.stages.items()},
+            "counters": {name: getter() for name, getter in self.counters.items()},
+        }
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2, ensure_ascii=False)
+
+    def overlay_lines(self) -> list[str]:
+        """调试覆盖层显示的文本：各阶段p50/p95/max与计数器"""
+        lines = []
+        interval = self.stages.get("frame_interval")
+        if interval is not None and interval.count:
+            lines.append(f"fps {1.0 / max(float(np.median(interval.values())), 1e-6):5.1f}")
+        for stage, histogram in self.stages.items():
+            if stage == "frame_interval" or not histogram.count:
+                continue
+            values = histogram.values() * 1e3
+            p50, p95 = np.percentile(values, (50, 95))
+            lines.append(f"{stage:<26} p50 {p50:6.2f}  p95 {p95:6.2f}  max {values.max():6.2f} ms")
+        for name, getter in self.counters.items():
+            lines.append(f"{name:<26} {getter()}")
+        return lines
+
+# 全局实例：DEBUG_MODE下总是开启
+PROFILER = FrameProfiler(
+    enabled=GlobalConstants.PROFILING or GlobalConstants.DEBUG_MODE,
+    window=GlobalConstants.PROFILING_WINDOW,
+    dump_path=GlobalConstants.PROFILING_DUMP_PATH,
+    dump_interval=GlobalConstants.PROFILING_DUMP_INTERVAL,
+)
+profiled = PROFILER.profiled
@@ -1,19 +1,22 @@
+import argparse
 import sys
-import time
 from PySide6.QtWidgets import QApplication, QMainWindow
-from PySide6.QtCore import Qt, QRect, QPoint, QTimer, Signal, QObject
-from pynput import mouse
+from PySide6.QtCore import Qt, QRect, QPoint, Signal, QObject
 
+from assets import ASSETS
 from constants import GlobalConstants
-from utils import set_mouse_thru, get_fps
+from utils import set_mouse_thru
+from frame_scheduler import FrameScheduler
+from input_buffer import InputRingBuffer
+from input_trace import InputTraceRecorder, TraceReplayer, load_trace
 
-from components.touch_effect_widget import TouchEffectWidget
+from generate_frame import FRAME_PREFETCHER
 from components.full_screen_widget import FullScreenWidget
 
 class MouseSignalHandler(QObject):
     """鼠标事件信号处理器"""
     mouse_clicked = Signal(QPoint)
-    mouse_moved = Signal(QPoint, bool)  # pos, is_pressed
+    mouse_samples_ready = Signal()  # 拖动采样写入空缓冲区时发出，每帧至多一次
     mouse_state_changed = Signal(bool)  # is_pressed
     
     def __init__(self):
@@ -23,19 +26,24 @@ class TransparentWindow(QMainWindow):
     # 定义更新画面信号
     update_signal = Signal(float)
     
-    def __init__(self):
+    def __init__(self, listen_mouse: bool = True, trace_recorder: InputTraceRecorder | None = None):
+        """
+        Args:
+            listen_mouse (bool): 是否启动pynput监听；回放与基准测试时由外部直接调用on_listener_*
+            trace_recorder (InputTraceRecorder | None): 录制监听到的鼠标输入
+        """
         super().__init__()
+        self.trace_recorder = trace_recorder
+        self.listener_pressed = False  # 监听线程维护的按键状态
         self.initUI()
-        self.setup_mouse_handler()
-        self.start_mouse_listener()
         self.setup_timer()
-        self.touch_effects = []  # 存储所有触摸效果widget
+        self.setup_mouse_handler()
+        if listen_mouse:
+            self.start_mouse_listener()
         self.is_mouse_pressed = False  # 当前鼠标按下状态
         
         # 创建全屏特效控件
         self.setup_fullscreen_effects()
-        
-        #self.fps = get_fps()
 
     def initUI(self):
         # 设置窗口无边框
@@ -68,70 +76,100 @@ class TransparentWindow(QMainWindow):
         # 创建统一的全屏特效控件
         self.fullscreen_widget = FullScreenWidget(self.update_signal, self)
         self.fullscreen_widget.set_fullscreen_geometry(screens)
+        self.fullscreen_widget.painted.connect(self.frame_scheduler.report_paint)
         self.fullscreen_widget.show()
 
     def setup_mouse_handler(self):
         """设置鼠标事件处理器"""
         self.mouse_handler = MouseSignalHandler()
         self.mouse_handler.mouse_clicked.connect(self.handle_mouse_click)
-        self.mouse_handler.mouse_moved.connect(self.handle_mouse_move)
+        self.mouse_handler.mouse_samples_ready.connect(self.handle_mouse_samples_ready)
+        
+        # 监听线程写入、Qt线程每帧批量取出的鼠标采样缓冲区
+        self.mouse_samples = InputRingBuffer(GlobalConstants.INPUT_BUFFER_CAPACITY)
         self.mouse_handler.mouse_state_changed.connect(self.handle_mouse_state)
 
     def handle_mouse_click(self, global_pos):
         """处理鼠标点击事件"""
         local_pos = self.mapFromGlobal(global_pos)
+        self.frame_scheduler.wake()
         self.create_touch_effect(local_pos)
 
-    def handle_mouse_move(self, global_pos, is_pressed):
-        """处理鼠标移动事件 - 传递给全屏特效"""
-        local_pos = self.mapFromGlobal(global_pos)
-        self.fullscreen_widget.add_trail_input(local_pos, is_pressed)
+    def handle_mouse_samples_ready(self):
+        """有新的拖动采样时唤醒帧调度器"""
+        self.frame_scheduler.wake()
+
+    def process_mouse_samples(self):
+        """每帧一次批量处理鼠标采样 - 按原始时间戳传递给全屏特效"""
+        for x, y, timestamp, pressed in self.mouse_samples.drain().tolist():
+            local_pos = self.mapFromGlobal(QPoint(int(x), int(y)))
+            self.fullscreen_widget.add_trail_input(local_pos, bool(pressed), timestamp)
 
     def handle_mouse_state(self, is_pressed):
         """处理鼠标按键状态变化"""
         self.is_mouse_pressed = is_pressed
 
     def setup_timer(self):
-        """设置60帧计时器"""
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.on_timer_timeout)
-        self.frame_time = 1000.0 / GlobalConstants.MAX_FPS
-        self.timer.start(self.frame_time)
-        self.elapsed_time = 0.0
-
-    def on_timer_timeout(self):
-        """计时器超时处理"""
-        current_time = time.time()
+        """设置按需运行的帧调度器（没有特效时停止，鼠标事件时唤醒）"""
+        self.frame_scheduler = FrameScheduler(
+            is_idle=lambda: self.fullscreen_widget.is_idle(),
+            max_fps=GlobalConstants.MAX_FPS,
+            min_fps=GlobalConstants.MIN_FPS,
+            adaptive=GlobalConstants.ADAPTIVE_FRAME_PACING,
+            parent=self
+        )
+        self.frame_scheduler.tick.connect(self.on_timer_timeout)
+
+    def on_timer_timeout(self, current_time: float):
+        """帧调度处理（current_time为单调时钟时间）"""
+        # 先处理本帧累积的鼠标采样
+        self.process_mouse_samples()
         
         # 发送更新信号（会触发全屏特效更新）
         self.update_signal.emit(current_time)
-        
-        # 清理已经完成的特效
-        self.touch_effects = [effect for effect in self.touch_effects if effect.isVisible()]
+
+    def on_listener_click(self, x, y, pressed):
+        """监听到有效按键（MOUSE_HIT_AREA内）按下/松开，在监听线程或回放驱动中调用"""
+        timestamp = self.frame_scheduler.now()
+        if self.trace_recorder is not None:
+            self.trace_recorder.record_click(x, y, pressed, timestamp)
+        # 监听线程自己维护按键状态，保证采样与按键事件的先后顺序一致
+        self.listener_pressed = pressed
+        # 按下/松开也记录为采样，拖尾从按下位置开始、在松开时结束
+        self.mouse_samples.push(x, y, timestamp, pressed)
+        if pressed:
+            self.mouse_handler.mouse_clicked.emit(QPoint(x, y))
+        # 发送状态变化信号
+        self.mouse_handler.mouse_state_changed.emit(pressed)
+
+    def on_listener_move(self, x, y):
+        """监听到鼠标移动，在监听线程或回放驱动中调用"""
+        timestamp = self.frame_scheduler.now()
+        if self.trace_recorder is not None:
+            self.trace_recorder.record_move(x, y, timestamp)
+        # 未按下时的移动不影响拖尾（松开时已由按键采样结束拖尾），不写入缓冲区：
+        # 调度器停止时没有人取出采样，悬停移动会堆满缓冲区并在下次点击时被整体回放
+        if not self.listener_pressed:
+            return
+        # 只在缓冲区由空变为非空时通知Qt线程
+        if self.mouse_samples.push(x, y, timestamp, True):
+            self.mouse_handler.mouse_samples_ready.emit()
 
     def start_mouse_listener(self):
+        # 只在真正监听鼠标时加载pynput（无显示环境下无法导入）
+        from pynput import mouse
+
         def on_click(x, y, button, pressed):
             if button in GlobalConstants.MOUSE_HIT_AREA:
-                if pressed:
-                    self.mouse_handler.mouse_clicked.emit(QPoint(x, y))
-                # 发送状态变化信号
-                self.mouse_handler.mouse_state_changed.emit(pressed)
-
-        def on_move(x, y):
-            # 使用当前鼠标状态
-            self.mouse_handler.mouse_moved.emit(QPoint(x, y), self.is_mouse_pressed)
+                self.on_listener_click(x, y, pressed)
 
         # 启动鼠标监听器
-        self.mouse_listener = mouse.Listener(on_click=on_click, on_move=on_move)
+        self.mouse_listener = mouse.Listener(on_click=on_click, on_move=self.on_listener_move)
         self.mouse_listener.start()
 
     def create_touch_effect(self, pos):
-        """在指定位置创建触摸效果"""
-        effect_widget = TouchEffectWidget(pos, time.time(), self.update_signal, self)
-        side = GlobalConstants.TOUCH_EFFECT_WIDGET_SIDE
-        effect_widget.setGeometry(pos.x() - side / 2, pos.y() - side / 2, side, side)
-        effect_widget.show()
-        self.touch_effects.append(effect_widget)
+        """在指定位置创建触摸效果（由全屏特效控件统一绘制）"""
+        self.fullscreen_widget.add_click_effect(pos, self.frame_scheduler.now())
 
     def showEvent(self, event):
         """窗口显示时设置Windows穿透属性"""
@@ -139,14 +177,53 @@ class TransparentWindow(QMainWindow):
         hwnd = int(self.winId())
         set_mouse_thru(hwnd)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="DesktopTouch")
+    parser.add_argument("--record", metavar="PATH", help="将鼠标输入录制到文件")
+    parser.add_argument("--replay", metavar="PATH", help="以虚拟时钟确定性地回放录制文件后退出")
+    parser.add_argument("--seed", type=int, default=0, help="回放时使用的随机数种子")
+    parser.add_argument("--frames-dir", metavar="DIR", help="回放时把每帧保存为PNG")
+    args, _ = parser.parse_known_args()
+    return args
+
+def replay(path: str, seed: int, frames_dir: str | None) -> int:
+    """回放录制文件并输出帧数与所有帧的摘要（同一文件与种子的摘要应始终相同）"""
+    window = TransparentWindow(listen_mouse=False)
+    window.show()
+    # 与正常启动一样预热资源（读取磁盘缓存中的烘焙结果），并等待其完成，使回放不受加载时机影响
+    ASSETS.warm_up().join()
+    QApplication.processEvents()
+    result = TraceReplayer(window, load_trace(path), seed, frames_dir).run()
+    print(f"events={result['events']} frames={result['frames']} digest={result['digest']}")
+    return 0
+
+def shutdown_workers():
+    """退出前取消尚未开始的预渲染任务，避免解释器退出时等待整个队列"""
+    if FRAME_PREFETCHER is not None:
+        FRAME_PREFETCHER.shutdown()
+
 def main():
+    args = parse_args()
     app = QApplication(sys.argv)
     
+    if args.replay:
+        exit_code = replay(args.replay, args.seed, args.frames_dir)
+        shutdown_workers()
+        sys.exit(exit_code)
+    
+    recorder = InputTraceRecorder(args.record) if args.record else None
+    
     # 创建并显示透明窗口
-    window = TransparentWindow()
+    window = TransparentWindow(trace_recorder=recorder)
     window.show()
+    # 窗口显示后在后台加载纹理与曲线，第一个特效出现时通常已加载完毕
+    ASSETS.warm_up()
     
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    shutdown_workers()
+    if recorder is not None:
+        recorder.close()
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
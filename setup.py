@@ -1,18 +1,40 @@
-from setuptools import setup
+"""
+img_utils的Cython扩展构建脚本
+
+在仓库根目录执行（需要Cython、NumPy与支持OpenMP的C编译器）：
+    python setup.py build_ext --inplace
+
+生成的img_utils.c、扩展模块（Windows下为.pyd，其他平台为.so）与build/目录都是构建产物，不纳入版本库，
+修改img_utils.pyx后需重新构建。未构建扩展时导入的是纯Python/NumPy实现img_utils.py，两者接口相同。
+"""
+import sys
+
+from setuptools import setup, Extension
 from Cython.Build import cythonize
 import numpy as np
 
+# 启用OpenMP并行（colorize_into中的prange）
+if sys.platform == "win32":
+    openmp_compile_args = ["/openmp"]
+    openmp_link_args = []
+else:
+    openmp_compile_args = ["-fopenmp"]
+    openmp_link_args = ["-fopenmp"]
+
 setup(
     name="img_utils",
     ext_modules=cythonize(
-        "img_utils.pyx",
+        Extension(
+            "img_utils",
+            ["img_utils.pyx"],
+            include_dirs=[np.get_include()],
+            extra_compile_args=openmp_compile_args,
+            extra_link_args=openmp_link_args,
+        ),
         compiler_directives={
             'language_level': "3",
             'boundscheck': False,
             'wraparound': False
         }
     ),
-    include_dirs=[np.get_include()],
-    extra_compile_args=["-fopenmp"],  # 启用OpenMP并行
-    extra_link_args=["-fopenmp"]
 )
@@ -0,0 +1,99 @@
+import math
+from dataclasses import dataclass
+
+from PySide6.QtCore import QPointF, QRect
+from PySide6.QtGui import QPainter, QPixmap, QTransform
+
+
+@dataclass
+class Sprite:
+    """以世界变换绘制的特效帧
+
+    source是未旋转、未缩放的着色纹理（来自着色结果缓存，同一颜色只有一份），
+    旋转与缩放在绘制时通过QPainter的世界变换完成，不生成任何中间QPixmap。
+    提供与QPixmap相同的width/height/rect/isNull接口，外接尺寸与帧图集中同参数的帧一致，
+    计算重绘区域与绘制位置的代码无需区分两者。
+    """
+    source: QPixmap
+    rotation: float     # 旋转角度（度）
+    scale: float        # 旋转后的外接矩形按比例缩放到目标尺寸以内的倍数
+    bounding_width: int
+    bounding_height: int
+
+    @classmethod
+    def create(cls, source: QPixmap, rotation: float, size: int) -> "Sprite":
+        """
+        与render_animated_frame相同的几何：先旋转，再把旋转后的外接矩形按比例缩放到size以内
+
+        Args:
+            source (QPixmap): 着色后的纹理
+            rotation (float): 旋转角度（度）
+            size (int): 目标尺寸（像素）
+        """
+        radians = math.radians(rotation)
+        cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+        width, height = source.width(), source.height()
+        box_width, box_height = width * cos + height * sin, width * sin + height * cos
+        scale = size / max(box_width, box_height)
+        return cls(source, rotation, scale,
+                   max(1, round(box_width * scale)), max(1, round(box_height * scale)))
+
+    def width(self) -> int:
+        return self.bounding_width
+
+    def height(self) -> int:
+        return self.bounding_height
+
+    def rect(self) -> QRect:
+        return QRect(0, 0, self.bounding_width, self.bounding_height)
+
+    def isNull(self) -> bool:
+        return self.source.isNull()
+
+    def draw(self, painter: QPainter, x: float, y: float, flip: bool = False):
+        """
+        以(x, y)为外接矩形左上角绘制
+
+        Args:
+            painter (QPainter): 绘制器对象
+            x, y (float): 外接矩形左上角
+            flip (bool): 是否在旋转之后上下翻转
+        """
+        base_transform = painter.transform()
+        # 依次：缩放 -> 旋转 -> 翻转 -> 平移到外接矩形中心（QTransform的调用顺序与作用顺序相反）
+        transform = QTransform()
+        transform.translate(x + self.bounding_width / 2, y + self.bounding_height / 2)
+        if flip:
+            transform.scale(1, -1)
+        transform.rotate(self.rotation)
+        transform.scale(self.scale, self.scale)
+        painter.setTransform(transform * base_transform)
+        painter.drawPixmap(QPointF(-self.source.width() / 2, -self.source.height() / 2), self.source)
+        painter.setTransform(base_transform)
+
+
+def draw_frame(painter: QPainter, x: int, y: int, frame: QPixmap | Sprite, flip: bool = False):
+    """
+    以(x, y)为左上角绘制帧图集中的QPixmap或Sprite
+
+    flip时上下翻转：QPixmap也通过世界变换翻转，不再每次生成翻转后的QPixmap。
+
+    Args:
+        painter (QPainter): 绘制器对象
+        x, y (int): 左上角
+        frame (QPixmap | Sprite): 当前帧
+        flip (bool): 是否上下翻转
+    """
+    if isinstance(frame, Sprite):
+        frame.draw(painter, x, y, flip)
+    elif flip:
+        # 整像素位置的上下翻转只是逐行复制，关闭插值后与QPixmap.transformed的结果逐像素一致
+        smooth = painter.testRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        base_transform = painter.transform()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.setTransform(QTransform(1, 0, 0, -1, x, y + frame.height()) * base_transform)
+        painter.drawPixmap(0, 0, frame)
+        painter.setTransform(base_transform)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, smooth)
+    else:
+        painter.drawPixmap(x, y, frame)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from curves import Curve, CurveLUT, HermiteCurve, LinearCurve, PiecewiseCurve
+
+# 区间内、端点与区间外的采样点
+SAMPLES = np.array([-1.0, -0.25, 0.0, 0.125, 0.25, 0.5, 0.75, 0.9, 1.0, 1.5, 2.0])
+
+
+def assert_scalar_matches_vectorized(curve: Curve):
+    vectorized = curve.evaluate(SAMPLES, dtype=np.float64)
+    scalars = np.array([curve.scalar(float(t)) for t in SAMPLES])
+    np.testing.assert_allclose(vectorized, scalars, rtol=1e-6, atol=1e-6)
+
+
+class TestLinearCurve:
+    curve = LinearCurve((0.0, 0.5, 1.0), (0.0, 10.0, 4.0))
+
+    @pytest.mark.parametrize("t, expected", [
+        (0.0, 0.0), (0.25, 5.0), (0.5, 10.0), (0.75, 7.0), (1.0, 4.0),
+        # 区间外取端点值
+        (-1.0, 0.0), (2.0, 4.0),
+    ])
+    def test_reference_values(self, t, expected):
+        assert self.curve.scalar(t) == pytest.approx(expected)
+        assert self.curve.evaluate(np.array([t]), dtype=np.float64)[0] == pytest.approx(expected)
+
+    def test_scalar_matches_vectorized(self):
+        assert_scalar_matches_vectorized(self.curve)
+
+    def test_call_dispatches_on_input_type(self):
+        assert isinstance(self.curve(0.25), float)
+        assert self.curve(0.25) == pytest.approx(5.0)
+        result = self.curve(np.array([0.25, 0.75]))
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, [5.0, 7.0])
+
+
+class TestHermiteCurve:
+    # 两端切线为0的单段曲线即smoothstep: 3s^2 - 2s^3
+    smoothstep = HermiteCurve((0.0, 1.0), (0.0, 1.0), (0.0, 0.0))
+    curve = HermiteCurve((0.0, 0.214, 1.0), (0.652, 1.432, 2.0), (2.4, 0.9, 0.0))
+
+    @pytest.mark.parametrize("t, expected", [
+        (0.0, 0.0), (0.25, 0.15625), (0.5, 0.5), (0.75, 0.84375), (1.0, 1.0),
+        # 区间外按端点所在段的多项式外推
+        (-1.0, 5.0), (2.0, -4.0),
+    ])
+    def test_reference_values(self, t, expected):
+        assert self.smoothstep.scalar(t) == pytest.approx(expected)
+        assert self.smoothstep.evaluate(np.array([t]), dtype=np.float64)[0] == pytest.approx(expected)
+
+    def test_interpolates_key_points(self):
+        for x, y in zip((0.0, 0.214, 1.0), (0.652, 1.432, 2.0)):
+            assert self.curve.scalar(x) == pytest.approx(y)
+
+    def test_scalar_matches_vectorized(self):
+        assert_scalar_matches_vectorized(self.smoothstep)
+        assert_scalar_matches_vectorized(self.curve)
+
+    def test_matches_scipy(self):
+        interpolate = pytest.importorskip("scipy.interpolate")
+        reference = interpolate.CubicHermiteSpline((0.0, 0.214, 1.0), (0.652, 1.432, 2.0), (2.4, 0.9, 0.0))
+        np.testing.assert_allclose(self.curve.evaluate(SAMPLES, dtype=np.float64), reference(SAMPLES), rtol=1e-9)
+
+
+class TestPiecewiseCurve:
+    curve = PiecewiseCurve(0.5, LinearCurve((0.0, 1.0), (0.0, 1.0)), LinearCurve((0.0, 1.0), (10.0, 20.0)))
+
+    @pytest.mark.parametrize("t, expected", [
+        (0.0, 0.0), (0.25, 0.25), (0.4999, 0.4999),
+        # break_point本身属于第二段
+        (0.5, 15.0), (1.0, 20.0),
+        (-1.0, 0.0), (2.0, 20.0),
+    ])
+    def test_reference_values(self, t, expected):
+        assert self.curve.scalar(t) == pytest.approx(expected)
+        assert self.curve.evaluate(np.array([t]), dtype=np.float64)[0] == pytest.approx(expected)
+
+    def test_scalar_matches_vectorized(self):
+        assert_scalar_matches_vectorized(self.curve)
+
+
+class TestCurveLUT:
+    lut = CurveLUT(np.array([0.0, 1.0, 4.0]))
+
+    @pytest.mark.parametrize("t, expected", [
+        (0.0, 0.0), (0.25, 0.5), (0.5, 1.0), (0.75, 2.5), (1.0, 4.0),
+        # 区间外夹取到[0, 1]
+        (-1.0, 0.0), (2.0, 4.0),
+    ])
+    def test_reference_values(self, t, expected):
+        assert self.lut.scalar(t) == pytest.approx(expected)
+        assert self.lut.evaluate(np.array([t]), dtype=np.float64)[0] == pytest.approx(expected)
+
+    def test_scalar_matches_vectorized(self):
+        assert_scalar_matches_vectorized(self.lut)
+
+    def test_to_lut_approximates_curve(self):
+        curve = HermiteCurve((0.0, 0.214, 1.0), (0.652, 1.432, 2.0), (2.4, 0.9, 0.0))
+        lut = curve.to_lut(1024)
+        t = np.linspace(0.0, 1.0, 257)
+        np.testing.assert_allclose(lut.evaluate(t), curve.evaluate(t), atol=1e-4)
+        assert lut.scalar(0.0) == pytest.approx(0.652)
+        assert lut.scalar(1.0) == pytest.approx(2.0)
+
+
+def test_curve_requires_scalar_and_evaluate():
+    class ScalarOnly(Curve):
+        def scalar(self, t: float) -> float:
+            return t
+
+    with pytest.raises(TypeError):
+        ScalarOnly()
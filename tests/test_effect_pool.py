@@ -0,0 +1,98 @@
+import pytest
+
+from components.effect_pool import EffectPool
+
+
+class Slot:
+    """记录activate/deactivate调用的槽位"""
+    def __init__(self, number: int):
+        self.number = number
+        self.args = None
+        self.events = []
+
+    def activate(self, *args):
+        self.args = args
+        self.events.append(("activate", args))
+
+    def deactivate(self):
+        self.args = None
+        self.events.append(("deactivate",))
+
+
+def make_pool(capacity: int) -> EffectPool[Slot]:
+    created = []
+
+    def factory():
+        created.append(Slot(len(created)))
+        return created[-1]
+
+    return EffectPool(factory, capacity)
+
+
+def test_acquire_creates_slots_up_to_capacity():
+    pool = make_pool(3)
+    items = [pool.acquire(i) for i in range(3)]
+    assert [item.number for item in items] == [0, 1, 2]
+    assert [item.args for item in items] == [(0,), (1,), (2,)]
+    assert len(pool) == 3
+    assert pool.created == 3
+
+
+def test_released_slot_is_reused_without_factory_call():
+    pool = make_pool(3)
+    first = pool.acquire("a")
+    pool.acquire("b")
+    pool.release(first)
+    assert first.args is None
+    assert pool.free == [first]
+
+    again = pool.acquire("c")
+    assert again is first
+    assert again.args == ("c",)
+    assert pool.created == 2
+    assert pool.free == []
+    assert [item.args for item in pool.active] == [("b",), ("c",)]
+
+
+def test_most_recently_released_slot_is_reused_first():
+    pool = make_pool(3)
+    items = [pool.acquire(i) for i in range(3)]
+    pool.release(items[0])
+    pool.release(items[2])
+    assert pool.acquire("x") is items[2]
+    assert pool.acquire("y") is items[0]
+
+
+def test_full_pool_recycles_oldest_active_slot():
+    pool = make_pool(2)
+    oldest = pool.acquire("old")
+    newer = pool.acquire("new")
+    recycled = pool.acquire("third")
+    assert recycled is oldest
+    assert pool.created == 2
+    assert pool.active == [newer, oldest]
+    assert oldest.events == [("activate", ("old",)), ("deactivate",), ("activate", ("third",))]
+    assert pool.free == []
+
+
+def test_release_where_releases_matching_slots():
+    pool = make_pool(4)
+    items = [pool.acquire(i) for i in range(4)]
+    pool.release_where(lambda item: item.args[0] % 2 == 0)
+    assert pool.active == [items[1], items[3]]
+    assert set(pool.free) == {items[0], items[2]}
+    assert items[0].args is None and items[2].args is None
+
+
+def test_capacity_is_at_least_one():
+    pool = make_pool(0)
+    first = pool.acquire(1)
+    assert pool.acquire(2) is first
+    assert len(pool) == 1
+
+
+def test_release_unknown_slot_raises():
+    pool = make_pool(2)
+    pool.acquire(1)
+    with pytest.raises(ValueError):
+        pool.release(Slot(99))
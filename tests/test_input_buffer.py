@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+
+from input_buffer import InputRingBuffer
+
+
+def push_range(buffer: InputRingBuffer, start: int, stop: int) -> list[bool]:
+    """写入以i编号的采样(i, -i, i / 100, i为奇数)，返回每次push的返回值"""
+    return [buffer.push(i, -i, i / 100, bool(i % 2)) for i in range(start, stop)]
+
+
+def assert_samples(drained: np.ndarray, numbers):
+    numbers = np.array(numbers, dtype=np.float64)
+    expected = np.column_stack([numbers, -numbers, numbers / 100, numbers % 2])
+    np.testing.assert_array_equal(drained, expected.reshape(-1, 4))
+
+
+def test_push_reports_empty_to_non_empty_transition():
+    buffer = InputRingBuffer(8)
+    assert push_range(buffer, 0, 3) == [True, False, False]
+    buffer.drain()
+    assert push_range(buffer, 3, 5) == [True, False]
+
+
+def test_drain_returns_samples_in_order_and_empties_buffer():
+    buffer = InputRingBuffer(8)
+    push_range(buffer, 0, 5)
+    assert len(buffer) == 5
+    assert_samples(buffer.drain(), range(5))
+    assert len(buffer) == 0
+    assert buffer.drain().shape == (0, 4)
+
+
+def test_drain_across_wraparound():
+    buffer = InputRingBuffer(4)
+    push_range(buffer, 0, 3)
+    assert_samples(buffer.drain(), range(3))
+    # 读写位置从3开始，后续采样跨过数组末尾
+    push_range(buffer, 3, 7)
+    assert len(buffer) == 4
+    assert_samples(buffer.drain(), range(3, 7))
+    assert buffer.dropped == 0
+
+
+def test_overflow_drops_oldest_samples():
+    buffer = InputRingBuffer(4)
+    results = push_range(buffer, 0, 7)
+    # 写满后缓冲区始终非空
+    assert results == [True] + [False] * 6
+    assert len(buffer) == 4
+    assert buffer.dropped == 3
+    assert_samples(buffer.drain(), range(3, 7))
+
+
+def test_overflow_after_partial_drain():
+    buffer = InputRingBuffer(4)
+    push_range(buffer, 0, 2)
+    buffer.drain()
+    push_range(buffer, 2, 9)
+    assert buffer.dropped == 3
+    assert_samples(buffer.drain(), range(5, 9))
+
+
+def test_concurrent_writer_loses_nothing_within_capacity():
+    buffer = InputRingBuffer(4096)
+    drained = []
+    writer = threading.Thread(target=push_range, args=(buffer, 0, 2000))
+    writer.start()
+    while writer.is_alive():
+        drained.append(buffer.drain())
+    writer.join()
+    drained.append(buffer.drain())
+    assert_samples(np.concatenate(drained), range(2000))
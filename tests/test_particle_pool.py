@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from components.particle_pool import ParticlePool
+
+
+def spawn_numbered(pool: ParticlePool, lifetimes, start_time: float = 0.0):
+    """按顺序生成粒子，第i个粒子的各字段都由i推出，便于检查删除后各字段是否仍属于同一个粒子"""
+    for i, lifetime in enumerate(lifetimes):
+        pool.spawn(position=(i * 10.0, i * 20.0), velocity=(i + 1.0, -(i + 1.0)), start_time=start_time,
+                   lifetime=lifetime, size=i * 0.5, rotation=i * 30.0, time_offset=i * 0.01)
+
+
+def assert_rows_belong_to(pool: ParticlePool, particles):
+    """前count行依次为particles中编号的粒子，且所有字段彼此一致"""
+    assert len(pool) == len(particles)
+    ids = np.array(particles, dtype=np.float64)
+    n = pool.count
+    np.testing.assert_array_equal(pool.spawn_position[:n], np.column_stack([ids * 10.0, ids * 20.0]))
+    np.testing.assert_array_equal(pool.velocity[:n], np.column_stack([ids + 1.0, -(ids + 1.0)]))
+    np.testing.assert_array_equal(pool.size[:n], ids * 0.5)
+    np.testing.assert_array_equal(pool.rotation[:n], ids * 30.0)
+    np.testing.assert_array_equal(pool.time_offset[:n], ids * 0.01)
+
+
+def test_spawn_appends_in_order():
+    pool = ParticlePool(8)
+    spawn_numbered(pool, [1.0] * 3)
+    assert len(pool) == 3
+    assert_rows_belong_to(pool, [0, 1, 2])
+
+
+def test_swap_remove_moves_last_alive_particle_into_gaps():
+    pool = ParticlePool(8)
+    # 粒子1与3在t=0.5时过期
+    spawn_numbered(pool, [1.0, 0.2, 1.0, 0.3, 1.0])
+    pool.update(0.5)
+    # 先删除3（由4补位），再删除1（由补位后的末尾粒子4补位，2保持不动）
+    assert_rows_belong_to(pool, [0, 4, 2])
+    np.testing.assert_allclose(pool.age[:pool.count], 0.5)
+    np.testing.assert_array_equal(pool.lifetime[:pool.count], 1.0)
+
+
+def test_expired_tail_is_truncated_without_swaps():
+    pool = ParticlePool(8)
+    spawn_numbered(pool, [1.0, 1.0, 0.1, 0.1])
+    pool.update(0.5)
+    assert_rows_belong_to(pool, [0, 1])
+
+
+def test_all_particles_expire():
+    pool = ParticlePool(4)
+    spawn_numbered(pool, [0.1, 0.2, 0.3])
+    pool.update(1.0)
+    assert len(pool) == 0
+    # 空池再次更新不做任何事
+    pool.update(2.0)
+    assert len(pool) == 0
+
+
+def test_lifetime_boundary_counts_as_expired():
+    pool = ParticlePool(4)
+    spawn_numbered(pool, [0.5, 0.6])
+    pool.update(0.5)
+    assert_rows_belong_to(pool, [1])
+
+
+def test_positions_follow_velocity_after_removal():
+    pool = ParticlePool(8, distance_scale=2.0)
+    spawn_numbered(pool, [1.0, 0.1, 1.0])
+    pool.update(0.25)
+    assert_rows_belong_to(pool, [0, 2])
+    for row, particle in enumerate([0, 2]):
+        elapsed = particle * 0.01 + 0.25
+        expected = np.array([particle * 10.0, particle * 20.0]) + np.array([1.0, -1.0]) * (particle + 1.0) * elapsed * 2.0
+        np.testing.assert_allclose(pool.position[row], expected)
+
+
+def test_full_pool_overwrites_earliest_particle():
+    pool = ParticlePool(3)
+    for start_time in (0.3, 0.1, 0.2):
+        pool.spawn((0.0, 0.0), (0.0, 0.0), start_time, lifetime=1.0, size=start_time)
+    index = pool.spawn((5.0, 5.0), (0.0, 0.0), 0.4, lifetime=1.0, size=0.4)
+    assert index == 1
+    assert len(pool) == 3
+    assert pool.size[:3].tolist() == pytest.approx([0.3, 0.4, 0.2])
+    np.testing.assert_array_equal(pool.position[1], (5.0, 5.0))
+    assert pool.age[1] == 0.0
+
+
+def test_clear():
+    pool = ParticlePool(4)
+    spawn_numbered(pool, [1.0, 1.0])
+    pool.clear()
+    assert len(pool) == 0
@@ -0,0 +1,39 @@
+import numpy as np
+
+from components.trail_points import TrailPointBuffer
+
+
+def test_pop_last_on_empty_buffer_returns_none():
+    buffer = TrailPointBuffer(4)
+    assert buffer.pop_last() is None
+    assert len(buffer) == 0
+    # 空缓冲区弹出后仍可正常写入
+    buffer.append(1.0, 2.0, 0.5)
+    assert len(buffer) == 1
+
+
+def test_pop_last_returns_points_newest_first():
+    buffer = TrailPointBuffer(4)
+    buffer.append(0.0, 0.0, 0.0)
+    buffer.append(3.0, 4.0, 0.1)
+    np.testing.assert_array_equal(buffer.pop_last(), [3.0, 4.0, 0.1])
+    np.testing.assert_array_equal(buffer.pop_last(), [0.0, 0.0, 0.0])
+    assert buffer.pop_last() is None
+
+
+def test_replace_last_on_empty_buffer_appends():
+    buffer = TrailPointBuffer(4)
+    index = buffer.replace_last(5.0, 6.0, 0.2)
+    assert len(buffer) == 1
+    np.testing.assert_array_equal(buffer.points[index], [5.0, 6.0, 0.2])
+
+
+def test_append_caches_segment_geometry_and_wraps():
+    buffer = TrailPointBuffer(3)
+    for i in range(5):
+        buffer.append(3.0 * i, 4.0 * i, i / 10)
+    # 写满后丢弃最旧的点
+    assert len(buffer) == 3
+    indices = buffer.indices()
+    np.testing.assert_array_equal(buffer.points[indices, TrailPointBuffer.X], [6.0, 9.0, 12.0])
+    np.testing.assert_allclose(buffer.geometry[indices, TrailPointBuffer.LENGTH], 5.0)
@@ -1,5 +1,5 @@
 import ctypes
-import numpy as np
+import sys
 
 def get_fps(default_fps = 60):
     """
@@ -31,6 +31,9 @@ class WindowsApiConstants:
     GWL_EXSTYLE = -20
 
 def set_mouse_thru(hwnd):
+    # 鼠标穿透只在Windows上通过扩展样式实现
+    if sys.platform != "win32":
+        return
     # 获取当前扩展样式
     current_style = ctypes.windll.user32.GetWindowLongW(hwnd, WindowsApiConstants.GWL_EXSTYLE)
     # 设置新的扩展样式（透明+分层）
@@ -39,10 +42,3 @@ def set_mouse_thru(hwnd):
         WindowsApiConstants.GWL_EXSTYLE, 
         current_style | WindowsApiConstants.WS_EX_LAYERED | WindowsApiConstants.WS_EX_TRANSPARENT
     )
-
-def evaluate_piecewise_hermite(break_point, func1, func2):
-    """分段hermite插值计算"""
-    def evaluator(x):
-        mask = np.asarray(x) < break_point
-        return np.where(mask, func1(x), func2(x))
-    return evaluator
\ No newline at end of file